@@ -1,61 +1,25 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from scipy.stats import mannwhitneyu, kruskal, chi2_contingency, pearsonr, spearmanr
 import os
 import warnings
+from olist_dataset import build_orders_summary
+from olist_profiling import profiled
+from olist_sampling import sample_fraction_option, print_sampling_report, print_unweighted_notice
+from lazy_imports import lazy_module, lazy_attributes
 warnings.filterwarnings('ignore')
 
-def load_data():
-    """Carrega e prepara os dados para análise"""
-    # Código similar ao anterior
-    items_df = pd.read_csv('olist-csv/olist_order_items_dataset.csv')
-    products_df = pd.read_csv('olist-csv/olist_products_dataset.csv')
-    translation_df = pd.read_csv('olist-csv/product_category_name_translation.csv')
-    orders_df = pd.read_csv('olist-csv/olist_orders_dataset.csv')
-    customers_df = pd.read_csv('olist-csv/olist_customers_dataset.csv')
-    payments_df = pd.read_csv('olist-csv/olist_order_payments_dataset.csv')
-    
-    # Merge e limpeza (código similar ao anterior)
-    items_products = items_df.merge(products_df[['product_id', 'product_category_name']], on='product_id', how='left')
-    items_products_trans = items_products.merge(translation_df, on='product_category_name', how='left')
-    orders_customers = orders_df.merge(customers_df[['customer_id', 'customer_state']], on='customer_id', how='left')
-    
-    final_df = items_products_trans.merge(
-        orders_customers[['order_id', 'customer_state', 'order_status', 'order_purchase_timestamp']], 
-        on='order_id', how='left'
-    )
-    
-    final_df = final_df[
-        (final_df['order_status'] == 'delivered') &
-        (final_df['price'] > 0) &
-        (final_df['price'] <= 10000) &
-        (final_df['freight_value'] >= 0) &
-        (final_df['product_category_name_english'].notna()) &
-        (final_df['customer_state'].notna())
-    ]
-    
-    orders_summary = final_df.groupby(['order_id', 'customer_state']).agg({
-        'price': 'sum',
-        'freight_value': 'sum',
-        'order_item_id': 'count',
-        'product_category_name_english': lambda x: x.mode().iloc[0],
-        'order_purchase_timestamp': 'first'
-    }).reset_index()
-    
-    orders_summary.columns = ['order_id', 'customer_state', 'order_ticket', 'freight_value', 'n_items', 'product_category', 'order_date']
-    orders_summary['freight_ratio'] = orders_summary['freight_value'] / orders_summary['order_ticket']
-    orders_summary['freight_ratio'] = orders_summary['freight_ratio'].clip(0, 1)
-    
-    payments_summary = payments_df.groupby('order_id').agg({
-        'payment_type': lambda x: x.mode().iloc[0],
-        'payment_installments': 'mean',
-        'payment_value': 'sum'
-    }).reset_index()
-    
-    orders_summary = orders_summary.merge(payments_summary, on='order_id', how='left')
+# Bibliotecas de gráficos e estatística carregadas no primeiro uso
+plt = lazy_module('matplotlib.pyplot')
+sns = lazy_module('seaborn')
+stats = lazy_module('scipy.stats')
+mannwhitneyu, kruskal, chi2_contingency, pearsonr, spearmanr = lazy_attributes(
+    stats, 'mannwhitneyu', 'kruskal', 'chi2_contingency', 'pearsonr', 'spearmanr')
+
+@profiled()
+def load_data(orders_summary=None, sample=None):
+    """Carrega e prepara os dados para análise (a partir de um resumo já carregado, se informado)"""
+    # Resumo por pedido (itens, categorias, UF e pagamentos)
+    orders_summary = build_orders_summary(sample=sample) if orders_summary is None else orders_summary.copy()
     
     # Variáveis temporais
     orders_summary['order_date'] = pd.to_datetime(orders_summary['order_date'])
@@ -95,6 +59,7 @@ def load_data():
     
     return orders_summary
 
+@profiled()
 def creative_question_1(df):
     """
     PERGUNTA CRIATIVA 1: Existe diferença no ticket médio entre regiões do Brasil?
@@ -102,6 +67,7 @@ def creative_question_1(df):
     print("\n" + "="*80)
     print("PERGUNTA CRIATIVA 1: Existe diferença no ticket médio entre regiões do Brasil?")
     print("="*80)
+    print_unweighted_notice(df)
     
     # Estatísticas por região
     region_stats = df.groupby('region')['order_ticket'].agg([
@@ -137,6 +103,7 @@ def creative_question_1(df):
     
     return {'test': 'Kruskal-Wallis', 'p_value': p_value, 'conclusion': conclusion}
 
+@profiled()
 def creative_question_2(df):
     """
     PERGUNTA CRIATIVA 2: Pedidos com múltiplos itens têm maior ticket médio POR ITEM?
@@ -144,6 +111,7 @@ def creative_question_2(df):
     print("\n" + "="*80)
     print("PERGUNTA CRIATIVA 2: Pedidos com múltiplos itens têm maior ticket médio POR ITEM?")
     print("="*80)
+    print_unweighted_notice(df)
     
     # Calcular ticket por item
     df['ticket_per_item'] = df['order_ticket'] / df['n_items']
@@ -188,6 +156,7 @@ def creative_question_2(df):
     
     return {'test': 'Mann-Whitney U', 'p_value': p_value, 'conclusion': conclusion}
 
+@profiled()
 def creative_question_3(df):
     """
     PERGUNTA CRIATIVA 3: Pedidos de fim de semana têm ticket médio diferente?
@@ -195,6 +164,7 @@ def creative_question_3(df):
     print("\n" + "="*80)
     print("PERGUNTA CRIATIVA 3: Pedidos de fim de semana têm ticket médio diferente?")
     print("="*80)
+    print_unweighted_notice(df)
     
     # Estatísticas por tipo de dia
     weekend_stats = df.groupby('is_weekend')['order_ticket'].agg([
@@ -233,6 +203,7 @@ def creative_question_3(df):
     
     return {'test': 'Mann-Whitney U', 'p_value': p_value, 'conclusion': conclusion}
 
+@profiled()
 def creative_question_4(df):
     """
     PERGUNTA CRIATIVA 4: Existe associação entre alto frete e múltiplos itens?
@@ -240,6 +211,7 @@ def creative_question_4(df):
     print("\n" + "="*80)
     print("PERGUNTA CRIATIVA 4: Existe associação entre alto frete e múltiplos itens?")
     print("="*80)
+    print_unweighted_notice(df)
     
     # Tabela de contingência
     contingency_table = pd.crosstab(df['high_freight'], df['multiple_items'], 
@@ -281,13 +253,14 @@ def creative_question_4(df):
     
     return {'test': 'Qui-quadrado', 'p_value': p_value, 'conclusion': conclusion, 'cramers_v': cramers_v}
 
-def main():
-    """Executa as perguntas criativas adicionais"""
+def main(sample=None):
+    """Executa as perguntas criativas adicionais (sample: fração da amostra estratificada)"""
     print("PERGUNTAS ESTATÍSTICAS CRIATIVAS ADICIONAIS")
     print("=" * 80)
     
-    df = load_data()
+    df = load_data(sample=sample)
     print(f"Dados carregados: {len(df)} pedidos")
+    print_sampling_report(df, ['order_ticket', 'freight_ratio'])
     
     os.makedirs('charts', exist_ok=True)
     
@@ -318,4 +291,4 @@ def main():
             print(f"   Cramér's V: {result['cramers_v']:.4f}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(sample=sample_fraction_option())
\ No newline at end of file
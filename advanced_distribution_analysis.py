@@ -1,29 +1,188 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from scipy.optimize import minimize
 import warnings
-from matplotlib.gridspec import GridSpec
 import os
 from collections import OrderedDict
+from olist_dataset import N_WORKERS, build_orders_summary
+from olist_sampling import SAMPLE_SEED, sample_fraction_option
+from column_store import load_orders_columns
+from shared_dataset import SharedDataset, map_shared
+from goodness_of_fit import GOF_TESTS, prepare_fit_sample, evaluate_fit
+from fit_cache import data_fingerprint, open_fit_cache, log_cache_stats
+from candidate_selection import (AIC_PRUNING, SUPPORT, FIT_COST_ORDER, sample_moments, check_support,
+                                 select_candidates, aic_lower_bound)
+from batch_normality import SHAPIRO_MAX_SIZE, GroupedArray, anderson_p_value, batch_normality_tests
+from binned_likelihood import (BINNED_THRESHOLD, BINNED_DISTRIBUTIONS, BINNED_BINS, START_SAMPLE, binned_sample,
+                               fit_binned, point_subsample)
+from olist_profiling import profiled
+from lazy_imports import lazy_module, lazy_attribute
 warnings.filterwarnings('ignore')
 
-# Configuração do matplotlib
-plt.rcParams['figure.figsize'] = (16, 12)
-plt.rcParams['font.size'] = 9
-plt.rcParams['axes.titlesize'] = 10
-plt.rcParams['axes.labelsize'] = 9
-plt.rcParams['xtick.labelsize'] = 8
-plt.rcParams['ytick.labelsize'] = 8
+# Colunas do resumo por pedido usadas nesta análise
+ADVANCED_COLUMNS = ['customer_state', 'product_category', 'order_ticket', 'freight_ratio']
+
+# Processos para os ajustes de distribuição (1 = ajustes em série dentro de comprehensive_analysis)
+FIT_WORKERS = int(os.getenv('OLIST_FIT_WORKERS', str(N_WORKERS)))
+
+# Nota impressa ao lado do AIC conforme o método do ajuste (ver _fit_parameters)
+METHOD_NOTES = {'binned': ' (ajuste por classes)', 'subsample': ' (ajuste da subamostra; classes não melhoraram)'}
+
+# Coluna que define cada tipo de segmento (None = população geral)
+SEGMENT_COLUMNS = {'state': 'customer_state', 'category': 'product_category'}
+
+def comparable_fits(distribution_results):
+    """Ajustes com AIC na escala original dos dados (sem a beta reescalada), como pares (nome, resultado)"""
+    return [(name, result) for name, result in distribution_results.items() if not result.get('rescaled')]
+
+def _plot_style(pyplot):
+    """Configuração do matplotlib (aplicada na primeira figura)"""
+    pyplot.rcParams['figure.figsize'] = (16, 12)
+    pyplot.rcParams['font.size'] = 9
+    pyplot.rcParams['axes.titlesize'] = 10
+    pyplot.rcParams['axes.labelsize'] = 9
+    pyplot.rcParams['xtick.labelsize'] = 8
+    pyplot.rcParams['ytick.labelsize'] = 8
+
+# Bibliotecas de gráficos e estatística carregadas no primeiro uso
+plt = lazy_module('matplotlib.pyplot', on_load=_plot_style)
+sns = lazy_module('seaborn')
+stats = lazy_module('scipy.stats')
+special = lazy_module('scipy.special')
+optimize = lazy_module('scipy.optimize')
+# Importado no primeiro uso: bootstrap_fits importa os ajustadores deste módulo
+bootstrap_fits = lazy_module('bootstrap_fits')
+GridSpec = lazy_attribute('matplotlib.gridspec', 'GridSpec')
+
+# Convergência dos ajustes por Newton (passo relativo) e limite de iterações
+NEWTON_TOLERANCE = 1e-12
+NEWTON_MAX_ITERATIONS = 100
+
+# Ajustes diretos: fitter(data, start=None) devolve (parâmetros ou None, iterações);
+# start são parâmetros de um ajuste anterior (p.ex. da população geral) usados como
+# ponto de partida pelos ajustes iterativos e ignorados pelas fórmulas fechadas
+
+def _fit_normal(data, start=None):
+    """Normal: média e desvio padrão populacional"""
+    return (np.mean(data), np.std(data)), 0
+
+def _fit_lognormal(data, start=None):
+    """Lognormal (loc=0): momentos de log(x)"""
+    log_data = np.log(data)
+    return (np.std(log_data), 0, np.exp(np.mean(log_data))), 0
+
+def _fit_exponential(data, start=None):
+    """Exponencial (loc=0): escala = média"""
+    return (0.0, np.mean(data)), 0
+
+def _fit_uniform(data, start=None):
+    """Uniforme: mínimo e amplitude"""
+    minimum = np.min(data)
+    return (minimum, np.max(data) - minimum), 0
+
+def _fit_pareto(data, start=None):
+    """Pareto (loc=0): escala = mínimo, b = n / Σ log(x / mínimo)"""
+    scale = np.min(data)
+    return (len(data) / np.sum(np.log(data / scale)), 0, scale), 0
+
+def _newton(value, function, lower=0.0):
+    """
+    Newton 1-D em que function(x) devolve (f, f'); o passo é reduzido para manter x > lower.
+
+    Returns:
+        tuple: (raiz ou None se não convergir, iterações)
+    """
+    for iteration in range(1, NEWTON_MAX_ITERATIONS + 1):
+        f, derivative = function(value)
+        step = f / derivative
+        if not np.isfinite(step):
+            return None, iteration
+        new_value = value - step
+        while new_value <= lower:
+            step /= 2
+            new_value = value - step
+        value = new_value
+        if abs(step) < NEWTON_TOLERANCE * value:
+            return value, iteration
+    return None, NEWTON_MAX_ITERATIONS
+
+def _closest_start(function, candidates):
+    """Ponto de partida com menor |f| entre os candidatos válidos (Newton converge mais rápido perto da raiz)"""
+    candidates = [value for value in candidates if value is not None and np.isfinite(value) and value > 0]
+    return min(candidates, key=lambda value: abs(function(value)[0]))
+
+def _fit_gamma(data, start=None):
+    """
+    Gama (loc=0): forma resolve log(a) - ψ(a) = log(média) - média(log x).
+
+    Parte da aproximação de Minka ou da forma em start, a que estiver mais perto da raiz.
+    """
+    mean = np.mean(data)
+    s = np.log(mean) - np.mean(np.log(data))
+    if not (s > 0 and np.isfinite(s)):
+        return None, 0
+    score = lambda a: (np.log(a) - special.digamma(a) - s, 1 / a - special.polygamma(1, a))
+    minka = (3 - s + np.sqrt((s - 3) ** 2 + 24 * s)) / (12 * s)
+    shape, iterations = _newton(_closest_start(score, [minka, None if start is None else start[0]]), score)
+    return (None if shape is None else (shape, 0, mean / shape)), iterations
+
+def _fit_chi2(data, start=None):
+    """Qui-quadrado (loc=0): é uma gama com forma df/2 e escala 2·escala"""
+    gamma, iterations = _fit_gamma(data, None if start is None else (start[0] / 2, 0, 2 * start[2]))
+    return (None if gamma is None else (2 * gamma[0], 0, gamma[2] / 2)), iterations
+
+def _fit_weibull(data, start=None):
+    """
+    Weibull (loc=0): forma c resolve Σxᶜ·log x / Σxᶜ - 1/c = média(log x).
+
+    Os pesos xᶜ são calculados relativos ao maior valor (sem overflow). O ponto
+    de partida vem do desvio padrão de log(x) (momentos da Gumbel) ou da forma em
+    start, o que estiver mais perto da raiz.
+    """
+    log_data = np.log(data)
+    log_max = log_data.max()
+    centered = log_data - log_max
+    mean_log = log_data.mean()
+    spread = log_data.std()
+    if not spread > 0:
+        return None, 0
+
+    def score(c):
+        weights = np.exp(c * centered)
+        total = weights.sum()
+        first = (weights * log_data).sum() / total
+        second = (weights * log_data * log_data).sum() / total
+        return first - 1 / c - mean_log, second - first * first + 1 / c ** 2
+
+    gumbel = np.pi / (np.sqrt(6) * spread)
+    shape, iterations = _newton(_closest_start(score, [gumbel, None if start is None else start[0]]), score)
+    if shape is None:
+        return None, iterations
+    scale = np.exp(log_max + np.log(np.mean(np.exp(shape * centered))) / shape)
+    return (shape, 0, scale), iterations
+
+def _counting_optimizer(counter):
+    """Otimizador padrão de dist.fit (optimize.fmin) que acumula as iterações em counter"""
+    def optimizer(func, x0, args=(), disp=0):
+        xopt, _, iterations, _, _ = optimize.fmin(func, x0, args=args, disp=disp, full_output=True)
+        counter.append(iterations)
+        return xopt
+    return optimizer
 
 class AdvancedDistributionAnalyzer:
     """
     Classe para análise avançada de distribuições de probabilidade com múltiplos testes estatísticos.
     """
     
-    def __init__(self):
+    def __init__(self, gof_tests=GOF_TESTS, binned_threshold=BINNED_THRESHOLD, cache=None,
+                 aic_pruning=AIC_PRUNING):
+        # Testes extras de aderência calculados com o KS ('anderson_darling', 'cramer_von_mises')
+        self.gof_tests = tuple(gof_tests)
+        # Tamanho de amostra a partir do qual Weibull e beta são ajustadas por classes (0 desliga)
+        self.binned_threshold = binned_threshold
+        # Cache em disco de ajustes e testes (FitCache); None recalcula sempre
+        self.cache = cache
+        # Pula candidatas cujo piso de AIC pelos momentos (candidate_selection) não supera o melhor AIC já obtido
+        self.aic_pruning = aic_pruning
         self.distributions = {
             'normal': stats.norm,
             'lognormal': stats.lognorm,
@@ -36,6 +195,22 @@ class AdvancedDistributionAnalyzer:
             'uniform': stats.uniform
         }
         
+        # Estimadores de máxima verossimilhança diretos (fórmula fechada ou Newton 1-D) com loc=0
+        # onde o ajuste genérico fixa floc=0; distribuições fora do registro usam dist.fit
+        self.fitters = {
+            'normal': _fit_normal,
+            'lognormal': _fit_lognormal,
+            'exponential': _fit_exponential,
+            'gamma': _fit_gamma,
+            'weibull': _fit_weibull,
+            'pareto': _fit_pareto,
+            'chi2': _fit_chi2,
+            'uniform': _fit_uniform
+        }
+        
+        # Parâmetros da população geral por (variável, distribuição), ponto de partida dos ajustes por segmento
+        self.global_fits = {}
+        
         self.normality_tests = {
             'shapiro_wilk': self._shapiro_test,
             'anderson_darling': self._anderson_test,
@@ -46,9 +221,11 @@ class AdvancedDistributionAnalyzer:
     
     def _shapiro_test(self, data):
         """Teste de Shapiro-Wilk para normalidade."""
-        if len(data) > 5000:
-            # Shapiro-Wilk tem limitação de tamanho
-            sample_data = np.random.choice(data, 5000, replace=False)
+        if len(data) > SHAPIRO_MAX_SIZE:
+            # Shapiro-Wilk tem limitação de tamanho; subamostra com semente fixa (resultado
+            # determinístico, como em batch_normality, e portanto seguro para o cache)
+            rng = np.random.default_rng(np.random.SeedSequence(SAMPLE_SEED))
+            sample_data = rng.choice(data, SHAPIRO_MAX_SIZE, replace=False)
         else:
             sample_data = data
         
@@ -78,16 +255,8 @@ class AdvancedDistributionAnalyzer:
         }
     
     def _anderson_p_value(self, statistic, n):
-        """Aproximação do p-value para Anderson-Darling."""
-        # Fórmula aproximada para p-value do Anderson-Darling
-        if statistic < 0.2:
-            return 1 - np.exp(-13.436 + 101.14 * statistic - 223.73 * statistic**2)
-        elif statistic < 0.34:
-            return 1 - np.exp(-8.318 + 42.796 * statistic - 59.938 * statistic**2)
-        elif statistic < 0.6:
-            return np.exp(0.9177 - 4.279 * statistic - 1.38 * statistic**2)
-        else:
-            return np.exp(1.2937 - 5.709 * statistic + 0.0186 * statistic**2)
+        """Aproximação do p-value para Anderson-Darling (batch_normality.anderson_p_value)."""
+        return anderson_p_value(statistic)[()]
     
     def _ks_test(self, data):
         """Teste de Kolmogorov-Smirnov para normalidade."""
@@ -127,120 +296,157 @@ class AdvancedDistributionAnalyzer:
             'interpretation': 'Normal' if p_value > 0.05 else 'Não Normal'
         }
     
-    def fit_distribution(self, data, distribution_name):
+    def _fingerprint(self, data, sample=None):
+        """Impressão digital dos dados (guardada na FitSample, calculada uma vez por segmento)"""
+        if sample is None:
+            return data_fingerprint(np.asarray(data, dtype=np.float64))
+        if sample.fingerprint is None:
+            sample.fingerprint = data_fingerprint(sample.data)
+        return sample.fingerprint
+    
+    def _fit_options(self, n, distribution_name, start):
+        """Opções que mudam o resultado de um ajuste (entram na chave do cache)"""
+        binned = distribution_name in BINNED_DISTRIBUTIONS and 0 < self.binned_threshold <= n
+        return {
+            'start': None if start is None else tuple(float(value) for value in start),
+            'gof_tests': self.gof_tests,
+            'binned': (BINNED_BINS, START_SAMPLE) if binned else None
+        }
+    
+    def _cached(self, data, sample, kind, name, compute, **options):
+        """compute() passando pelo cache em disco, se houver"""
+        if self.cache is None:
+            return compute()
+        return self.cache.cached(self._fingerprint(data, sample), kind, name, compute, **options)
+    
+    @profiled()
+    def fit_distribution(self, data, distribution_name, sample=None, start=None):
+        """
+        Ajusta uma distribuição específica aos dados (ver _fit_distribution).
+        
+        Com self.cache, dados já ajustados com as mesmas opções não passam pelo otimizador.
+        """
+        return self._cached(data, sample, 'fit', distribution_name,
+                            lambda: self._fit_distribution(data, distribution_name, sample, start),
+                            **self._fit_options(len(data), distribution_name, start))
+    
+    def _fit_distribution(self, data, distribution_name, sample=None, start=None):
         """
         Ajusta uma distribuição específica aos dados.
+        
+        sample é a amostra preparada (ordenada) por prepare_fit_sample; passada por
+        comprehensive_analysis, é compartilhada por todas as distribuições do segmento.
+        start são parâmetros usados como ponto de partida dos ajustes iterativos
+        (em comprehensive_analysis, o ajuste da população geral; ver global_fits).
+        
+        A partir de self.binned_threshold pontos, a beta é ajustada pelo histograma
+        da amostra (binned_likelihood); AIC, BIC e KS continuam exatos.
+        
+        O suporte é conferido contra os momentos da amostra (calculados uma vez por
+        segmento): candidatas incompatíveis devolvem None sem ajuste, e a beta fora
+        de (0, 1) é ajustada aos dados reescalados, o que o resultado registra em 'rescaled'.
         """
         dist = self.distributions[distribution_name]
         
         try:
-            # Ajustar parâmetros
-            if distribution_name == 'normal':
-                params = dist.fit(data)
-                aic = self._calculate_aic(data, dist, params)
-                bic = self._calculate_bic(data, dist, params)
-                
-            elif distribution_name == 'lognormal':
-                # Para lognormal, os dados devem ser positivos
-                if np.any(data <= 0):
-                    return None
-                params = dist.fit(data, floc=0)
-                aic = self._calculate_aic(data, dist, params)
-                bic = self._calculate_bic(data, dist, params)
-                
-            elif distribution_name == 'exponential':
-                if np.any(data <= 0):
-                    return None
-                params = dist.fit(data, floc=0)
-                aic = self._calculate_aic(data, dist, params)
-                bic = self._calculate_bic(data, dist, params)
-                
-            elif distribution_name == 'gamma':
-                if np.any(data <= 0):
-                    return None
-                params = dist.fit(data, floc=0)
-                aic = self._calculate_aic(data, dist, params)
-                bic = self._calculate_bic(data, dist, params)
-                
-            elif distribution_name == 'weibull':
-                if np.any(data <= 0):
-                    return None
-                params = dist.fit(data, floc=0)
-                aic = self._calculate_aic(data, dist, params)
-                bic = self._calculate_bic(data, dist, params)
+            sample = sample if sample is not None else prepare_fit_sample(data)
+            reason, rescaling = check_support(distribution_name, sample_moments(sample))
+            if reason is not None:
+                return None
+            binned = None
+            if distribution_name in BINNED_DISTRIBUTIONS and 0 < self.binned_threshold <= len(data):
+                binned = binned_sample(sample)
+            
+            # Ajustar parâmetros (fit_data: dados do ajuste quando diferentes dos originais)
+            fit_data = None
+            if SUPPORT[distribution_name] == 'positive':
+                # Distribuições com suporte positivo (loc=0)
+                params, iterations, method = self._fit_parameters(distribution_name, data, start, binned, floc=0)
                 
             elif distribution_name == 'beta':
                 # Beta requer dados entre 0 e 1
-                if np.any(data <= 0) or np.any(data >= 1):
+                if rescaling is not None:
                     # Normalizar para [0,1]
-                    data_norm = (data - data.min()) / (data.max() - data.min())
-                    # Evitar 0 e 1 exatos
-                    data_norm = np.clip(data_norm, 1e-6, 1-1e-6)
-                    params = dist.fit(data_norm)
-                    aic = self._calculate_aic(data_norm, dist, params)
-                    bic = self._calculate_bic(data_norm, dist, params)
+                    minimum, spread = rescaling
+                    rescale = lambda values: np.clip((values - minimum) / spread, 1e-6, 1-1e-6)  # Evitar 0 e 1 exatos
+                    fit_data = rescale(data)
+                    binned = None if binned is None else binned.transform(rescale)
+                    params, iterations, method = self._fit_parameters(distribution_name, fit_data, start, binned)
                 else:
-                    params = dist.fit(data)
-                    aic = self._calculate_aic(data, dist, params)
-                    bic = self._calculate_bic(data, dist, params)
+                    params, iterations, method = self._fit_parameters(distribution_name, data, start, binned)
                     
-            elif distribution_name == 'pareto':
-                if np.any(data <= 0):
-                    return None
-                params = dist.fit(data, floc=0)
-                aic = self._calculate_aic(data, dist, params)
-                bic = self._calculate_bic(data, dist, params)
-                
             elif distribution_name == 'chi2':
-                if np.any(data < 0):
-                    return None
-                params = dist.fit(data, floc=0)
-                aic = self._calculate_aic(data, dist, params)
-                bic = self._calculate_bic(data, dist, params)
-                
-            elif distribution_name == 'uniform':
-                params = dist.fit(data)
-                aic = self._calculate_aic(data, dist, params)
-                bic = self._calculate_bic(data, dist, params)
+                params, iterations, method = self._fit_parameters(distribution_name, data, start, floc=0)
                 
             else:
-                params = dist.fit(data)
-                aic = self._calculate_aic(data, dist, params)
-                bic = self._calculate_bic(data, dist, params)
+                params, iterations, method = self._fit_parameters(distribution_name, data, start)
             
-            # Teste de bondade de ajuste (Kolmogorov-Smirnov)
-            ks_statistic, ks_p_value = stats.kstest(data, lambda x: dist.cdf(x, *params))
+            # AIC, BIC e Kolmogorov-Smirnov em uma passada sobre a amostra ordenada
+            evaluation = evaluate_fit(sample, dist, params, fit_data, self.gof_tests)
             
             return {
                 'distribution': distribution_name,
                 'parameters': params,
-                'aic': aic,
-                'bic': bic,
-                'ks_statistic': ks_statistic,
-                'ks_p_value': ks_p_value,
-                'goodness_of_fit': 'Bom ajuste' if ks_p_value > 0.05 else 'Ajuste inadequado'
+                'iterations': iterations,
+                'method': method,
+                'rescaled': rescaling is not None,
+                **{key: value for key, value in evaluation.items() if key != 'log_likelihood'},
+                'goodness_of_fit': 'Bom ajuste' if evaluation['ks_p_value'] > 0.05 else 'Ajuste inadequado'
             }
             
         except Exception as e:
             print(f"Erro ao ajustar {distribution_name}: {e}")
             return None
     
-    def _calculate_aic(self, data, dist, params):
-        """Calcula o Critério de Informação de Akaike (AIC)."""
-        log_likelihood = np.sum(dist.logpdf(data, *params))
-        k = len(params)  # número de parâmetros
-        return 2 * k - 2 * log_likelihood
-    
-    def _calculate_bic(self, data, dist, params):
-        """Calcula o Critério de Informação Bayesiano (BIC)."""
-        log_likelihood = np.sum(dist.logpdf(data, *params))
-        k = len(params)  # número de parâmetros
-        n = len(data)    # tamanho da amostra
-        return k * np.log(n) - 2 * log_likelihood
-    
-    def comprehensive_analysis(self, data, variable_name, category=None, state=None):
+    def _fit_parameters(self, distribution_name, data, start=None, binned=None, **fit_kwargs):
+        """
+        Parâmetros de máxima verossimilhança pelo ajuste direto registrado em
+        self.fitters; sem registro (ou se o Newton não convergir), usa dist.fit.
+        
+        Com binned (histograma da amostra), o ajuste pontual é feito só em uma
+        subamostra e serve de partida para a máxima verossimilhança das classes.
+        As duas soluções são comparadas pela log-verossimilhança exata nos dados;
+        se as classes não melhorarem a partida, fica o ajuste da subamostra.
+        
+        start só é repassado aos ajustes diretos, cujas equações de verossimilhança
+        têm raiz única. No dist.fit (Nelder-Mead) o ponto de partida muda o ótimo
+        encontrado: a verossimilhança da beta reescalada tem uma crista quase plana
+        e, partindo da população geral, o otimizador para em outro ponto dela.
+        
+        Returns:
+            tuple: (parâmetros, iterações do Newton ou do otimizador,
+                'exact', 'binned' ou 'subsample')
+        """
+        if binned is not None:
+            dist = self.distributions[distribution_name]
+            point_start, iterations, _ = self._fit_parameters(distribution_name, point_subsample(data), start,
+                                                              **fit_kwargs)
+            params, binned_iterations = fit_binned(dist, binned, point_start, fit_kwargs.get('floc'))
+            if np.sum(dist.logpdf(data, *params)) > np.sum(dist.logpdf(data, *point_start)):
+                return params, iterations + binned_iterations, 'binned'
+            return tuple(point_start), iterations + binned_iterations, 'subsample'
+        
+        fitter = self.fitters.get(distribution_name)
+        params, iterations = fitter(data, start) if fitter is not None else (None, 0)
+        if params is None:
+            counter = []
+            params = self.distributions[distribution_name].fit(data, optimizer=_counting_optimizer(counter),
+                                                               **fit_kwargs)
+            iterations += sum(counter)
+        return params, iterations, 'exact'
+    
+    @profiled()
+    def comprehensive_analysis(self, data, variable_name, category=None, state=None, fits=None, normality=None):
         """
         Realiza análise abrangente de uma variável.
+        
+        fits traz os ajustes já calculados para este segmento ({distribuição: resultado
+        ou None}, ver fit_segments_parallel); sem ele, os ajustes são feitos aqui.
+        normality traz testes de normalidade já calculados em lote ({teste: resultado},
+        ver segment_normality_tests); os testes ausentes são feitos aqui.
+        
+        A análise da população geral (sem category e state) guarda seus parâmetros
+        em self.global_fits; as análises por segmento partem deles.
         """
         print(f"\n{'='*80}")
         print(f"ANÁLISE ABRANGENTE DE DISTRIBUIÇÕES: {variable_name.upper()}")
@@ -275,26 +481,70 @@ class AdvancedDistributionAnalyzer:
         # Testes de normalidade
         print(f"\nTESTES DE NORMALIDADE (H₀: dados são normais):")
         normality_results = {}
+        sample = prepare_fit_sample(data)
         for test_name, test_func in self.normality_tests.items():
-            result = test_func(data)
+            seed = SAMPLE_SEED if test_name == 'shapiro_wilk' else None
+            if normality and test_name in normality:
+                result = normality[test_name]
+            else:
+                result = self._cached(data, sample, 'normality', test_name, lambda: test_func(data), seed=seed)
             normality_results[test_name] = result
             print(f"{result['test_name']}: Estatística={result['statistic']:.4f}, "
                   f"P-Value={result['p_value']:.6f} → {result['interpretation']}")
         
         # Ajuste de distribuições
         print(f"\nAJUSTE DE DISTRIBUIÇÕES:")
+        is_segment = bool(category or state)
+        if is_segment:
+            print("(Newton da gama, qui-quadrado e Weibull parte do ajuste da população geral quando mais próximo da raiz)")
+        
+        # Seleção de candidatas: suporte conferido uma vez contra os momentos da amostra
+        moments = sample_moments(sample)
+        candidates, excluded, rescaled = select_candidates(self.distributions, moments)
+        for dist_name, reason in excluded.items():
+            print(f"{dist_name.title()}: descartada ({reason})")
+        for dist_name in rescaled:
+            print(f"{dist_name.title()}: ajustada aos dados reescalados para [0, 1] "
+                  f"(AIC em outra escala, fora da escolha do melhor ajuste)")
+        
+        # Com o descarte por piso de AIC, fórmulas fechadas primeiro fixam o melhor AIC
+        pruning = self.aic_pruning and fits is None
+        order = [name for name in FIT_COST_ORDER if name in candidates] if pruning else candidates
+        order += [name for name in candidates if name not in order]
+        results = {}
+        best_aic = np.inf
+        for dist_name in order:
+            if pruning:
+                bound = aic_lower_bound(dist_name, moments, self.distributions[dist_name].numargs + 2)
+                if bound >= best_aic:
+                    excluded[dist_name] = f'piso de AIC {bound:.2f} ≥ melhor AIC {best_aic:.2f}'
+                    continue
+            if fits is None:
+                start = self.global_fits.get((variable_name, dist_name)) if is_segment else None
+                results[dist_name] = self.fit_distribution(data, dist_name, sample, start)
+            else:
+                results[dist_name] = fits[dist_name]
+            if results[dist_name] and not results[dist_name]['rescaled']:
+                best_aic = min(best_aic, results[dist_name]['aic'])
+        
         distribution_results = {}
-        for dist_name in self.distributions.keys():
-            result = self.fit_distribution(data, dist_name)
+        for dist_name in candidates:
+            result = results.get(dist_name)
+            if dist_name not in results:
+                print(f"{dist_name.title()}: descartada ({excluded[dist_name]})")
             if result:
                 distribution_results[dist_name] = result
+                if not is_segment:
+                    self.global_fits[(variable_name, dist_name)] = result['parameters']
                 print(f"{dist_name.title()}: AIC={result['aic']:.2f}, "
                       f"BIC={result['bic']:.2f}, KS P-Value={result['ks_p_value']:.6f} "
-                      f"→ {result['goodness_of_fit']}")
+                      f"→ {result['goodness_of_fit']} | iterações={result['iterations']}"
+                      f"{METHOD_NOTES.get(result['method'], '')}")
         
-        # Melhor distribuição baseada em AIC
-        if distribution_results:
-            best_dist = min(distribution_results.items(), key=lambda x: x[1]['aic'])
+        # Melhor distribuição baseada em AIC, entre os ajustes na escala original
+        comparable = comparable_fits(distribution_results)
+        best_dist = min(comparable, key=lambda x: x[1]['aic']) if comparable else None
+        if best_dist:
             print(f"\nMELHOR AJUSTE (menor AIC): {best_dist[0].title()}")
             print(f"AIC: {best_dist[1]['aic']:.2f}")
             print(f"P-Value KS: {best_dist[1]['ks_p_value']:.6f}")
@@ -303,9 +553,19 @@ class AdvancedDistributionAnalyzer:
             'descriptive_stats': stats_desc,
             'normality_tests': normality_results,
             'distribution_fits': distribution_results,
-            'best_distribution': best_dist if distribution_results else None
+            'best_distribution': best_dist,
+            'excluded_distributions': excluded
         }
     
+    def bootstrap(self, data, **options):
+        """
+        Incerteza do ranking de comprehensive_analysis: intervalos bootstrap dos
+        parâmetros, da média e da mediana e frequência com que cada candidata
+        vence pelo AIC (ver bootstrap_fits.bootstrap_fits para as opções).
+        """
+        return bootstrap_fits.bootstrap_fits(data, **options)
+    
+    @profiled()
     def create_comprehensive_plot(self, data, analysis_results, variable_name, 
                                 category=None, state=None):
         """
@@ -335,7 +595,7 @@ class AdvancedDistributionAnalyzer:
         # Plotar as 3 melhores distribuições
         dist_results = analysis_results['distribution_fits']
         if dist_results:
-            sorted_dists = sorted(dist_results.items(), key=lambda x: x[1]['aic'])[:3]
+            sorted_dists = sorted(comparable_fits(dist_results), key=lambda x: x[1]['aic'])[:3]
             colors = ['red', 'green', 'orange']
             
             x_range = np.linspace(data.min(), data.max(), 1000)
@@ -413,7 +673,7 @@ class AdvancedDistributionAnalyzer:
             
             for dist_name, result in sorted_dists[:6]:  # Top 6 distribuições
                 dist_data.append([
-                    dist_name.title(),
+                    dist_name.title() + (' (reescalada)' if result.get('rescaled') else ''),
                     f"{result['aic']:.2f}",
                     f"{result['bic']:.2f}",
                     f"{result['ks_p_value']:.6f}",
@@ -445,80 +705,163 @@ class AdvancedDistributionAnalyzer:
         print(f"   → Gráfico salvo: {filename}")
         return filename
 
-def load_data_for_advanced_analysis():
-    """Carrega dados para análise avançada."""
+def _segment_data(df, segment, variable):
+    """Valores da variável no segmento (kind, valor); (None, None) é a população geral"""
+    kind, value = segment
+    if kind is None:
+        return df[variable].values
+    return df.loc[df[SEGMENT_COLUMNS[kind]] == value, variable].values
+
+# Testes calculados em lote para todos os segmentos; o Shapiro-Wilk fica no analisador
+# (subamostra com a semente do analisador, igual à do resultado em cache por segmento)
+BATCH_NORMALITY_TESTS = ('anderson_darling', 'kolmogorov_smirnov', 'jarque_bera', 'dagostino')
+
+@profiled()
+def segment_normality_tests(df, segments, variables, tests=BATCH_NORMALITY_TESTS):
+    """
+    Testes de normalidade de todos os segmentos de uma vez (batch_normality_tests).
+
+    Para cada variável, os valores de cada segmento (os mesmos de _segment_data)
+    formam um GroupedArray, e os testes saem de passadas vetorizadas sobre ele em
+    vez de um teste do scipy por segmento.
+
+    Returns:
+        dict: (segmento, variável) → {teste: resultado no formato de normality_tests}
+    """
+    results = {}
+    for variable in variables:
+        grouped = GroupedArray.from_groups({segment: _segment_data(df, segment, variable) for segment in segments})
+        table = batch_normality_tests(grouped, tests=tests, n_workers=1)
+        for row in table.itertuples(index=False):
+            result = {
+                'test_name': row.test_name,
+                'statistic': row.statistic,
+                'p_value': row.p_value,
+                'null_hypothesis': 'Os dados seguem distribuição normal',
+                'interpretation': row.interpretation
+            }
+            if row.test == 'anderson_darling':
+                result['critical_value'] = row.critical_value
+            results.setdefault((row.group, variable), {})[row.test] = result
+    return results
+
+# Estado do processo trabalhador: analisador e amostra preparada do último segmento
+_worker_analyzer = None
+_worker_sample = (None, None, None)
+
+def _fit_task(df, task):
+    """Ajusta uma distribuição a um segmento (executado nos trabalhadores de fit_segments_parallel)"""
+    global _worker_analyzer, _worker_sample
+    segment, variable, distribution_name, gof_tests, binned_threshold, start = task
+    if _worker_analyzer is None or (_worker_analyzer.gof_tests, _worker_analyzer.binned_threshold) \
+            != (gof_tests, binned_threshold):
+        _worker_analyzer = AdvancedDistributionAnalyzer(gof_tests, binned_threshold)
+    
+    # Tasks do mesmo segmento são consecutivas: dados e amostra ordenada são reaproveitados
+    key = (segment, variable)
+    if _worker_sample[0] != key:
+        data = _segment_data(df, segment, variable)
+        _worker_sample = (key, data, prepare_fit_sample(data))
+    _, data, sample = _worker_sample
+    return _worker_analyzer.fit_distribution(data, distribution_name, sample, start)
+
+@profiled()
+def fit_segments_parallel(df, segments, variables, analyzer, n_workers=FIT_WORKERS):
+    """
+    Ajusta todas as distribuições de todos os segmentos em um pool de processos.
+    
+    Cada (segmento, variável, distribuição) é uma task; as colunas usadas são
+    publicadas uma vez em memória compartilhada (SharedDataset) e só as tasks e os
+    resultados trafegam entre processos. Os resultados voltam na ordem das tasks,
+    então a saída é idêntica à dos ajustes em série.
+    
+    Como em comprehensive_analysis, a população geral é ajustada primeiro (seus
+    parâmetros vão para analyzer.global_fits) e os segmentos partem desses
+    parâmetros, em uma segunda rodada do pool. Com analyzer.cache, o cache é
+    consultado e gravado neste processo e só as faltas vão para o pool.
+    
+    Args:
+        df (pd.DataFrame): Resumo por pedido (ADVANCED_COLUMNS)
+        segments (list): Segmentos (kind, valor), com (None, None) para a população geral
+        variables (list): Variáveis a ajustar
+        analyzer (AdvancedDistributionAnalyzer): Define as distribuições e testes extras
+        n_workers (int): Processos do pool
+    
+    Returns:
+        dict: {(segmento, variável): {distribuição: resultado ou None}}
+    """
+    columns = [SEGMENT_COLUMNS[kind] for kind in sorted({kind for kind, _ in segments if kind is not None})]
+    overall = [segment for segment in segments if segment[0] is None]
+    by_segment = [segment for segment in segments if segment[0] is not None]
+    
+    def make_tasks(round_segments):
+        return [(segment, variable, distribution_name, analyzer.gof_tests, analyzer.binned_threshold,
+                 analyzer.global_fits.get((variable, distribution_name)) if segment[0] is not None else None)
+                for segment in round_segments
+                for variable in variables
+                for distribution_name in analyzer.distributions]
+    
+    n_tasks = len(segments) * len(variables) * len(analyzer.distributions)
+    print(f"\nAjustando {n_tasks} combinações (segmento, variável, distribuição) em {n_workers} processos...")
+    fits = {}
+    fingerprints = {}
+    
+    def cache_key(task):
+        segment, variable, distribution_name, *_, start = task
+        if (segment, variable) not in fingerprints:
+            data = _segment_data(df, segment, variable)
+            fingerprints[(segment, variable)] = (analyzer._fingerprint(data), len(data))
+        fingerprint, n = fingerprints[(segment, variable)]
+        return analyzer.cache.key(fingerprint, 'fit', distribution_name, **analyzer._fit_options(n, distribution_name, start))
+    
+    with SharedDataset(df[columns + list(variables)]) as shared:
+        for round_segments in (overall, by_segment):
+            tasks = make_tasks(round_segments)
+            results = [None] * len(tasks)
+            pending = list(range(len(tasks)))
+            if analyzer.cache is not None:
+                keys = [cache_key(task) for task in tasks]
+                pending = []
+                for position, key in enumerate(keys):
+                    found, results[position] = analyzer.cache.get(key)
+                    if not found:
+                        pending.append(position)
+            if pending:
+                computed = map_shared(_fit_task, shared, [tasks[position] for position in pending], n_workers)
+                for position, result in zip(pending, computed):
+                    results[position] = result
+                    if analyzer.cache is not None:
+                        analyzer.cache.put(keys[position], result)
+            for (segment, variable, distribution_name, *_), result in zip(tasks, results):
+                fits.setdefault((segment, variable), {})[distribution_name] = result
+                if segment[0] is None and result is not None:
+                    analyzer.global_fits[(variable, distribution_name)] = result['parameters']
+    return {(segment, variable): fits[(segment, variable)] for segment in segments for variable in variables}
+
+@profiled()
+def load_data_for_advanced_analysis(sample=None):
+    """Carrega dados para análise avançada (sample: fração da amostra estratificada)."""
     print("Carregando dados para análise avançada de distribuições...")
     
-    # Usar o mesmo processo de carregamento do script anterior
-    items_df = pd.read_csv('olist-csv/olist_order_items_dataset.csv')
-    products_df = pd.read_csv('olist-csv/olist_products_dataset.csv')
-    translation_df = pd.read_csv('olist-csv/product_category_name_translation.csv')
-    orders_df = pd.read_csv('olist-csv/olist_orders_dataset.csv')
-    customers_df = pd.read_csv('olist-csv/olist_customers_dataset.csv')
-    
-    # Merge progressivo
-    items_products = items_df.merge(
-        products_df[['product_id', 'product_category_name']], 
-        on='product_id', 
-        how='left'
-    )
-    
-    items_products_trans = items_products.merge(
-        translation_df, 
-        on='product_category_name', 
-        how='left'
-    )
-    
-    orders_customers = orders_df.merge(
-        customers_df[['customer_id', 'customer_state']], 
-        on='customer_id', 
-        how='left'
-    )
-    
-    final_df = items_products_trans.merge(
-        orders_customers[['order_id', 'customer_state', 'order_status']], 
-        on='order_id', 
-        how='left'
-    )
-    
-    # Filtros de qualidade
-    final_df = final_df[
-        (final_df['order_status'] == 'delivered') &
-        (final_df['price'] > 0) & 
-        (final_df['freight_value'] >= 0) &
-        (final_df['price'] <= 10000) &
-        (final_df['product_category_name_english'].notna()) &
-        (final_df['customer_state'].notna())
-    ]
-    
-    # Agregação por pedido
-    orders_summary = final_df.groupby(['order_id', 'customer_state']).agg({
-        'price': 'sum',
-        'freight_value': 'sum',
-        'order_item_id': 'count',
-        'product_category_name_english': lambda x: x.mode().iloc[0] if len(x.mode()) > 0 else 'mixed'
-    }).reset_index()
-    
-    orders_summary.columns = ['order_id', 'customer_state', 'order_ticket', 'freight_value', 'n_items', 'product_category']
-    orders_summary['freight_ratio'] = orders_summary['freight_value'] / orders_summary['order_ticket']
-    orders_summary['freight_ratio'] = orders_summary['freight_ratio'].clip(0, 1)
+    # Só as colunas usadas, mapeadas do armazenamento colunar (amostras são construídas dos CSVs)
+    if not sample:
+        orders_summary = load_orders_columns(ADVANCED_COLUMNS)
+    else:
+        orders_summary = build_orders_summary(include_payments=False, sample=sample)
     
     print(f"Dados carregados: {len(orders_summary)} pedidos")
     return orders_summary
 
-def main():
+def main(sample=None):
     """Função principal para análise avançada de distribuições."""
     print("INICIANDO ANÁLISE AVANÇADA DE DISTRIBUIÇÕES")
     print("=" * 80)
     
-    # Criar diretório para gráficos
-    os.makedirs('charts', exist_ok=True)
-    
     # Carregar dados
-    df = load_data_for_advanced_analysis()
+    df = load_data_for_advanced_analysis(sample)
     
-    # Inicializar analisador
-    analyzer = AdvancedDistributionAnalyzer()
+    # Inicializar analisador (ajustes e testes de segmentos inalterados vêm do cache em disco)
+    analyzer = AdvancedDistributionAnalyzer(cache=open_fit_cache())
     
     # Selecionar top estados e categorias
     top_states = df['customer_state'].value_counts().head(5).index
@@ -527,49 +870,47 @@ def main():
     # Variáveis para análise
     variables = ['order_ticket', 'freight_ratio']
     
-    # Análise geral por variável
-    all_results = {}
+    # Segmentos: população geral, top estados e top categorias
+    segments = [(None, None)] + [('state', state) for state in top_states] \
+        + [('category', category) for category in top_categories]
     
-    for variable in variables:
-        print(f"\n{'='*60}")
-        print(f"ANÁLISE GERAL: {variable.upper()}")
-        print(f"{'='*60}")
-        
-        data = df[variable].values
-        result = analyzer.comprehensive_analysis(data, variable)
-        analyzer.create_comprehensive_plot(data, result, variable)
-        all_results[f'{variable}_geral'] = result
+    # Ajustes de todos os segmentos em paralelo (em série, comprehensive_analysis ajusta cada um)
+    fits = {}
+    if FIT_WORKERS > 1:
+        fits = fit_segments_parallel(df, segments, variables, analyzer, FIT_WORKERS)
     
-    # Análise por estado
-    for state in top_states:
-        state_data = df[df['customer_state'] == state]
-        
-        for variable in variables:
-            data = state_data[variable].values
-            if len(data) > 100:  # Mínimo para análise robusta
-                result = analyzer.comprehensive_analysis(data, variable, state=state)
-                analyzer.create_comprehensive_plot(data, result, variable, state=state)
-                all_results[f'{variable}_{state}'] = result
+    # Testes de normalidade vetorizados de todos os segmentos (exceto Shapiro-Wilk)
+    normality = segment_normality_tests(df, segments, variables)
     
-    # Análise por categoria
-    for category in top_categories:
-        cat_data = df[df['product_category'] == category]
-        
+    all_results = {}
+    
+    for segment in segments:
+        kind, value = segment
         for variable in variables:
-            data = cat_data[variable].values
-            if len(data) > 100:
-                result = analyzer.comprehensive_analysis(data, variable, category=category)
-                analyzer.create_comprehensive_plot(data, result, variable, category=category)
-                all_results[f'{variable}_{category}'] = result
+            data = _segment_data(df, segment, variable)
+            if kind is None:
+                print(f"\n{'='*60}")
+                print(f"ANÁLISE GERAL: {variable.upper()}")
+                print(f"{'='*60}")
+            elif len(data) <= 100:  # Mínimo para análise robusta
+                continue
+            
+            labels = {} if kind is None else {kind: value}
+            result = analyzer.comprehensive_analysis(data, variable, fits=fits.get((segment, variable)),
+                                                     normality=normality.get((segment, variable)), **labels)
+            analyzer.create_comprehensive_plot(data, result, variable, **labels)
+            all_results[f"{variable}_{'geral' if kind is None else value}"] = result
     
     # Gerar relatório consolidado
     generate_advanced_report(all_results)
+    log_cache_stats(analyzer.cache)
     
     print(f"\n{'='*80}")
     print("ANÁLISE AVANÇADA DE DISTRIBUIÇÕES CONCLUÍDA")
     print(f"Gráficos gerados: {len([f for f in os.listdir('charts') if 'advanced_dist' in f])}")
     print("Relatório: advanced_distribution_report.md")
 
+@profiled()
 def generate_advanced_report(results):
     """Gera relatório consolidado da análise avançada."""
     print("\nGerando relatório consolidado...")
@@ -673,4 +1014,4 @@ def generate_advanced_report(results):
     print("Relatório salvo: advanced_distribution_report.md")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(sample=sample_fraction_option())
\ No newline at end of file
@@ -0,0 +1,383 @@
+import matplotlib
+matplotlib.use('Agg')
+import pandas as pd
+import numpy as np
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import threading
+import contextlib
+import traceback
+import urllib.parse
+import urllib.request
+from itertools import combinations
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from olist_dataset import CSV_DIR, build_orders_summary, source_fingerprint
+from lazy_imports import lazy_attribute
+import statistical_questions_analysis
+import additional_statistical_questions
+import pairwise_comparisons
+from advanced_distribution_analysis import AdvancedDistributionAnalyzer
+
+mannwhitneyu = lazy_attribute('scipy.stats', 'mannwhitneyu')
+
+# Endereço do serviço (somente localhost) e intervalo de verificação dos CSVs de origem
+DAEMON_HOST = os.getenv('OLIST_DAEMON_HOST', '127.0.0.1')
+DAEMON_PORT = int(os.getenv('OLIST_DAEMON_PORT', '8765'))
+POLL_SECONDS = float(os.getenv('OLIST_DAEMON_POLL', '2'))
+
+# Perguntas disponíveis: nome → (módulo que prepara os dados, função)
+QUESTION_MODULES = {
+    **{f'statistical_question_{i}': statistical_questions_analysis for i in range(1, 7)},
+    **{f'creative_question_{i}': additional_statistical_questions for i in range(1, 5)}
+}
+
+class ThreadOutput(io.TextIOBase):
+    """
+    sys.stdout do serviço: cada thread escreve no destino que capturou
+    (captured_output), ou na saída original quando não capturou nada.
+
+    Instalado uma única vez no processo; requisições simultâneas e a thread de
+    recarga capturam o próprio print sem trocar o sys.stdout global.
+    """
+
+    def __init__(self, default):
+        self.default = default
+        self.local = threading.local()
+
+    def _target(self):
+        return getattr(self.local, 'stream', None) or self.default
+
+    def write(self, text):
+        return self._target().write(text)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):  # encoding, isatty, fileno... da saída original
+        return getattr(self.default, name)
+
+_install_lock = threading.Lock()
+
+def install_thread_output():
+    """Substitui sys.stdout por um ThreadOutput (uma vez) e o devolve"""
+    with _install_lock:
+        if not isinstance(sys.stdout, ThreadOutput):
+            sys.stdout = ThreadOutput(sys.stdout)
+        return sys.stdout
+
+@contextlib.contextmanager
+def captured_output(stream):
+    """Envia para stream o print desta thread (aninhável; as demais threads não são afetadas)"""
+    output = install_thread_output()
+    previous = getattr(output.local, 'stream', None)
+    output.local.stream = stream
+    try:
+        yield stream
+    finally:
+        output.local.stream = previous
+
+def _json_default(value):
+    if isinstance(value, (np.integer, np.floating, np.bool_)):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, (pd.Timestamp, pd.Period)):
+        return str(value)
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return json.loads(value.to_json())
+    return str(value)
+
+def _json_keys(value):
+    """Converte chaves de tupla (p.ex. pares de UFs) em texto para serializar em JSON"""
+    if isinstance(value, dict):
+        return {(' vs '.join(map(str, key)) if isinstance(key, tuple) else key): _json_keys(item)
+                for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_keys(item) for item in value]
+    return value
+
+class AnalysisState:
+    """
+    Resumo por pedido mantido em memória, com os dados derivados de cada script.
+
+    O resumo é construído uma vez; cada script prepara suas colunas (faixa horária,
+    região, pós-salário...) no primeiro uso e o resultado fica em cache até a
+    próxima recarga. Uma thread verifica os CSVs de origem a cada POLL_SECONDS e
+    recarrega tudo quando algum muda; as consultas continuam usando os dados
+    anteriores até a troca.
+    """
+
+    def __init__(self, csv_dir=CSV_DIR, poll_seconds=POLL_SECONDS):
+        self.csv_dir = csv_dir
+        self.poll_seconds = poll_seconds
+        self.lock = threading.Lock()          # gráficos e análises (matplotlib não é thread-safe)
+        self.reload_lock = threading.Lock()
+        self.orders_summary = None
+        self.frames = {}
+        self.fingerprint = None
+        self.version = 0
+        self.loaded_at = None
+        self.load_seconds = None
+        self._stop = threading.Event()
+
+    def reload(self):
+        with self.reload_lock:
+            fingerprint = source_fingerprint(self.csv_dir)
+            start = time.perf_counter()
+            with captured_output(io.StringIO()):
+                orders_summary = build_orders_summary(self.csv_dir)
+            with self.lock:
+                self.orders_summary = orders_summary
+                self.frames = {}
+                self.fingerprint = fingerprint
+                self.version += 1
+                self.loaded_at = pd.Timestamp.now().isoformat(timespec='seconds')
+                self.load_seconds = time.perf_counter() - start
+            print(f"Dados carregados (versão {self.version}): {len(orders_summary):,} pedidos "
+                  f"em {self.load_seconds:.2f}s")
+
+    def frame(self, module):
+        """Dados preparados pelo load_data do script (derivados do resumo em memória)"""
+        name = module.__name__
+        if name not in self.frames:
+            with captured_output(io.StringIO()):
+                self.frames[name] = module.load_data(orders_summary=self.orders_summary)
+        return self.frames[name]
+
+    def watch(self):
+        """Recarrega os dados quando os CSVs de origem mudam (executa em thread própria)"""
+        while not self._stop.wait(self.poll_seconds):
+            if source_fingerprint(self.csv_dir) != self.fingerprint:
+                print("Alteração detectada nos CSVs de origem; recarregando...")
+                try:
+                    self.reload()
+                except Exception as error:  # mantém os dados anteriores e tenta de novo no próximo ciclo
+                    print(f"Falha ao recarregar: {error}")
+
+    def stop(self):
+        self._stop.set()
+
+    def status(self):
+        return {
+            'csv_dir': os.path.abspath(self.csv_dir),
+            'version': self.version,
+            'orders': len(self.orders_summary) if self.orders_summary is not None else 0,
+            'loaded_at': self.loaded_at,
+            'load_seconds': self.load_seconds,
+            'prepared_frames': sorted(self.frames),
+            'questions': sorted(QUESTION_MODULES)
+        }
+
+    def run_question(self, name):
+        """Executa uma pergunta dos scripts sobre os dados em memória (inclui o gráfico em charts/)"""
+        if name not in QUESTION_MODULES:
+            raise KeyError(f"Pergunta desconhecida: {name}")
+        module = QUESTION_MODULES[name]
+        os.makedirs('charts', exist_ok=True)
+        output = io.StringIO()
+        with self.lock, captured_output(output):
+            result = getattr(module, name)(self.frame(module))
+        return {'question': name, 'result': result, 'output': output.getvalue()}
+
+    def pairwise(self, column, variable='order_ticket', top=8, alpha=0.05):
+        """
+        Mann-Whitney entre todos os pares dos top grupos de column para variable, com o
+        mesmo ranking dos scripts pairwise (1 ponto por vitória significativa, 0,5 por empate).
+        """
+        with self.lock:
+            df = self.frame(pairwise_comparisons)
+            if column not in df.columns or variable not in df.columns:
+                raise KeyError(f"Coluna desconhecida: {column if column not in df.columns else variable}")
+            groups_order = df[column].value_counts().head(top).index.tolist()
+            subset = df[df[column].isin(groups_order)]
+            groups = {name: group[variable].dropna().to_numpy()
+                      for name, group in subset.groupby(column, observed=True)}
+
+        comparisons = []
+        scores = {name: 0.0 for name in groups_order}
+        for a, b in combinations(groups_order, 2):
+            _, p_value = mannwhitneyu(groups[a], groups[b], alternative='two-sided')
+            winner = a if groups[a].mean() > groups[b].mean() else b
+            significant = p_value < alpha
+            if significant:
+                scores[winner] += 1
+            else:
+                scores[a] += 0.5
+                scores[b] += 0.5
+            comparisons.append({'group1': a, 'group2': b, 'mean1': groups[a].mean(), 'mean2': groups[b].mean(),
+                                'p_value': p_value, 'significant': significant, 'winner': winner})
+
+        means = {name: groups[name].mean() for name in groups_order}
+        ranking = sorted(groups_order, key=lambda name: (scores[name], means[name]), reverse=True)
+        return {'column': column, 'variable': variable, 'comparisons': comparisons,
+                'ranking': [{'group': name, 'score': scores[name], 'mean': means[name]} for name in ranking]}
+
+    def fit(self, state=None, category=None, variable='order_ticket'):
+        """Ajuste de distribuições (comprehensive_analysis) para um recorte UF/categoria"""
+        with self.lock:
+            df = self.orders_summary
+            mask = pd.Series(True, index=df.index)
+            if state:
+                mask &= df['customer_state'] == state
+            if category:
+                mask &= df['product_category'] == category
+            data = df.loc[mask, variable].dropna().to_numpy()
+        if len(data) < 10:
+            raise ValueError(f"Recorte com poucos pedidos ({len(data)}) para ajuste de distribuições")
+
+        output = io.StringIO()
+        with captured_output(output):
+            analysis = AdvancedDistributionAnalyzer().comprehensive_analysis(data, variable, category, state)
+        best = analysis['best_distribution']
+        return {
+            'state': state,
+            'category': category,
+            'variable': variable,
+            'descriptive_stats': analysis['descriptive_stats'],
+            'normality_tests': analysis['normality_tests'],
+            'fits': {name: {key: fit[key] for key in ('parameters', 'aic', 'bic', 'ks_statistic', 'ks_p_value')
+                            if key in fit}
+                     for name, fit in analysis['distribution_fits'].items()},
+            'best_distribution': best[0] if best else None,
+            'output': output.getvalue()
+        }
+
+def make_handler(state):
+    class AnalysisHandler(BaseHTTPRequestHandler):
+        """
+        GET /status
+        GET /question/<nome>                      (p.ex. /question/statistical_question_4)
+        GET /pairwise?column=customer_state&variable=freight_ratio&top=8
+        GET /fit?state=SP&category=bed_bath_table&variable=order_ticket
+        GET /reload
+        """
+
+        def _reply(self, status, payload):
+            body = json.dumps(_json_keys(payload), default=_json_default, ensure_ascii=False).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            params = {key: values[-1] for key, values in urllib.parse.parse_qs(url.query).items()}
+            parts = [part for part in url.path.split('/') if part]
+            start = time.perf_counter()
+            try:
+                if parts == ['status']:
+                    payload = state.status()
+                elif len(parts) == 2 and parts[0] == 'question':
+                    payload = state.run_question(parts[1])
+                elif parts == ['pairwise']:
+                    payload = state.pairwise(params['column'], params.get('variable', 'order_ticket'),
+                                             int(params.get('top', 8)))
+                elif parts == ['fit']:
+                    payload = state.fit(params.get('state'), params.get('category'),
+                                        params.get('variable', 'order_ticket'))
+                elif parts == ['reload']:
+                    state.reload()
+                    payload = state.status()
+                else:
+                    self._reply(404, {'error': f"Rota desconhecida: {url.path}"})
+                    return
+            except (KeyError, ValueError) as error:
+                self._reply(400, {'error': str(error.args[0]) if error.args else repr(error)})
+                return
+            except Exception as error:  # qualquer outra falha vira 500 em JSON, sem derrubar a conexão
+                traceback.print_exc()
+                self._reply(500, {'error': f"{type(error).__name__}: {error}"})
+                return
+            payload['elapsed_ms'] = (time.perf_counter() - start) * 1000
+            payload['data_version'] = state.version
+            self._reply(200, payload)
+
+        def log_message(self, format, *args):
+            print(f"[{self.log_date_time_string()}] {format % args}")
+
+    return AnalysisHandler
+
+def serve(csv_dir=CSV_DIR, host=DAEMON_HOST, port=DAEMON_PORT, poll_seconds=POLL_SECONDS):
+    """Carrega os dados e atende consultas até Ctrl+C"""
+    install_thread_output()
+    state = AnalysisState(csv_dir, poll_seconds)
+    state.reload()
+    watcher = threading.Thread(target=state.watch, daemon=True)
+    watcher.start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    print(f"Serviço de análise em http://{host}:{port} (Ctrl+C para encerrar)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        state.stop()
+        server.server_close()
+
+def query(path, host=DAEMON_HOST, port=DAEMON_PORT, timeout=600):
+    """Consulta o serviço e devolve a resposta JSON como dicionário"""
+    try:
+        with urllib.request.urlopen(f'http://{host}:{port}{path}', timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as error:
+        return json.loads(error.read().decode('utf-8'))
+
+def main():
+    parser = argparse.ArgumentParser(description='Serviço local de análise com os dados da Olist em memória')
+    parser.add_argument('--host', default=DAEMON_HOST)
+    parser.add_argument('--port', type=int, default=DAEMON_PORT)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help='Inicia o serviço')
+    serve_parser.add_argument('--csv-dir', default=CSV_DIR)
+    serve_parser.add_argument('--poll', type=float, default=POLL_SECONDS)
+
+    commands.add_parser('status', help='Situação dos dados carregados')
+    commands.add_parser('reload', help='Força a recarga dos dados')
+
+    question_parser = commands.add_parser('question', help='Executa uma pergunta (p.ex. statistical_question_4)')
+    question_parser.add_argument('name')
+
+    pairwise_parser = commands.add_parser('pairwise', help='Comparação par a par (p.ex. customer_state freight_ratio)')
+    pairwise_parser.add_argument('column')
+    pairwise_parser.add_argument('variable', nargs='?', default='order_ticket')
+    pairwise_parser.add_argument('--top', type=int, default=8)
+
+    fit_parser = commands.add_parser('fit', help='Ajuste de distribuições de um recorte (p.ex. SP bed_bath_table)')
+    fit_parser.add_argument('state', nargs='?')
+    fit_parser.add_argument('category', nargs='?')
+    fit_parser.add_argument('--variable', default='order_ticket')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.csv_dir, args.host, args.port, args.poll)
+        return
+
+    if args.command == 'question':
+        path = f'/question/{args.name}'
+    elif args.command == 'pairwise':
+        path = '/pairwise?' + urllib.parse.urlencode({'column': args.column, 'variable': args.variable,
+                                                      'top': args.top})
+    elif args.command == 'fit':
+        params = {'state': args.state, 'category': args.category, 'variable': args.variable}
+        path = '/fit?' + urllib.parse.urlencode({key: value for key, value in params.items() if value})
+    else:
+        path = f'/{args.command}'
+
+    response = query(path, args.host, args.port)
+    output = response.pop('output', None)
+    if output:
+        print(output)
+    print(json.dumps(response, indent=2, ensure_ascii=False))
+    if 'error' in response:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
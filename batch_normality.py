@@ -0,0 +1,332 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from olist_dataset import CSV_DIR, N_WORKERS, build_orders_summary
+from olist_sampling import SAMPLE_SEED
+from olist_profiling import profiled
+from lazy_imports import lazy_module
+
+stats = lazy_module('scipy.stats')
+special = lazy_module('scipy.special')
+
+# Processos do Shapiro-Wilk (o único teste calculado grupo a grupo)
+NORMALITY_WORKERS = int(os.getenv('OLIST_NORMALITY_WORKERS', str(N_WORKERS)))
+
+# Testes na ordem de AdvancedDistributionAnalyzer.normality_tests, com o nome exibido
+NORMALITY_TESTS = {
+    'shapiro_wilk': 'Shapiro-Wilk',
+    'anderson_darling': 'Anderson-Darling',
+    'kolmogorov_smirnov': 'Kolmogorov-Smirnov',
+    'jarque_bera': 'Jarque-Bera',
+    'dagostino': "D'Agostino-Pearson"
+}
+
+# Shapiro-Wilk em subamostra sem reposição acima deste tamanho (limitação do teste)
+SHAPIRO_MAX_SIZE = 5000
+
+# Valor crítico de 5% do Anderson-Darling para a normal, antes da correção por n; usado só
+# se a tabela do stats.anderson do SciPy instalado não estiver acessível (_anderson_critical_5)
+ANDERSON_CRITICAL_5 = 0.752
+
+# Valores do grupo do processo trabalhador (recebidos uma vez no inicializador do pool)
+_worker_values = None
+
+class GroupedArray:
+    """
+    Valores de vários grupos concatenados, ordenados por grupo, mais os offsets.
+
+    Os valores do grupo i são values[offsets[i]:offsets[i + 1]]; labels nomeia
+    cada grupo. Estatísticas por grupo saem de np.bincount sobre group_ids, em
+    passadas sobre o array inteiro, sem fatiar um DataFrame por segmento.
+
+    Uso:
+        grouped = GroupedArray.from_frame(orders_summary, 'customer_state', 'order_ticket')
+        table = batch_normality_tests(grouped)
+    """
+
+    __slots__ = ('values', 'offsets', 'labels', '_group_ids')
+
+    def __init__(self, values, offsets, labels=None):
+        self.values = np.asarray(values, dtype=np.float64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        if self.offsets[0] != 0 or self.offsets[-1] != len(self.values) or np.any(np.diff(self.offsets) < 0):
+            raise ValueError("offsets devem ser crescentes, de 0 até o número de valores")
+        self.labels = list(range(len(self.offsets) - 1)) if labels is None else list(labels)
+        if len(self.labels) != len(self.offsets) - 1:
+            raise ValueError(f"{len(self.labels)} rótulos para {len(self.offsets) - 1} grupos")
+        self._group_ids = None
+
+    @classmethod
+    def from_groups(cls, groups):
+        """A partir de {rótulo: valores}"""
+        arrays = [np.asarray(values, dtype=np.float64) for values in groups.values()]
+        offsets = np.concatenate([[0], np.cumsum([len(array) for array in arrays])])
+        values = np.concatenate(arrays) if arrays else np.empty(0)
+        return cls(values, offsets, list(groups))
+
+    @classmethod
+    def from_frame(cls, df, group_column, value_column, min_size=1):
+        """
+        Agrupa value_column por group_column (rótulos em ordem crescente).
+
+        Linhas com grupo ou valor ausente são descartadas, e grupos com menos de
+        min_size valores ficam de fora.
+        """
+        clean = df[[group_column, value_column]].dropna()
+        codes, labels = pd.factorize(clean[group_column], sort=True)
+        counts = np.bincount(codes, minlength=len(labels))
+        kept = counts >= min_size
+        rows = kept[codes]
+        codes, values = codes[rows], clean[value_column].to_numpy(dtype=np.float64)[rows]
+        order = np.argsort(codes, kind='stable')
+        offsets = np.concatenate([[0], np.cumsum(counts[kept])])
+        return cls(values[order], offsets, [label for label, keep in zip(labels, kept) if keep])
+
+    @property
+    def counts(self):
+        return np.diff(self.offsets)
+
+    @property
+    def group_ids(self):
+        """Grupo de cada valor (calculado uma vez)"""
+        if self._group_ids is None:
+            self._group_ids = np.repeat(np.arange(len(self)), self.counts)
+        return self._group_ids
+
+    def group(self, index):
+        return self.values[self.offsets[index]:self.offsets[index + 1]]
+
+    def sum(self, values):
+        """Soma por grupo de um array alinhado a values (0 em grupos vazios)"""
+        return np.bincount(self.group_ids, weights=values, minlength=len(self))
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+def anderson_p_value(statistic):
+    """Aproximação do p-value do Anderson-Darling (mesmas faixas de AdvancedDistributionAnalyzer)"""
+    statistic = np.asarray(statistic, dtype=np.float64)
+    with np.errstate(over='ignore', invalid='ignore'):
+        return np.select(
+            [statistic < 0.2, statistic < 0.34, statistic < 0.6],
+            [1 - np.exp(-13.436 + 101.14 * statistic - 223.73 * statistic ** 2),
+             1 - np.exp(-8.318 + 42.796 * statistic - 59.938 * statistic ** 2),
+             np.exp(0.9177 - 4.279 * statistic - 1.38 * statistic ** 2)],
+            np.exp(1.2937 - 5.709 * statistic + 0.0186 * statistic ** 2)
+        )
+
+def _anderson_critical_5():
+    """Valor crítico de 5% da mesma tabela usada por stats.anderson (muda entre versões do SciPy)"""
+    table = getattr(lazy_module('scipy.stats._morestats'), '_Avals_norm', None)
+    return float(table[2]) if table is not None else ANDERSON_CRITICAL_5
+
+def group_moments(grouped):
+    """
+    Tamanho, média e momentos centrais 2 a 4 (viesados, como stats.skew) por grupo.
+
+    Duas passadas: médias e, sobre os desvios, as somas das potências.
+    """
+    n = grouped.counts.astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = grouped.sum(grouped.values) / n
+        centered = grouped.values - mean[grouped.group_ids]
+        squared = centered * centered
+        m2 = grouped.sum(squared) / n
+        m3 = grouped.sum(squared * centered) / n
+        m4 = grouped.sum(squared * squared) / n
+    return n, mean, m2, m3, m4
+
+def _jarque_bera(n, skewness, excess_kurtosis):
+    statistic = n / 6 * (skewness ** 2 + excess_kurtosis ** 2 / 4)
+    return statistic, special.chdtrc(2, statistic)
+
+def _dagostino(n, skewness, kurtosis):
+    """normaltest vetorizado: skewtest² + kurtosistest² (mesmas fórmulas do scipy; NaN com n < 8)"""
+    n = np.where(n < 8, np.nan, n)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = skewness * np.sqrt(((n + 1) * (n + 3)) / (6.0 * (n - 2)))
+        beta2 = 3.0 * (n ** 2 + 27 * n - 70) * (n + 1) * (n + 3) / ((n - 2.0) * (n + 5) * (n + 7) * (n + 9))
+        w2 = -1 + np.sqrt(2 * (beta2 - 1))
+        delta = 1 / np.sqrt(0.5 * np.log(w2))
+        alpha = np.sqrt(2.0 / (w2 - 1))
+        y = np.where(y == 0, 1.0, y)
+        z_skew = delta * np.log(y / alpha + np.sqrt((y / alpha) ** 2 + 1))
+
+        expected = 3.0 * (n - 1) / (n + 1)
+        variance = 24.0 * n * (n - 2) * (n - 3) / ((n + 1) * (n + 1.0) * (n + 3) * (n + 5))
+        x = (kurtosis - expected) / variance ** 0.5
+        sqrt_beta1 = 6.0 * (n * n - 5 * n + 2) / ((n + 7) * (n + 9)) * ((6.0 * (n + 3) * (n + 5))
+                                                                       / (n * (n - 2) * (n - 3))) ** 0.5
+        a = 6.0 + 8.0 / sqrt_beta1 * (2.0 / sqrt_beta1 + (1 + 4.0 / sqrt_beta1 ** 2) ** 0.5)
+        denominator = 1 + x * (2 / (a - 4.0)) ** 0.5
+        term2 = np.sign(denominator) * np.where(denominator == 0.0, np.nan,
+                                                ((1 - 2.0 / a) / np.abs(denominator)) ** (1 / 3))
+        z_kurtosis = (1 - 2 / (9.0 * a) - term2) / (2 / (9.0 * a)) ** 0.5
+
+    statistic = z_skew ** 2 + z_kurtosis ** 2
+    return statistic, special.chdtrc(2, statistic)
+
+def _sorted_tests(grouped, n, mean, m2):
+    """
+    KS contra a normal padronizada (desvio populacional, como _ks_test) e
+    Anderson-Darling (desvio amostral, como stats.anderson), sobre uma única
+    ordenação dentro dos grupos.
+    """
+    ids = grouped.group_ids
+    starts = grouped.offsets[:-1]
+    values = grouped.values[np.lexsort((grouped.values, ids))]
+    position = np.arange(len(values)) - starts[ids]  # 0..n-1 dentro do grupo
+    group_n = n[ids]
+    nonempty = n > 0
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cdf = special.ndtr((values - mean[ids]) / np.sqrt(m2)[ids])
+        distance = np.maximum((position + 1) / group_n - cdf, cdf - position / group_n)
+        ks = np.full(len(grouped), np.nan)
+        ks[nonempty] = np.maximum.reduceat(distance, starts[nonempty])
+        ks_p_value = np.clip(stats.kstwo.sf(ks, n), 0, 1)
+
+        w = (values - mean[ids]) / np.sqrt(m2 * n / (n - 1))[ids]
+        mirrored = grouped.offsets[1:][ids] - 1 - position  # x_{n+1-i}
+        terms = (2 * position + 1) / group_n * (special.log_ndtr(w) + special.log_ndtr(-w[mirrored]))
+        anderson = np.where(n > 1, -n - grouped.sum(terms), np.nan)
+        critical = np.around(_anderson_critical_5() / (1.0 + 0.75 / n + 2.25 / n / n), 3)
+    return ks, ks_p_value, anderson, critical
+
+def _shapiro(values, task):
+    """Shapiro-Wilk de um grupo, em subamostra sem reposição acima de SHAPIRO_MAX_SIZE"""
+    start, stop, seed_sequence, max_size = task
+    data = values[start:stop]
+    if len(data) < 3:
+        return np.nan, np.nan
+    if len(data) > max_size:
+        data = np.random.default_rng(seed_sequence).choice(data, max_size, replace=False)
+    statistic, p_value = stats.shapiro(data)
+    return float(statistic), float(p_value)
+
+def _init_worker(values):
+    global _worker_values
+    _worker_values = values
+
+def _run_shapiro(task):
+    return _shapiro(_worker_values, task)
+
+def _shapiro_tests(grouped, max_size, seed, n_workers):
+    seeds = np.random.SeedSequence(seed).spawn(len(grouped))
+    tasks = [(grouped.offsets[i], grouped.offsets[i + 1], seeds[i], max_size) for i in range(len(grouped))]
+    if n_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                 initargs=(grouped.values,)) as pool:
+            results = list(pool.map(_run_shapiro, tasks))
+    else:
+        results = [_shapiro(grouped.values, task) for task in tasks]
+    return np.array(results, dtype=np.float64).reshape(-1, 2).T
+
+@profiled()
+def batch_normality_tests(grouped, tests=tuple(NORMALITY_TESTS), alpha=0.05, shapiro_max_size=SHAPIRO_MAX_SIZE,
+                          seed=SAMPLE_SEED, n_workers=NORMALITY_WORKERS):
+    """
+    Os cinco testes de normalidade de AdvancedDistributionAnalyzer para todos os grupos de uma vez.
+
+    Jarque-Bera e D'Agostino-Pearson saem dos momentos por grupo (group_moments);
+    KS e Anderson-Darling de uma única ordenação dentro dos grupos. Todos são
+    vetorizados sobre o array inteiro. Só o Shapiro-Wilk roda grupo a grupo, em um pool
+    de processos, com subamostra determinística (semente por grupo) acima de
+    shapiro_max_size.
+
+    Args:
+        grouped (GroupedArray): Valores agrupados
+        tests (tuple): Testes a calcular (chaves de NORMALITY_TESTS)
+        alpha (float): Nível de significância da interpretação
+        shapiro_max_size (int): Tamanho máximo da amostra do Shapiro-Wilk
+        seed (int): Semente das subamostras
+        n_workers (int): Processos do Shapiro-Wilk (1 = em série)
+
+    Returns:
+        pd.DataFrame: Uma linha por (grupo, teste): group, n, test, test_name,
+            statistic, p_value, critical_value (só Anderson-Darling) e interpretation
+            ('Indefinido' onde o teste não se aplica: grupo pequeno ou constante)
+    """
+    unknown = [test for test in tests if test not in NORMALITY_TESTS]
+    if unknown:
+        raise ValueError(f"Teste desconhecido: {', '.join(unknown)} (disponíveis: {', '.join(NORMALITY_TESTS)})")
+
+    n, mean, m2, m3, m4 = group_moments(grouped)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        skewness = m3 / m2 ** 1.5
+        kurtosis = m4 / m2 ** 2
+
+    results = {}
+    if 'jarque_bera' in tests:
+        results['jarque_bera'] = _jarque_bera(n, skewness, kurtosis - 3)
+    if 'dagostino' in tests:
+        results['dagostino'] = _dagostino(n, skewness, kurtosis)
+    if 'kolmogorov_smirnov' in tests or 'anderson_darling' in tests:
+        ks, ks_p_value, anderson, critical = _sorted_tests(grouped, n, mean, m2)
+        results['kolmogorov_smirnov'] = (ks, ks_p_value)
+        results['anderson_darling'] = (anderson, anderson_p_value(anderson), critical)
+    if 'shapiro_wilk' in tests:
+        results['shapiro_wilk'] = _shapiro_tests(grouped, shapiro_max_size, seed, n_workers)
+
+    frames = []
+    for order, test in enumerate(tests):
+        statistic, p_value = results[test][:2]
+        critical = results[test][2] if test == 'anderson_darling' else np.full(len(grouped), np.nan)
+        normal = statistic < critical if test == 'anderson_darling' else p_value > alpha
+        undefined = np.isnan(statistic) | np.isnan(p_value)
+        frames.append(pd.DataFrame({
+            'group': grouped.labels,
+            'n': grouped.counts,
+            'test': test,
+            'test_name': NORMALITY_TESTS[test],
+            'statistic': statistic,
+            'p_value': p_value,
+            'critical_value': critical,
+            'interpretation': np.select([undefined, normal], ['Indefinido', 'Normal'], 'Não Normal'),
+            '_order': order
+        }))
+    table = pd.concat(frames, ignore_index=True)
+    table['_group'] = np.tile(np.arange(len(grouped)), len(tests))
+    return table.sort_values(['_group', '_order'], kind='stable').drop(columns=['_group', '_order']) \
+        .reset_index(drop=True)
+
+def main():
+    """Testes de normalidade de todas as UFs e categorias: lote × um segmento por vez"""
+    from advanced_distribution_analysis import AdvancedDistributionAnalyzer
+
+    csv_dir = sys.argv[1] if len(sys.argv) > 1 else CSV_DIR
+    orders_summary = build_orders_summary(csv_dir, include_payments=False)
+    analyzer = AdvancedDistributionAnalyzer()
+    deterministic = [test for test in NORMALITY_TESTS if test != 'shapiro_wilk']
+
+    print(f"\n=== TESTES DE NORMALIDADE EM LOTE ({NORMALITY_WORKERS} processo(s) no Shapiro-Wilk) ===")
+    for variable in ['order_ticket', 'freight_ratio']:
+        for column in ['customer_state', 'product_category']:
+            grouped = GroupedArray.from_frame(orders_summary, column, variable, min_size=20)
+            start = time.perf_counter()
+            table = batch_normality_tests(grouped)
+            batch_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            largest = 0.0
+            for i, label in enumerate(grouped.labels):
+                data = grouped.group(i)
+                rows = table[table['group'] == label].set_index('test')
+                for test in deterministic:
+                    reference = analyzer.normality_tests[test](data)['statistic']
+                    largest = max(largest, abs(rows.loc[test, 'statistic'] - reference) / max(abs(reference), 1e-12))
+                analyzer.normality_tests['shapiro_wilk'](data)
+            loop_seconds = time.perf_counter() - start
+
+            normal = table[table['interpretation'] == 'Normal'].groupby('test_name').size()
+            print(f"\n{variable} por {column}: {len(grouped)} grupos, {len(grouped.values):,} valores")
+            print(f"   Lote {batch_seconds:.2f}s × um segmento por vez {loop_seconds:.2f}s | "
+                  f"maior desvio relativo das estatísticas (exceto Shapiro-Wilk): {largest:.1e}")
+            for test, test_name in NORMALITY_TESTS.items():
+                print(f"   {test_name:<20} normal em {normal.get(test_name, 0)} de {len(grouped)} grupos")
+
+if __name__ == "__main__":
+    main()
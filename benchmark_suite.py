@@ -0,0 +1,293 @@
+import matplotlib
+matplotlib.use('Agg')
+import pandas as pd
+import numpy as np
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+import contextlib
+import warnings
+from itertools import combinations
+from scipy.stats import mannwhitneyu
+from synthetic_olist import synthetic_data_dir
+import advanced_distribution_analysis
+import comprehensive_analysis
+import pairwise_comparisons
+import seasonal_analysis
+warnings.filterwarnings('ignore')
+
+# Diretório dos resultados
+RESULTS_DIR = 'benchmarks'
+
+# Scripts cujo tempo de importação é medido em um interpretador novo (escala 0 = independe dos dados)
+IMPORT_MODULES = ['olist_dataset', 'pairwise_analysis', 'pairwise_comparisons', 'seasonal_analysis',
+                  'statistical_questions_analysis', 'additional_statistical_questions',
+                  'advanced_distribution_analysis', 'comprehensive_analysis', 'descriptive_analysis_by_category']
+HEAVY_MODULES = ['scipy', 'matplotlib', 'seaborn']
+
+# Aumento relativo da mediana considerado regressão, e tempo mínimo para comparar
+REGRESSION_THRESHOLD = 0.10
+MIN_SECONDS = 0.005
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def time_stage(func, repeats=3, warmup=1):
+    """
+    Executa func (sem argumentos) warmup vezes sem medir e depois repeats vezes medindo.
+
+    A saída impressa pelas funções de análise é descartada durante a medição.
+
+    Returns:
+        tuple: (tempos em segundos, resultado da última execução)
+    """
+    timings = []
+    result = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            result = func()
+        for _ in range(repeats):
+            start = time.perf_counter()
+            result = func()
+            timings.append(time.perf_counter() - start)
+    return timings, result
+
+def pairwise_mann_whitney(df, column, variable='order_ticket'):
+    """Laço de testes de Mann-Whitney entre todos os pares de grupos (como nos scripts pairwise)"""
+    groups = {name: group[variable].values for name, group in df.groupby(column, observed=True)}
+    results = []
+    for a, b in combinations(sorted(groups), 2):
+        statistic, p_value = mannwhitneyu(groups[a], groups[b], alternative='two-sided')
+        results.append((a, b, statistic, p_value))
+    return results
+
+def measure_import(module, repeats=3):
+    """
+    Tempo de 'import module' em um interpretador novo (sem cache de módulos do processo).
+
+    Returns:
+        tuple: (tempos em segundos, bibliotecas pesadas carregadas pelo import)
+    """
+    code = (f"import sys, time, json; start = time.perf_counter(); import {module}; "
+            f"elapsed = time.perf_counter() - start; "
+            f"print(json.dumps([elapsed, [m for m in {HEAVY_MODULES!r} if m in sys.modules]]))")
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    timings = []
+    loaded = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                check=True, cwd=script_dir).stdout
+        elapsed, loaded = json.loads(output.strip().splitlines()[-1])
+        timings.append(elapsed)
+    return timings, loaded
+
+def benchmark_imports(repeats=3):
+    """Mede o tempo de importação de cada script de análise (estágios 'import[módulo]')"""
+    print("\n=== TEMPO DE IMPORTAÇÃO ===")
+    rows = []
+    for module in IMPORT_MODULES:
+        timings, loaded = measure_import(module, repeats)
+        rows.append({
+            'stage': f'import[{module}]',
+            'scale': 0,
+            'rows': 0,
+            'repeats': repeats,
+            'warmup': 0,
+            'timings_s': timings,
+            'best_s': min(timings),
+            'median_s': float(np.median(timings)),
+            'mean_s': float(np.mean(timings)),
+            'loaded_modules': loaded
+        })
+        print(f"   {'import[' + module + ']':<40} mediana {np.median(timings):8.3f}s  "
+              f"(carrega: {', '.join(loaded) or 'nenhuma biblioteca pesada'})")
+    return rows
+
+def benchmark_scale(scale, repeats=3, warmup=1):
+    """
+    Mede todos os estágios do pipeline em uma escala de dados sintéticos.
+
+    Estágios: carregamento e merge (load_data de cada script), ajuste de cada
+    distribuição, comprehensive_analysis, laços de Mann-Whitney par a par,
+    define_seasonal_periods e renderização de gráficos.
+
+    Returns:
+        list: Um dicionário por estágio com tempos e linhas processadas
+    """
+    csv_dir = synthetic_data_dir(scale)
+    rows = []
+
+    def record(stage, func, n_rows=None):
+        timings, result = time_stage(func, repeats, warmup)
+        if n_rows is None:  # carregadores: linhas do DataFrame retornado
+            n_rows = len(result[0] if isinstance(result, tuple) else result)
+        rows.append({
+            'stage': stage,
+            'scale': scale,
+            'rows': int(n_rows),
+            'repeats': repeats,
+            'warmup': warmup,
+            'timings_s': timings,
+            'best_s': min(timings),
+            'median_s': float(np.median(timings)),
+            'mean_s': float(np.mean(timings))
+        })
+        print(f"   {stage:<40} mediana {np.median(timings):8.3f}s  ({int(n_rows):,} linhas)")
+        return result
+
+    print(f"\n=== ESCALA {scale:g}x ({csv_dir}) ===")
+
+    # Carregamento e merge
+    df = record('load_data[pairwise]', lambda: pairwise_comparisons.load_data(csv_dir))
+    seasonal_df = record('load_data[seasonal]', lambda: seasonal_analysis.load_data(csv_dir))
+    comprehensive_df, _ = record('load_data[comprehensive]',
+                                 lambda: comprehensive_analysis.load_and_prepare_comprehensive_data(csv_dir))
+
+    # Ajuste de distribuições (uma por vez) e análise completa
+    analyzer = advanced_distribution_analysis.AdvancedDistributionAnalyzer()
+    data = df['order_ticket'].values
+    for name in analyzer.distributions:
+        record(f'fit_distribution[{name}]', lambda: analyzer.fit_distribution(data, name), len(data))
+    analysis = record('comprehensive_analysis', lambda: analyzer.comprehensive_analysis(data, 'order_ticket'),
+                      len(data))
+
+    # Laços de Mann-Whitney par a par
+    top_states = df['customer_state'].value_counts().head(8).index
+    df_states = df[df['customer_state'].isin(top_states)]
+    record('pairwise_mannwhitney[states]', lambda: pairwise_mann_whitney(df_states, 'customer_state'),
+           len(df_states))
+    for column in ['payment_type', 'time_slot', 'region']:
+        record(f'pairwise_mannwhitney[{column}]', lambda: pairwise_mann_whitney(df, column), len(df))
+
+    # Períodos sazonais
+    record('define_seasonal_periods', lambda: seasonal_analysis.define_seasonal_periods(seasonal_df),
+           len(seasonal_df))
+
+    # Renderização de gráficos (em diretório temporário, sem sujar charts/)
+    top_state = comprehensive_df['customer_state'].value_counts().index[0]
+    state_data = comprehensive_df[comprehensive_df['customer_state'] == top_state]
+    current_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as work_dir:
+        os.makedirs(os.path.join(work_dir, 'charts'))
+        os.chdir(work_dir)
+        try:
+            record('create_comprehensive_plot',
+                   lambda: analyzer.create_comprehensive_plot(data, analysis, 'order_ticket'), len(data))
+            record('create_state_composite_analysis',
+                   lambda: comprehensive_analysis.create_state_composite_analysis(
+                       state_data, 'order_ticket', 'product_category', top_state, 'continuous'),
+                   len(state_data))
+        finally:
+            os.chdir(current_dir)
+
+    return rows
+
+def run_benchmarks(scales, repeats=3, warmup=1, output=None, imports=True):
+    """Executa a suíte (importação e escalas informadas) e grava o resultado em JSON"""
+    results = {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': pd.Timestamp.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'scales': scales,
+            'repeats': repeats,
+            'warmup': warmup
+        },
+        'results': []
+    }
+    if imports:
+        results['results'].extend(benchmark_imports(repeats))
+    for scale in scales:
+        results['results'].extend(benchmark_scale(scale, repeats, warmup))
+
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        label = results['meta']['commit'] or pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')
+        output = os.path.join(RESULTS_DIR, f'benchmark_{label}.json')
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResultados salvos em {output}")
+    return results
+
+def compare_results(baseline, candidate, threshold=REGRESSION_THRESHOLD, min_seconds=MIN_SECONDS):
+    """
+    Compara duas execuções da suíte estágio a estágio (mesma escala).
+
+    Um estágio é regressão quando a mediana do candidato excede a da base em mais
+    que threshold (relativo). Estágios com mediana-base abaixo de min_seconds são
+    ignorados, pois ficam dentro do ruído de medição.
+
+    Returns:
+        pd.DataFrame: Uma linha por estágio com medianas, razão e situação
+    """
+    base = pd.DataFrame(baseline['results']).set_index(['stage', 'scale'])
+    cand = pd.DataFrame(candidate['results']).set_index(['stage', 'scale'])
+    table = base[['median_s']].join(cand[['median_s']], lsuffix='_base', rsuffix='_new', how='inner')
+    table['ratio'] = table['median_s_new'] / table['median_s_base']
+
+    def status(row):
+        if row['median_s_base'] < min_seconds:
+            return 'ruído'
+        if row['ratio'] > 1 + threshold:
+            return 'REGRESSÃO'
+        if row['ratio'] < 1 - threshold:
+            return 'melhoria'
+        return 'ok'
+
+    table['status'] = table.apply(status, axis=1)
+    return table.reset_index()
+
+def main():
+    parser = argparse.ArgumentParser(description='Suíte de benchmark de ponta a ponta do pipeline Olist')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run = commands.add_parser('run', help='Executa a suíte e grava o JSON de resultados')
+    run.add_argument('--scales', type=float, nargs='+', default=[0.1, 1.0])
+    run.add_argument('--repeats', type=int, default=3)
+    run.add_argument('--warmup', type=int, default=1)
+    run.add_argument('--output')
+    run.add_argument('--skip-imports', action='store_true', help='Não mede o tempo de importação')
+
+    compare = commands.add_parser('compare', help='Compara dois JSONs e sinaliza regressões')
+    compare.add_argument('baseline')
+    compare.add_argument('candidate')
+    compare.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD)
+    compare.add_argument('--min-seconds', type=float, default=MIN_SECONDS)
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        print("=== SUÍTE DE BENCHMARK DO PIPELINE ===")
+        run_benchmarks(args.scales, args.repeats, args.warmup, args.output, not args.skip_imports)
+        return
+
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.candidate, encoding='utf-8') as f:
+        candidate = json.load(f)
+
+    print(f"=== COMPARAÇÃO: {baseline['meta']['commit']} → {candidate['meta']['commit']} ===")
+    table = compare_results(baseline, candidate, args.threshold, args.min_seconds)
+    print(table.round(4).to_string(index=False))
+
+    regressions = table[table['status'] == 'REGRESSÃO']
+    if len(regressions) > 0:
+        print(f"\n{len(regressions)} estágio(s) com regressão acima de {args.threshold:.0%}")
+        sys.exit(1)
+    print("\nNenhuma regressão encontrada")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import numpy as np
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from olist_dataset import CSV_DIR, N_WORKERS, build_orders_summary
+from olist_sampling import SAMPLE_SEED
+from olist_profiling import profiled
+from advanced_distribution_analysis import _fit_gamma, _fit_weibull
+from lazy_imports import lazy_module
+
+special = lazy_module('scipy.special')
+
+# Reamostragens, memória por bloco de reamostragens e processos do bootstrap
+BOOTSTRAP_RESAMPLES = int(os.getenv('OLIST_BOOTSTRAP_RESAMPLES', '1000'))
+BOOTSTRAP_BLOCK_BYTES = int(float(os.getenv('OLIST_BOOTSTRAP_BLOCK_MB', '64')) * 1024 ** 2)
+BOOTSTRAP_WORKERS = int(os.getenv('OLIST_BOOTSTRAP_WORKERS', str(N_WORKERS)))
+
+# Bytes por elemento da matriz do bloco: índices, valores, log dos valores e a cópia da mediana
+BYTES_PER_ELEMENT = 32
+
+# Candidatas com ajuste direto (fórmula fechada ou Newton 1-D) e nome de cada
+# parâmetro ajustado; None marca o loc fixo em 0. A beta (Nelder-Mead) fica de fora
+PARAMETER_NAMES = {
+    'normal': ('loc', 'scale'),
+    'lognormal': ('s', None, 'scale'),
+    'exponential': (None, 'scale'),
+    'gamma': ('a', None, 'scale'),
+    'weibull': ('c', None, 'scale'),
+    'pareto': ('b', None, 'scale'),
+    'chi2': ('df', None, 'scale'),
+    'uniform': ('loc', 'scale')
+}
+
+# Candidatas válidas com zeros ou negativos na amostra (as demais exigem suporte positivo)
+REAL_SUPPORT = ('normal', 'uniform')
+
+# Dados do processo trabalhador (recebidos uma vez no inicializador do pool)
+_worker_data = None
+
+def _rows_fit(fitter, rows):
+    """Ajuste linha a linha com um ajustador de advanced_distribution_analysis (NaN onde não converge)"""
+    params = []
+    for row in rows:
+        fitted, _ = fitter(row)
+        params.append((np.nan, 0.0, np.nan) if fitted is None else fitted)
+    return np.array(params, dtype=np.float64)
+
+def block_fits(values, names):
+    """
+    Estatísticas e ajustes de cada linha de uma matriz (reamostragens × n).
+
+    Média, mediana, variância, extremos e momentos de log(x) são calculados de
+    uma vez para o bloco inteiro (operações por eixo), e deles saem as fórmulas
+    fechadas. Gama e Weibull usam os ajustadores do analisador linha a linha
+    (qui-quadrado é a gama reparametrizada). A log-verossimilhança no máximo de
+    cada candidata depende só desses momentos, sem avaliar logpdf nos n pontos:
+    na Weibull, média((x/escala)^c) = 1 no estimador de máxima verossimilhança.
+
+    Returns:
+        dict: 'mean', 'median' (linhas,) e, por candidata,
+            (parâmetros (linhas × k), log-verossimilhança (linhas,))
+    """
+    n = values.shape[1]
+    mean = values.mean(axis=1)
+    variance = values.var(axis=1)
+    minimum = values.min(axis=1)
+    spread = values.max(axis=1) - minimum
+    result = {'mean': mean, 'median': np.median(values, axis=1), 'fits': {}}
+    fits = result['fits']
+    zeros = np.zeros_like(mean)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fits['normal'] = (np.column_stack([mean, np.sqrt(variance)]),
+                          -n / 2 * (np.log(2 * np.pi * variance) + 1))
+        fits['uniform'] = (np.column_stack([minimum, spread]), -n * np.log(spread))
+        if any(name not in REAL_SUPPORT for name in names):
+            log_values = np.log(values)
+            mean_log = log_values.mean(axis=1)
+            variance_log = log_values.var(axis=1)
+            del log_values
+            fits['lognormal'] = (np.column_stack([np.sqrt(variance_log), zeros, np.exp(mean_log)]),
+                                 -n * (mean_log + 0.5 * np.log(2 * np.pi * variance_log) + 0.5))
+            fits['exponential'] = (np.column_stack([zeros, mean]), -n * (np.log(mean) + 1))
+            b = 1 / (mean_log - np.log(minimum))
+            fits['pareto'] = (np.column_stack([b, zeros, minimum]),
+                              n * (np.log(b) + b * np.log(minimum) - (b + 1) * mean_log))
+
+            gamma = _rows_fit(_fit_gamma, values)
+            shape, scale = gamma[:, 0], gamma[:, 2]
+            gamma_likelihood = n * ((shape - 1) * mean_log - mean / scale - shape * np.log(scale)
+                                    - special.gammaln(shape))
+            fits['gamma'] = (gamma, gamma_likelihood)
+            fits['chi2'] = (np.column_stack([2 * shape, zeros, scale / 2]), gamma_likelihood)
+
+            weibull = _rows_fit(_fit_weibull, values)
+            shape, scale = weibull[:, 0], weibull[:, 2]
+            fits['weibull'] = (weibull, n * (np.log(shape) - shape * np.log(scale) + (shape - 1) * mean_log - 1))
+
+    result['fits'] = {name: fits[name] for name in names}
+    return result
+
+def _resample_block(data, task):
+    """Bloco de reamostragens: matriz de índices (tamanho × n) sorteada de uma vez"""
+    size, seed_sequence, names = task
+    rng = np.random.default_rng(seed_sequence)
+    values = data[rng.integers(0, len(data), size=(size, len(data)))]
+    return block_fits(values, names)
+
+def _init_worker(data):
+    global _worker_data
+    _worker_data = data
+
+def _run_block(task):
+    return _resample_block(_worker_data, task)
+
+def _interval(estimate, replicates, confidence):
+    """Estimativa pontual e intervalo percentil das réplicas válidas"""
+    replicates = replicates[np.isfinite(replicates)]
+    if len(replicates) == 0:
+        return {'estimate': float(estimate), 'lower': None, 'upper': None}
+    tail = (1 - confidence) / 2 * 100
+    lower, upper = np.percentile(replicates, [tail, 100 - tail])
+    return {'estimate': float(estimate), 'lower': float(lower), 'upper': float(upper)}
+
+@profiled()
+def bootstrap_fits(data, n_resamples=BOOTSTRAP_RESAMPLES, confidence=0.95, seed=SAMPLE_SEED,
+                   block_bytes=BOOTSTRAP_BLOCK_BYTES, n_workers=BOOTSTRAP_WORKERS):
+    """
+    Bootstrap não paramétrico dos ajustes de distribuição.
+
+    As reamostragens são sorteadas em blocos: cada bloco é uma matriz de índices
+    (reamostragens × n) com no máximo block_bytes de memória de trabalho. Cada
+    bloco tem seu próprio gerador (SeedSequence.spawn), então o resultado depende
+    da semente e do tamanho do bloco, mas não do número de processos.
+
+    Args:
+        data (np.ndarray): Amostra (p.ex. order_ticket da população geral)
+        n_resamples (int): Reamostragens
+        confidence (float): Nível dos intervalos percentis
+        seed (int): Semente
+        block_bytes (int): Memória de trabalho por bloco
+        n_workers (int): Processos (1 = em série)
+
+    Returns:
+        dict: intervalos da média e da mediana, intervalos dos parâmetros e
+            frequência de vitória pelo AIC de cada candidata
+    """
+    data = np.asarray(data, dtype=np.float64)
+    data = data[np.isfinite(data)]
+    n = len(data)
+    names = tuple(PARAMETER_NAMES) if data.min() > 0 else REAL_SUPPORT
+    block_size = int(max(1, min(n_resamples, block_bytes // (n * BYTES_PER_ELEMENT))))
+    sizes = [block_size] * (n_resamples // block_size)
+    if n_resamples % block_size:
+        sizes.append(n_resamples % block_size)
+    tasks = [(size, seed_sequence, names)
+             for size, seed_sequence in zip(sizes, np.random.SeedSequence(seed).spawn(len(sizes)))]
+
+    start = time.perf_counter()
+    if n_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker, initargs=(data,)) as pool:
+            blocks = list(pool.map(_run_block, tasks))
+    else:
+        blocks = [_resample_block(data, task) for task in tasks]
+    seconds = time.perf_counter() - start
+
+    point = block_fits(data[np.newaxis, :], names)
+    aic = np.column_stack([
+        np.concatenate([2 * block['fits'][name][0].shape[1] - 2 * block['fits'][name][1] for block in blocks])
+        for name in names
+    ])
+    aic[~np.isfinite(aic)] = np.inf
+    decided = np.isfinite(aic).any(axis=1)
+    winners = np.argmin(aic[decided], axis=1)
+
+    distributions = {}
+    for column, name in enumerate(names):
+        params = np.concatenate([block['fits'][name][0] for block in blocks])
+        point_params = point['fits'][name][0][0]
+        distributions[name] = {
+            'parameters': {parameter: _interval(point_params[i], params[:, i], confidence)
+                           for i, parameter in enumerate(PARAMETER_NAMES[name]) if parameter is not None},
+            'point_aic': float(2 * len(point_params) - 2 * point['fits'][name][1][0]),
+            'aic_wins': float(np.mean(winners == column)) if len(winners) else 0.0,
+            'failures': int(np.sum(~np.isfinite(aic[:, column])))
+        }
+
+    return {
+        'n': n,
+        'n_resamples': n_resamples,
+        'confidence': confidence,
+        'block_size': block_size,
+        'seconds': seconds,
+        'mean': _interval(point['mean'][0], np.concatenate([block['mean'] for block in blocks]), confidence),
+        'median': _interval(point['median'][0], np.concatenate([block['median'] for block in blocks]), confidence),
+        'distributions': distributions,
+        'excluded_distributions': [name for name in PARAMETER_NAMES if name not in names]
+    }
+
+def _format_interval(interval):
+    if interval['lower'] is None:
+        return f"{interval['estimate']:.4g} [sem réplicas válidas]"
+    return f"{interval['estimate']:.4g} [{interval['lower']:.4g}; {interval['upper']:.4g}]"
+
+def print_bootstrap_report(variable, result):
+    """Imprime os intervalos e a frequência de vitória pelo AIC, da candidata mais frequente para a menos"""
+    level = f"{result['confidence']:.0%}"
+    print(f"\n{variable} (n={result['n']:,}, {result['n_resamples']} reamostragens em blocos de "
+          f"{result['block_size']}, {result['seconds']:.1f}s):")
+    print(f"   Média   {_format_interval(result['mean'])} (IC {level})")
+    print(f"   Mediana {_format_interval(result['median'])} (IC {level})")
+    ranking = sorted(result['distributions'].items(), key=lambda item: -item[1]['aic_wins'])
+    for name, summary in ranking:
+        parameters = ', '.join(f"{parameter}={_format_interval(interval)}"
+                               for parameter, interval in summary['parameters'].items())
+        failures = f" | {summary['failures']} sem ajuste" if summary['failures'] else ''
+        print(f"   {name:<12} melhor AIC em {summary['aic_wins']:6.1%} | {parameters}{failures}")
+    if result['excluded_distributions']:
+        print(f"   Fora do bootstrap (suporte positivo, amostra com valores ≤ 0): "
+              f"{', '.join(result['excluded_distributions'])}")
+
+def main():
+    """Intervalos bootstrap dos ajustes da população geral no resumo por pedido"""
+    csv_dir = sys.argv[1] if len(sys.argv) > 1 else CSV_DIR
+    n_resamples = int(sys.argv[2]) if len(sys.argv) > 2 else BOOTSTRAP_RESAMPLES
+    orders_summary = build_orders_summary(csv_dir, include_payments=False)
+
+    print(f"\n=== BOOTSTRAP DOS AJUSTES ({BOOTSTRAP_WORKERS} processo(s)) ===")
+    print("Beta fora do bootstrap (sem ajuste direto); intervalos percentis")
+    for variable in ['order_ticket', 'freight_ratio']:
+        data = orders_summary[variable].dropna().to_numpy(dtype=np.float64)
+        print_bootstrap_report(variable, bootstrap_fits(data, n_resamples))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import numpy as np
+import os
+
+# Descarte opcional de candidatas cujo piso de AIC (momentos) não supera o melhor AIC já obtido
+AIC_PRUNING = os.getenv('OLIST_AIC_PRUNING', '').lower() not in ('', '0', 'false', 'no')
+
+# Suporte de cada candidata (loc=0 fixo nas de suporte positivo, como no ajuste)
+SUPPORT = {
+    'normal': 'real',
+    'lognormal': 'positive',
+    'exponential': 'positive',
+    'gamma': 'positive',
+    'weibull': 'positive',
+    'beta': 'unit',
+    'pareto': 'positive',
+    'chi2': 'nonnegative',
+    'uniform': 'real'
+}
+
+# Ordem de ajuste com o descarte ligado: fórmulas fechadas primeiro (fixam um
+# melhor AIC barato), depois Newton e por fim o Nelder-Mead da beta
+FIT_COST_ORDER = ['normal', 'lognormal', 'exponential', 'pareto', 'uniform', 'gamma', 'chi2', 'weibull', 'beta']
+
+class SampleMoments:
+    """
+    Mínimo, máximo, média, variância e assimetria da amostra, calculados uma vez.
+
+    Com amostra positiva, guarda também média e variância de log(x).
+    """
+
+    __slots__ = ('n', 'min', 'max', 'mean', 'variance', 'skewness', 'mean_log', 'variance_log')
+
+    def __init__(self, sorted_data):
+        self.n = len(sorted_data)
+        self.min = float(sorted_data[0])
+        self.max = float(sorted_data[-1])
+        self.mean = float(np.mean(sorted_data))
+        centered = sorted_data - self.mean
+        self.variance = float(np.mean(centered ** 2))
+        self.skewness = float(np.mean(centered ** 3) / self.variance ** 1.5) if self.variance > 0 else 0.0
+        self.mean_log = self.variance_log = None
+        if self.min > 0:
+            log_data = np.log(sorted_data)
+            self.mean_log = float(np.mean(log_data))
+            self.variance_log = float(np.var(log_data))
+
+def sample_moments(sample):
+    """Momentos da FitSample, calculados na primeira chamada e guardados na própria amostra"""
+    if sample.moments is None:
+        sample.moments = SampleMoments(sample.sorted)
+    return sample.moments
+
+def check_support(distribution_name, moments):
+    """
+    Compatibilidade entre a amostra e o suporte da candidata.
+
+    Returns:
+        tuple: (motivo da exclusão ou None, reescala (mínimo, amplitude) ou None).
+            A beta fora de (0, 1) é ajustada aos dados reescalados para [0, 1];
+            seu AIC fica em outra escala e não é comparável ao das demais.
+    """
+    if moments.variance == 0:
+        return 'amostra constante', None
+    support = SUPPORT.get(distribution_name, 'real')
+    if support == 'positive' and moments.min <= 0:
+        return f'suporte positivo, mínimo da amostra {moments.min:g}', None
+    if support == 'nonnegative' and moments.min < 0:
+        return f'suporte não negativo, mínimo da amostra {moments.min:g}', None
+    if support == 'unit' and (moments.min <= 0 or moments.max >= 1):
+        return None, (moments.min, moments.max - moments.min)
+    return None, None
+
+def select_candidates(distribution_names, moments):
+    """
+    Candidatas compatíveis com a amostra, descartadas com motivo e reescaladas.
+
+    Returns:
+        tuple: (candidatas na ordem recebida, {descartada: motivo}, [reescaladas])
+    """
+    candidates, excluded, rescaled = [], {}, []
+    for name in distribution_names:
+        reason, rescale = check_support(name, moments)
+        if reason is not None:
+            excluded[name] = reason
+            continue
+        candidates.append(name)
+        if rescale is not None:
+            rescaled.append(name)
+    return candidates, excluded, rescaled
+
+def aic_lower_bound(distribution_name, moments, n_params):
+    """
+    Piso do AIC de uma candidata calculado só com os momentos da amostra.
+
+    Para as fórmulas fechadas (normal, lognormal, exponencial, uniforme e Pareto,
+    com loc=0 onde o ajuste o fixa) o valor é o próprio AIC do ajuste de máxima
+    verossimilhança. Para gama e qui-quadrado (a mesma família com loc=0), a
+    cota de Stirling log Γ(a) ≥ (a - ½)·log a - a + ½·log 2π limita a
+    log-verossimilhança perfilada em a por n·[-média(log x) - ½ - ½·log(4π·s)],
+    com s = log(média) - média(log x). Weibull e beta não têm piso (-inf).
+    """
+    n = moments.n
+    log_likelihood = None
+    if distribution_name == 'normal':
+        log_likelihood = -n / 2 * (np.log(2 * np.pi * moments.variance) + 1)
+    elif distribution_name == 'uniform':
+        log_likelihood = -n * np.log(moments.max - moments.min)
+    elif moments.mean_log is not None:
+        if distribution_name == 'lognormal' and moments.variance_log > 0:
+            log_likelihood = -n * (moments.mean_log + 0.5 * np.log(2 * np.pi * moments.variance_log) + 0.5)
+        elif distribution_name == 'exponential':
+            log_likelihood = -n * (np.log(moments.mean) + 1)
+        elif distribution_name == 'pareto' and moments.mean_log > np.log(moments.min):
+            b = 1 / (moments.mean_log - np.log(moments.min))
+            log_likelihood = n * (np.log(b) + b * np.log(moments.min) - (b + 1) * moments.mean_log)
+        elif distribution_name in ('gamma', 'chi2'):
+            s = np.log(moments.mean) - moments.mean_log
+            if s > 0:
+                log_likelihood = -n * (moments.mean_log + 0.5 + 0.5 * np.log(4 * np.pi * s))
+    if log_likelihood is None or not np.isfinite(log_likelihood):
+        return -np.inf
+    return 2 * n_params - 2 * log_likelihood
@@ -0,0 +1,202 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+from olist_dataset import CSV_DIR, build_orders_summary, source_fingerprint
+from olist_profiling import profiled
+from shared_dataset import encode_column, decode_column
+
+# Diretório do armazenamento colunar do resumo por pedido
+COLUMN_STORE_DIR = os.getenv('OLIST_COLUMN_STORE', 'orders_summary_columns')
+STORE_VERSION = 2
+META_FILE = 'meta.json'
+
+# Textos com mais valores distintos que esta fração das linhas (p.ex. order_id, order_date)
+# são gravados como bytes de largura fixa em vez de códigos + dicionário JSON
+DICTIONARY_MAX_RATIO = float(os.getenv('OLIST_DICTIONARY_MAX_RATIO', '0.5'))
+
+# Módulos que definem o conteúdo do armazenamento: mudanças neles invalidam o armazenamento
+BUILD_CODE_FILES = ('olist_dataset.py', 'shared_dataset.py', 'column_store.py')
+
+def build_code_hash():
+    """Hash do código que constrói e codifica o resumo por pedido (ver BUILD_CODE_FILES)"""
+    digest = hashlib.sha256()
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in BUILD_CODE_FILES:
+        with open(os.path.join(base_dir, name), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def _is_wide_text(series):
+    """Texto sem valores ausentes e quase único, em que o dicionário seria do tamanho da coluna"""
+    if not (pd.api.types.is_string_dtype(series.dtype) or series.dtype == object) or series.isna().any():
+        return False
+    return len(series) > 0 and series.nunique() > DICTIONARY_MAX_RATIO * len(series)
+
+def _column_file(index, column):
+    safe = ''.join(char if char.isalnum() or char in '-_' else '_' for char in column)
+    return f'{index:03d}_{safe}.npy'
+
+@profiled()
+def write_column_store(df, store_dir=COLUMN_STORE_DIR, fingerprint=None):
+    """
+    Grava cada coluna do DataFrame como um arquivo .npy (array NumPy bruto).
+
+    Textos e categorias são gravados como códigos inteiros, com o dicionário em
+    um JSON ao lado; textos quase únicos (ver DICTIONARY_MAX_RATIO) como bytes
+    UTF-8 de largura fixa; datas como datetime64. A gravação vai para um diretório temporário
+    que substitui o anterior só no final, então leitores nunca veem um
+    armazenamento pela metade.
+
+    Args:
+        df (pd.DataFrame): Tabela a gravar (p.ex. orders_summary)
+        store_dir (str): Diretório de destino
+        fingerprint (dict): Impressão digital dos CSVs de origem (ver source_fingerprint)
+    """
+    temporary = f'{store_dir.rstrip(os.sep)}.tmp'
+    shutil.rmtree(temporary, ignore_errors=True)
+    os.makedirs(temporary)
+
+    columns = []
+    for index, column in enumerate(df.columns):
+        if _is_wide_text(df[column]):
+            array, meta = np.array(df[column].str.encode('utf-8').tolist(), dtype=np.bytes_), {'kind': 'bytes'}
+        else:
+            array, meta = encode_column(df[column])
+        if meta['kind'] == 'datetime':
+            array = array.view(meta['datetime_dtype'])  # .npy guarda datetime64 diretamente
+        file_name = _column_file(index, column)
+        np.save(os.path.join(temporary, file_name), np.ascontiguousarray(array), allow_pickle=False)
+        if meta['kind'] == 'category':
+            # Dicionário em arquivo próprio: abrir o armazenamento não lê os de colunas não usadas
+            meta['categories_file'] = file_name.replace('.npy', '.categories.json')
+            with open(os.path.join(temporary, meta['categories_file']), 'w', encoding='utf-8') as f:
+                json.dump(meta.pop('categories'), f, ensure_ascii=False)
+        columns.append({'name': column, 'file': file_name, 'dtype': array.dtype.str, **meta})
+
+    meta = {'version': STORE_VERSION, 'n_rows': len(df), 'fingerprint': fingerprint,
+            'code_hash': build_code_hash(), 'columns': columns}
+    with open(os.path.join(temporary, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    shutil.rmtree(store_dir, ignore_errors=True)
+    os.replace(temporary, store_dir)
+    return store_dir
+
+class ColumnStore:
+    """
+    Armazenamento colunar aberto via memória mapeada.
+
+    Abrir lê apenas meta.json; cada coluna é mapeada com np.load(mmap_mode='r')
+    (e seu dicionário lido, se for texto) no primeiro acesso, e o sistema operacional só carrega as páginas lidas.
+    Um script que usa duas colunas paga E/S apenas por essas duas.
+
+    Uso:
+        store = ColumnStore('orders_summary_columns')
+        df = store.frame(['customer_state', 'order_ticket'])
+    """
+
+    def __init__(self, store_dir=COLUMN_STORE_DIR):
+        self.store_dir = store_dir
+        with open(os.path.join(store_dir, META_FILE), encoding='utf-8') as f:
+            self.meta = json.load(f)
+        if self.meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Versão do armazenamento colunar incompatível em {store_dir}")
+        self._columns = {column['name']: column for column in self.meta['columns']}
+
+    @property
+    def columns(self):
+        return list(self._columns)
+
+    @property
+    def n_rows(self):
+        return self.meta['n_rows']
+
+    def __len__(self):
+        return self.n_rows
+
+    def __contains__(self, column):
+        return column in self._columns
+
+    def array(self, column):
+        """Array mapeado da coluna (códigos, para textos e categorias; bytes, para textos quase únicos)"""
+        if column not in self._columns:
+            raise KeyError(f"Coluna '{column}' não está no armazenamento {self.store_dir}")
+        return np.load(os.path.join(self.store_dir, self._columns[column]['file']), mmap_mode='r')
+
+    def column(self, column):
+        """
+        Coluna decodificada (Categorical para textos), ainda apoiada no arquivo mapeado;
+        textos quase únicos são decodificados do UTF-8 (cópia em memória)
+        """
+        meta = self._columns[column]
+        if meta['kind'] == 'bytes':
+            return pd.array(np.char.decode(self.array(column), 'utf-8'), dtype='str')
+        if meta['kind'] == 'category' and 'categories' not in meta:
+            with open(os.path.join(self.store_dir, meta['categories_file']), encoding='utf-8') as f:
+                meta['categories'] = json.load(f)
+        return decode_column(self.array(column), meta)
+
+    def frame(self, columns=None):
+        """DataFrame com as colunas pedidas (todas, se None), sem copiar os arrays"""
+        columns = self.columns if columns is None else columns
+        return pd.DataFrame({column: self.column(column) for column in columns}, copy=False)
+
+def store_is_fresh(store_dir=COLUMN_STORE_DIR, csv_dir=CSV_DIR):
+    """O armazenamento existe e foi gerado a partir dos CSVs atuais, pelo código atual?"""
+    try:
+        store = ColumnStore(store_dir)
+    except (OSError, ValueError):
+        return False
+    return (store.meta.get('code_hash') == build_code_hash()
+            and store.meta['fingerprint'] == source_fingerprint(csv_dir))
+
+def load_orders_columns(columns=None, csv_dir=CSV_DIR, store_dir=COLUMN_STORE_DIR):
+    """
+    Colunas do resumo por pedido a partir do armazenamento colunar.
+
+    O armazenamento é reconstruído (a partir dos CSVs) apenas quando não existe,
+    quando algum CSV de origem mudou desde a gravação ou quando o código de
+    construção mudou (build_code_hash).
+
+    Returns:
+        pd.DataFrame: Colunas pedidas, mapeadas do disco
+    """
+    if not store_is_fresh(store_dir, csv_dir):
+        print(f"Armazenamento colunar ausente ou desatualizado; gerando {store_dir}...")
+        fingerprint = source_fingerprint(csv_dir)
+        write_column_store(build_orders_summary(csv_dir, sample=0), store_dir, fingerprint)
+    return ColumnStore(store_dir).frame(columns)
+
+def main():
+    """Gera o armazenamento colunar e compara o tempo de abertura com a construção a partir dos CSVs"""
+    csv_dir = sys.argv[1] if len(sys.argv) > 1 else CSV_DIR
+    store_dir = sys.argv[2] if len(sys.argv) > 2 else COLUMN_STORE_DIR
+
+    print("=== ARMAZENAMENTO COLUNAR DO RESUMO POR PEDIDO ===")
+    start = time.perf_counter()
+    orders_summary = build_orders_summary(csv_dir, sample=0)
+    build_seconds = time.perf_counter() - start
+    write_column_store(orders_summary, store_dir, source_fingerprint(csv_dir))
+
+    store = ColumnStore(store_dir)
+    sizes = {column: os.path.getsize(os.path.join(store_dir, store._columns[column]['file']))
+             for column in store.columns}
+    print(f"\n{store_dir}: {store.n_rows:,} linhas, {len(store.columns)} colunas, "
+          f"{sum(sizes.values()) / 1024 ** 2:.1f} MB")
+    for column, size in sizes.items():
+        print(f"   • {column:<22} {store._columns[column]['kind']:<9} {size / 1024:10.1f} KB")
+
+    start = time.perf_counter()
+    df = ColumnStore(store_dir).frame(['customer_state', 'order_ticket'])
+    means = df.groupby('customer_state', observed=True)['order_ticket'].mean()
+    open_seconds = time.perf_counter() - start
+    print(f"\nConstrução a partir dos CSVs: {build_seconds:.2f}s | abertura + 2 colunas + média por UF: "
+          f"{open_seconds * 1000:.1f} ms ({len(means)} UFs)")
+
+if __name__ == "__main__":
+    main()
@@ -1,41 +1,63 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from scipy.stats import chi2_contingency, normaltest, jarque_bera
 import os
 import warnings
-from matplotlib.gridspec import GridSpec
-from matplotlib.patches import Rectangle
-import matplotlib.patches as mpatches
 from collections import Counter
+from olist_dataset import CSV_DIR, SOURCE_FILES, read_sources, plan_orders_summary, build_orders_summary_chunked
+from memory_budget import MEMORY_BUDGET, peak_rss_bytes, log_plan, log_peak
+from olist_profiling import profiled
+from lazy_imports import lazy_module, lazy_attribute, lazy_attributes
 warnings.filterwarnings('ignore')
 
-# Configuração do matplotlib para melhor visualização
-plt.rcParams['figure.figsize'] = (16, 12)
-plt.rcParams['font.size'] = 9
-plt.rcParams['axes.titlesize'] = 10
-plt.rcParams['axes.labelsize'] = 9
-plt.rcParams['xtick.labelsize'] = 8
-plt.rcParams['ytick.labelsize'] = 8
+def _plot_style(pyplot):
+    """Configuração do matplotlib para melhor visualização (aplicada na primeira figura)"""
+    pyplot.rcParams['figure.figsize'] = (16, 12)
+    pyplot.rcParams['font.size'] = 9
+    pyplot.rcParams['axes.titlesize'] = 10
+    pyplot.rcParams['axes.labelsize'] = 9
+    pyplot.rcParams['xtick.labelsize'] = 8
+    pyplot.rcParams['ytick.labelsize'] = 8
 
-def load_and_prepare_comprehensive_data():
+# Bibliotecas de gráficos e estatística carregadas no primeiro uso
+plt = lazy_module('matplotlib.pyplot', on_load=_plot_style)
+sns = lazy_module('seaborn')
+stats = lazy_module('scipy.stats')
+chi2_contingency, normaltest, jarque_bera = lazy_attributes(stats, 'chi2_contingency', 'normaltest', 'jarque_bera')
+GridSpec = lazy_attribute('matplotlib.gridspec', 'GridSpec')
+
+@profiled()
+def load_and_prepare_comprehensive_data(csv_dir=CSV_DIR):
     """
     Carrega e prepara dados com análise de qualidade e tratamento de vulnerabilidades.
     
+    Args:
+        csv_dir (str): Diretório com os CSVs da Olist
+    
     Returns:
         tuple: (DataFrame principal, dict com estatísticas de qualidade)
     """
     print("=== CARREGAMENTO E ANÁLISE DE QUALIDADE DOS DADOS ===")
     
+    # Plano de memória: acima do orçamento (OLIST_MEMORY_BUDGET) o merge é feito por partições;
+    # sem orçamento o merge é sempre em memória e não há plano
+    plan = plan_orders_summary(csv_dir, include_payments=False) if MEMORY_BUDGET is not None else None
+    if plan:
+        log_plan(plan, 'merge do comprehensive_analysis')
+    rss_before = peak_rss_bytes()
+    if plan and plan['mode'] != 'memory':
+        orders_summary, quality_stats = load_comprehensive_data_partitioned(csv_dir, plan)
+        print_final_distribution(orders_summary)
+        log_peak(plan, 'merge do comprehensive_analysis', rss_before)
+        return orders_summary, quality_stats
+    
     # Carregar todos os datasets necessários
     print("Carregando datasets...")
-    items_df = pd.read_csv('olist-csv/olist_order_items_dataset.csv')
-    products_df = pd.read_csv('olist-csv/olist_products_dataset.csv')
-    translation_df = pd.read_csv('olist-csv/product_category_name_translation.csv')
-    orders_df = pd.read_csv('olist-csv/olist_orders_dataset.csv')
-    customers_df = pd.read_csv('olist-csv/olist_customers_dataset.csv')
+    sources = read_sources(csv_dir, include_payments=False)
+    items_df = sources['items']
+    products_df = sources['products']
+    translation_df = sources['translation']
+    orders_df = sources['orders']
+    customers_df = sources['customers']
     
     quality_stats = {}
     
@@ -135,7 +157,64 @@ def load_and_prepare_comprehensive_data():
     quality_stats['final_orders'] = len(orders_summary)
     print(f"   • Pedidos únicos finais: {quality_stats['final_orders']}")
     
-    # 5. ANÁLISE DE DISTRIBUIÇÃO FINAL
+    print_final_distribution(orders_summary)
+    if plan:
+        log_peak(plan, 'merge do comprehensive_analysis', rss_before)
+    return orders_summary, quality_stats
+
+def load_comprehensive_data_partitioned(csv_dir, plan):
+    """
+    Mesmo resultado de load_and_prepare_comprehensive_data sem carregar as tabelas inteiras.
+
+    Itens, pedidos e clientes são particionados em disco e juntados/agregados por
+    partição (build_orders_summary_chunked); as contagens de cada etapa de qualidade
+    são somadas entre partições. Pedidos e clientes são apenas contados, em blocos.
+    
+    Returns:
+        tuple: (DataFrame principal, dict com estatísticas de qualidade)
+    """
+    def count_rows(name):
+        reader = pd.read_csv(os.path.join(csv_dir, SOURCE_FILES[name]), usecols=[0], chunksize=plan['chunksize'])
+        return sum(len(chunk) for chunk in reader)
+    
+    products_df = pd.read_csv(os.path.join(csv_dir, SOURCE_FILES['products']), usecols=['product_id', 'product_category_name'])
+    orders_summary, counts = build_orders_summary_chunked(
+        csv_dir, include_payments=False, n_partitions=plan['n_partitions'], n_workers=plan['n_workers'],
+        chunksize=plan['chunksize'], return_counts=True
+    )
+    
+    quality_stats = {
+        'items_total': counts['items_total'],
+        'orders_total': count_rows('orders'),
+        'customers_total': count_rows('customers'),
+        'products_total': len(products_df),
+        'items_missing_product': counts['items_missing_product'],
+        'items_missing_price': counts['items_missing_price'],
+        'products_missing_category': products_df['product_category_name'].isna().sum(),
+        'items_after_product_merge': counts['merged_records'],
+        'items_lost_in_product_merge': counts['items_total'] - counts['merged_records'],
+        'final_records': counts['merged_records'],
+        'delivered_orders': counts['delivered'],
+        'after_critical_na_removal': counts['complete'],
+        'after_price_filters': counts['valid_price'],
+        'final_orders': len(orders_summary)
+    }
+    
+    print("\n1. ANÁLISE DE QUALIDADE DOS DADOS (particionada)")
+    print(f"   • Itens sem produto ID: {quality_stats['items_missing_product']}")
+    print(f"   • Itens sem preço: {quality_stats['items_missing_price']}")
+    print(f"   • Produtos sem categoria: {quality_stats['products_missing_category']}")
+    print(f"   • Registros após merge completo: {quality_stats['final_records']}")
+    print(f"   • Registros após filtro de pedidos entregues: {quality_stats['delivered_orders']}")
+    print(f"   • Registros após remoção de NAs críticos: {quality_stats['after_critical_na_removal']}")
+    print(f"   • Registros após filtros de preço: {quality_stats['after_price_filters']}")
+    print(f"   • Pedidos únicos finais: {quality_stats['final_orders']}")
+    
+    columns = ['order_id', 'customer_state', 'order_ticket', 'freight_value', 'n_items', 'product_category', 'freight_ratio']
+    return orders_summary[columns], quality_stats
+
+def print_final_distribution(orders_summary):
+    """Resumo final de estados e categorias do dataset preparado"""
     print("\n5. ANÁLISE DE DISTRIBUIÇÃO FINAL")
     print(f"   • Estados únicos: {orders_summary['customer_state'].nunique()}")
     print(f"   • Categorias únicas: {orders_summary['product_category'].nunique()}")
@@ -150,9 +229,8 @@ def load_and_prepare_comprehensive_data():
     print("   • Top 5 categorias:")
     for cat, count in top_categories.items():
         print(f"     {cat}: {count} pedidos ({count/len(orders_summary)*100:.1f}%)")
-    
-    return orders_summary, quality_stats
 
+@profiled()
 def identify_analysis_strategy(df):
     """
     Identifica estratégia de análise baseada na distribuição dos dados.
@@ -203,6 +281,7 @@ def identify_analysis_strategy(df):
     
     return strategy
 
+@profiled()
 def analyze_discrete_variable(data, variable_name, max_categories=15):
     """
     Análise específica para variáveis discretas com distribuições apropriadas.
@@ -247,6 +326,7 @@ def analyze_discrete_variable(data, variable_name, max_categories=15):
     
     return results
 
+@profiled()
 def create_discrete_distribution_plot(data, variable_name, title=""):
     """
     Cria gráfico apropriado para variável discreta.
@@ -289,6 +369,7 @@ def create_discrete_distribution_plot(data, variable_name, title=""):
     plt.tight_layout()
     return fig, analysis
 
+@profiled()
 def comprehensive_variable_analysis(df, variable, category_col, state_col, variable_type='continuous'):
     """
     Análise abrangente de uma variável por categoria e estado.
@@ -325,6 +406,7 @@ def comprehensive_variable_analysis(df, variable, category_col, state_col, varia
             
         create_state_composite_analysis(state_data, variable, category_col, state, variable_type)
 
+@profiled()
 def create_state_composite_analysis(state_data, variable, category_col, state_name, variable_type):
     """
     Cria análise composta para um estado específico com subimagens por categoria.
@@ -427,6 +509,7 @@ def create_state_composite_analysis(state_data, variable, category_col, state_na
     
     print(f"   → Análise composta salva: {filename}")
 
+@profiled()
 def generate_comprehensive_report(df, quality_stats, strategy):
     """
     Gera relatório abrangente da análise.
@@ -0,0 +1,260 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import json
+import time
+import hashlib
+
+# Índice de metadados: perfis por hash do arquivo e cache de (tamanho, mtime) → hash por caminho
+# (por padrão ao lado deste módulo, qualquer que seja o diretório de trabalho)
+script_dir = os.path.dirname(os.path.abspath(__file__))
+CATALOG_PATH = os.getenv('OLIST_CATALOG_PATH', os.path.join(script_dir, 'olist_catalog.json'))
+CATALOG_VERSION = 1
+
+# Linhas por bloco na varredura e linhas guardadas como prévia
+SCAN_CHUNK_SIZE = 200000
+PREVIEW_ROWS = 5
+
+# Precisão do HyperLogLog (2^14 registradores, erro padrão ~0,8%)
+HLL_PRECISION = 14
+
+# Valores acompanhados por coluna para os mais frequentes (contagem exata abaixo disso)
+TOP_CAPACITY = 1000
+TOP_VALUES = 10
+
+def file_hash(path, block_size=1 << 20):
+    """Hash BLAKE2b do conteúdo do arquivo"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _bit_length(values):
+    """Número de bits significativos de cada uint64 (0 para zero)"""
+    high = (values >> np.uint64(32)).astype(np.float64)
+    low = (values & np.uint64(0xFFFFFFFF)).astype(np.float64)
+    with np.errstate(divide='ignore'):
+        bits_high = np.where(high > 0, np.floor(np.log2(np.maximum(high, 1))) + 33, 0)
+        bits_low = np.where(low > 0, np.floor(np.log2(np.maximum(low, 1))) + 1, 0)
+    return np.where(high > 0, bits_high, bits_low).astype(np.int64)
+
+class HyperLogLog:
+    """Contagem aproximada de valores distintos em memória constante (mesclável entre blocos)"""
+
+    def __init__(self, precision=HLL_PRECISION):
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if len(hashes) == 0:
+            return
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.int64)
+        remainder = hashes << p
+        rank = np.where(remainder > 0, 64 - _bit_length(remainder) + 1, 64 - self.precision + 1)
+        np.maximum.at(self.registers, index, rank.astype(np.uint8))
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            estimate = m * np.log(m / zeros)  # correção para cardinalidades pequenas
+        return int(round(estimate))
+
+class _ColumnProfile:
+    """Acumula o perfil de uma coluna ao longo dos blocos"""
+
+    def __init__(self):
+        self.dtypes = set()
+        self.nulls = 0
+        self.count = 0
+        self.hll = HyperLogLog()
+        self.top = pd.Series(dtype=np.float64)
+        self.truncated = False
+        self.numeric = True
+        self.minimum = None
+        self.maximum = None
+        self.total = 0.0
+
+    def update(self, series):
+        self.dtypes.add(str(series.dtype))
+        values = series.dropna()
+        self.nulls += len(series) - len(values)
+        self.count += len(values)
+        if len(values) == 0:
+            return
+
+        # Números sempre como float64 e textos como str: o mesmo valor tem o mesmo hash em qualquer bloco
+        is_numeric = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+        self.numeric = self.numeric and is_numeric
+        values = values.astype(np.float64) if is_numeric else values.astype(str)
+        self.hll.update(pd.util.hash_pandas_object(values, index=False).to_numpy())
+
+        self.top = self.top.add(values.value_counts(), fill_value=0)
+        if len(self.top) > TOP_CAPACITY:
+            self.top = self.top.nlargest(TOP_CAPACITY)
+            self.truncated = True
+
+        if is_numeric:
+            self.minimum = values.min() if self.minimum is None else min(self.minimum, values.min())
+            self.maximum = values.max() if self.maximum is None else max(self.maximum, values.max())
+            self.total += values.sum()
+
+    def result(self):
+        dtype = next(iter(self.dtypes)) if len(self.dtypes) == 1 else ('float64' if self.numeric else 'object')
+        top = self.top.sort_values(ascending=False, kind='stable').head(TOP_VALUES)
+        # Inteiros são contados como float64 (blocos com nulos viram float); voltam a int aqui
+        convert = int if all(d.startswith(('int', 'uint')) for d in self.dtypes | {dtype}) else _native
+        profile = {
+            'dtype': dtype,
+            'nulls': int(self.nulls),
+            # Abaixo da capacidade o conjunto de valores é exato; acima, HyperLogLog
+            'distinct': len(self.top) if not self.truncated else self.hll.count(),
+            'distinct_exact': not self.truncated,
+            'top_values': [[convert(value), int(count)] for value, count in top.items()]
+        }
+        if not self.truncated:
+            profile['values'] = sorted(convert(value) for value in self.top.index)
+        if self.numeric and self.count > 0:
+            profile.update({'min': convert(self.minimum), 'max': convert(self.maximum),
+                            'mean': self.total / self.count})
+        return profile
+
+def _native(value):
+    return value.item() if hasattr(value, 'item') else value
+
+def scan_file(path, chunksize=SCAN_CHUNK_SIZE):
+    """
+    Varre um CSV uma única vez, em blocos, e devolve seu perfil.
+
+    Returns:
+        dict: rows, columns (dtype, nulos, distintos, mais frequentes, min/max/média) e preview
+    """
+    columns = {}
+    rows = 0
+    preview = None
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        if preview is None:
+            preview = chunk.head(PREVIEW_ROWS)
+        rows += len(chunk)
+        for column in chunk.columns:
+            columns.setdefault(column, _ColumnProfile()).update(chunk[column])
+
+    return {
+        'rows': rows,
+        'columns': {column: profile.result() for column, profile in columns.items()},
+        'preview': json.loads(preview.to_json(orient='split', index=False)) if preview is not None else None
+    }
+
+def load_catalog(catalog_path=CATALOG_PATH):
+    if os.path.exists(catalog_path):
+        with open(catalog_path, encoding='utf-8') as f:
+            catalog = json.load(f)
+        if catalog.get('version') == CATALOG_VERSION:
+            return catalog
+    return {'version': CATALOG_VERSION, 'files': {}, 'profiles': {}}
+
+def save_catalog(catalog, catalog_path=CATALOG_PATH):
+    temporary = f'{catalog_path}.tmp'
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(catalog, f, ensure_ascii=False)
+    os.replace(temporary, catalog_path)
+
+def file_profile(path, catalog=None, catalog_path=CATALOG_PATH, force=False):
+    """
+    Perfil de um arquivo a partir do catálogo, varrendo-o só se tiver mudado.
+
+    Tamanho e mtime iguais aos registrados dispensam até o hash; se mudaram, o hash
+    é recalculado e o perfil só é refeito quando o conteúdo de fato mudou.
+
+    Returns:
+        dict: Perfil do arquivo (ver scan_file)
+    """
+    own_catalog = catalog is None
+    catalog = load_catalog(catalog_path) if own_catalog else catalog
+
+    key = os.path.abspath(path)
+    stat = os.stat(path)
+    entry = catalog['files'].get(key)
+    if entry and not force and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime \
+            and entry['hash'] in catalog['profiles']:
+        return catalog['profiles'][entry['hash']]
+
+    digest = file_hash(path)
+    if force or digest not in catalog['profiles']:
+        start = time.perf_counter()
+        profile = scan_file(path)
+        profile['scan_seconds'] = time.perf_counter() - start
+        catalog['profiles'][digest] = profile
+        print(f"Catálogo: {os.path.basename(path)} varrido em {profile['scan_seconds']:.2f}s "
+              f"({profile['rows']:,} linhas)")
+    catalog['files'][key] = {'hash': digest, 'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    if own_catalog:
+        save_catalog(catalog, catalog_path)
+    return catalog['profiles'][digest]
+
+def update_catalog(csv_dir, file_names=None, catalog_path=CATALOG_PATH, force=False):
+    """
+    Atualiza o catálogo com os CSVs do diretório (todos ou os informados).
+
+    Returns:
+        dict: Nome do arquivo → perfil
+    """
+    file_names = file_names or sorted(f for f in os.listdir(csv_dir) if f.endswith('.csv'))
+    catalog = load_catalog(catalog_path)
+    profiles = {name: file_profile(os.path.join(csv_dir, name), catalog, force=force) for name in file_names}
+    save_catalog(catalog, catalog_path)
+    return profiles
+
+def preview_frame(profile):
+    """Primeiras linhas do arquivo guardadas no catálogo, como DataFrame"""
+    preview = profile['preview']
+    return pd.DataFrame(preview['data'], columns=preview['columns'])
+
+def distinct_values(profile, column):
+    """Valores distintos de uma coluna (exatos quando a coluna tem até TOP_CAPACITY valores)"""
+    info = profile['columns'][column]
+    if 'values' not in info:
+        raise ValueError(f"Coluna '{column}' tem ~{info['distinct']:,} valores distintos; "
+                         f"o catálogo guarda a lista só até {TOP_CAPACITY}")
+    return info['values']
+
+def catalog_summary(profiles):
+    """Tabela com uma linha por (arquivo, coluna)"""
+    rows = []
+    for name, profile in profiles.items():
+        for column, info in profile['columns'].items():
+            top = info['top_values'][0] if info['top_values'] else [None, 0]
+            rows.append({
+                'file': name,
+                'column': column,
+                'dtype': info['dtype'],
+                'rows': profile['rows'],
+                'nulls': info['nulls'],
+                'distinct': f"{info['distinct']:,}" + ('' if info['distinct_exact'] else ' (aprox.)'),
+                'top_value': top[0],
+                'top_count': top[1]
+            })
+    return pd.DataFrame(rows)
+
+def main():
+    """Atualiza e exibe o catálogo de um diretório de CSVs (padrão: olist-csv)"""
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    csv_dir = args[0] if args else 'olist-csv'
+
+    print(f"=== CATÁLOGO DE DADOS: {csv_dir} ===")
+    profiles = update_catalog(csv_dir, force='--force' in sys.argv)
+
+    pd.set_option('display.width', 200)
+    pd.set_option('display.max_colwidth', 40)
+    print(catalog_summary(profiles).to_string(index=False))
+    print(f"\nCatálogo salvo em {CATALOG_PATH}")
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,37 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
 import os
 import warnings
+from olist_profiling import profiled
+from lazy_imports import lazy_module
+from fit_cache import data_fingerprint, open_fit_cache, log_cache_stats
+from streaming_summary import update_segment_summaries
 warnings.filterwarnings('ignore')
 
-# Configuração do matplotlib para melhor visualização
-plt.rcParams['figure.figsize'] = (12, 8)
-plt.rcParams['font.size'] = 10
+def _plot_style(pyplot):
+    """Configuração do matplotlib para melhor visualização (aplicada na primeira figura)"""
+    pyplot.rcParams['figure.figsize'] = (12, 8)
+    pyplot.rcParams['font.size'] = 10
 
+# Bibliotecas de gráficos e estatística carregadas no primeiro uso
+plt = lazy_module('matplotlib.pyplot', on_load=_plot_style)
+sns = lazy_module('seaborn')
+stats = lazy_module('scipy.stats')
+
+# Cache em disco dos ajustes e do teste de Anderson-Darling (None com OLIST_FIT_CACHE='')
+fit_cache = open_fit_cache()
+
+def _cached(values, kind, name, compute):
+    """compute() passando pelo cache de ajustes, chaveado pelos dados"""
+    if fit_cache is None:
+        return compute()
+    return fit_cache.cached(data_fingerprint(values), kind, name, compute)
+
+def _anderson(values):
+    result = stats.anderson(values)
+    return result.statistic, result.critical_values, result.significance_level
+
+@profiled()
 def load_and_prepare_data():
     """
     Carrega e prepara os dados agregando por order_id e incluindo categoria de produto.
@@ -106,7 +127,8 @@ def anderson_darling_interpretation(statistic, critical_values, significance_lev
     
     return "\n".join(interpretation)
 
-def graphical_summary_by_category(data, variable_name, category, output_dir='charts'):
+@profiled()
+def graphical_summary_by_category(data, variable_name, category, output_dir='charts', desc_stats=None):
     """
     Gera análise descritiva completa para uma variável em uma categoria específica.
     
@@ -115,6 +137,8 @@ def graphical_summary_by_category(data, variable_name, category, output_dir='cha
         variable_name (str): Nome da variável
         category (str): Nome da categoria
         output_dir (str): Diretório de saída
+        desc_stats (dict): Estatísticas descritivas já calculadas (SummaryStatistics.describe);
+            None calcula com data.describe()
     
     Returns:
         str: Markdown com a análise
@@ -126,15 +150,20 @@ def graphical_summary_by_category(data, variable_name, category, output_dir='cha
     os.makedirs(output_dir, exist_ok=True)
     
     # Estatísticas descritivas
-    desc_stats = data.describe()
+    if desc_stats is None:
+        desc_stats = data.describe()
+    
+    data_clean = data.dropna()
+    values = data_clean.to_numpy(dtype=np.float64)
     
     # Teste de normalidade Anderson-Darling
     try:
-        anderson_result = stats.anderson(data.dropna())
+        statistic, critical_values, significance_level = _cached(values, 'descriptive_anderson', 'norm',
+                                                                 lambda: _anderson(values))
         anderson_interpretation = anderson_darling_interpretation(
-            anderson_result.statistic, 
-            anderson_result.critical_values, 
-            anderson_result.significance_level
+            statistic, 
+            critical_values, 
+            significance_level
         )
     except:
         anderson_interpretation = "Erro no cálculo do teste Anderson-Darling"
@@ -152,7 +181,6 @@ def graphical_summary_by_category(data, variable_name, category, output_dir='cha
     best_fit_sse = np.inf
     best_fit_params = None
     
-    data_clean = data.dropna()
     sorted_data = np.sort(data_clean)
     y_ecdf = np.arange(1, len(sorted_data) + 1) / len(sorted_data)
     
@@ -161,7 +189,7 @@ def graphical_summary_by_category(data, variable_name, category, output_dir='cha
             if dist_name == 'Log-Normal' and (data_clean <= 0).any():
                 continue  # Log-normal não funciona com valores <= 0
             
-            params = distribution.fit(data_clean)
+            params = _cached(values, 'descriptive_fit', dist_name, lambda: distribution.fit(data_clean))
             cdf_fitted = distribution.cdf(sorted_data, *params)
             sse = np.sum((y_ecdf - cdf_fitted) ** 2)
             
@@ -278,6 +306,7 @@ SSE: {best_fit_sse:.4f}
     
     return markdown_output
 
+@profiled()
 def analyze_variable_by_category(data, variable_column, variable_display_name, top_n_categories=10):
     """
     Analisa uma variável para as top N categorias de produto.
@@ -299,9 +328,15 @@ def analyze_variable_by_category(data, variable_column, variable_display_name, t
     markdown_results.append(f"*Análise desagregada pelas {top_n_categories} categorias de produto com maior volume de pedidos*")
     markdown_results.append("")
     
+    # Tabela descritiva de todas as categorias em uma passada agrupada (momentos exatos, quartis do t-digest)
+    top_rows = data[data['product_category'].isin(top_categories)]
+    summaries = update_segment_summaries({}, top_rows, 'product_category', variable_column)
+    
     for category in top_categories:
         category_data = data[data['product_category'] == category][variable_column]
-        analysis = graphical_summary_by_category(category_data, variable_display_name, category)
+        summary = summaries.get(category)
+        analysis = graphical_summary_by_category(category_data, variable_display_name, category,
+                                                 desc_stats=summary.describe() if summary is not None else None)
         markdown_results.append(analysis)
     
     return "\n".join(markdown_results)
@@ -349,6 +384,7 @@ def main():
     print(f"- Relatório completo salvo em: analise_por_categoria.md")
     print(f"- Total de pedidos analisados: {len(data):,}")
     print(f"- Categorias analisadas: 8 (das {data['product_category'].nunique()} disponíveis)")
+    log_cache_stats(fit_cache)
 
 if __name__ == '__main__':
     main() 
\ No newline at end of file
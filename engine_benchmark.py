@@ -0,0 +1,77 @@
+import pandas as pd
+import sys
+import time
+import warnings
+from olist_dataset import CSV_DIR, available_engines, build_orders_summary
+warnings.filterwarnings('ignore')
+
+def check_engine_parity(reference, candidate, engine_name):
+    """
+    Verifica se o resumo produzido por um motor é idêntico ao do pandas.
+
+    Compara colunas, ordem das linhas e valores (floats com tolerância relativa de 1e-9,
+    pois a ordem de soma pode variar entre motores multi-thread).
+
+    Raises:
+        AssertionError: Se houver qualquer diferença
+    """
+    try:
+        pd.testing.assert_frame_equal(reference, candidate, check_dtype=False, rtol=1e-9, atol=0)
+    except AssertionError as e:
+        raise AssertionError(f"Motor '{engine_name}' diverge do pandas: {e}") from e
+
+def benchmark_engines(csv_dirs, repeats=3, include_payments=True):
+    """
+    Mede o tempo de construção do resumo por pedido em cada motor disponível.
+
+    Args:
+        csv_dirs (list): Diretórios de dados (um por escala)
+        repeats (int): Repetições por motor (reporta a melhor e a mediana)
+        include_payments (bool): Incluir agregados de pagamento
+
+    Returns:
+        pd.DataFrame: Uma linha por (diretório, motor) com tempos e paridade
+    """
+    rows = []
+    for csv_dir in csv_dirs:
+        reference = None
+        for engine in available_engines():
+            timings = []
+            for _ in range(repeats):
+                start = time.perf_counter()
+                orders_summary = build_orders_summary(csv_dir, include_payments, mode='memory', engine=engine, sample=0)
+                timings.append(time.perf_counter() - start)
+
+            if reference is None:
+                reference = orders_summary
+            check_engine_parity(reference, orders_summary, engine)
+
+            rows.append({
+                'data': csv_dir,
+                'engine': engine,
+                'orders': len(orders_summary),
+                'best_s': min(timings),
+                'median_s': pd.Series(timings).median(),
+                'parity': 'OK'
+            })
+            print(f"{csv_dir} | {engine}: melhor {min(timings):.3f}s ({len(orders_summary):,} pedidos) → paridade OK")
+
+    results = pd.DataFrame(rows)
+    pandas_best = results[results['engine'] == 'pandas'].set_index('data')['best_s']
+    results['speedup'] = results['data'].map(pandas_best) / results['best_s']
+    return results
+
+def main():
+    """Compara os motores nos diretórios informados (padrão: olist-csv)"""
+    csv_dirs = sys.argv[1:] or [CSV_DIR]
+
+    print("=== COMPARAÇÃO DE MOTORES DE EXECUÇÃO ===")
+    print(f"Motores disponíveis: {', '.join(available_engines())}")
+
+    results = benchmark_engines(csv_dirs)
+
+    print("\nRESULTADOS:")
+    print(results.round(3).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,427 @@
+import pandas as pd
+import numpy as np
+import io
+import re
+import sys
+import argparse
+import contextlib
+import warnings
+from collections import OrderedDict
+from itertools import combinations
+from scipy import stats
+from scipy.stats import mannwhitneyu, shapiro, normaltest
+from olist_dataset import available_engines, build_orders_summary, plan_orders_summary
+from synthetic_olist import synthetic_data_dir
+from olist_sampling import SAMPLE_SEED
+from advanced_distribution_analysis import (AdvancedDistributionAnalyzer, BATCH_NORMALITY_TESTS,
+                                            segment_normality_tests, _segment_data)
+import comprehensive_analysis
+import pairwise_comparisons
+import statistical_questions_analysis
+warnings.filterwarnings('ignore')
+
+# Dados sintéticos usados na verificação (escala e semente fixas); a escala 0.2 (~19 mil
+# pedidos) passa de SHAPIRO_MAX_SIZE e exercita a subamostra do Shapiro-Wilk
+HARNESS_SCALE = 0.2
+HARNESS_SEED = 42
+
+# Tolerâncias declaradas (relativa, absoluta) por tipo de resultado
+TOLERANCES = {
+    'exact': (0.0, 0.0),
+    'summary': (1e-9, 0.0),       # somas em ordens diferentes
+    'statistic': (1e-7, 1e-12),   # estatísticas de teste e p-values
+    'fit': (1e-4, 1e-8)           # parâmetros estimados por otimização numérica
+}
+
+# Verificações registradas: nome → (função que devolve (referência, candidato), tolerância)
+EQUIVALENCE_CHECKS = OrderedDict()
+
+def equivalence_check(name, tolerance='statistic'):
+    """Registra uma verificação; a função recebe o contexto e devolve (referência, candidato)"""
+    def decorator(func):
+        EQUIVALENCE_CHECKS[name] = (func, tolerance)
+        return func
+    return decorator
+
+def compare_values(reference, candidate, rtol, atol, path='resultado'):
+    """
+    Compara recursivamente dois resultados (dicts, listas, tuplas, DataFrames, arrays e escalares).
+
+    Strings, booleanos e ordem de listas (rankings) devem ser idênticos; números
+    são comparados com as tolerâncias, e NaN é igual a NaN.
+
+    Returns:
+        list: Descrição de cada divergência encontrada (vazia se equivalentes)
+    """
+    if isinstance(reference, pd.DataFrame) or isinstance(reference, pd.Series):
+        try:
+            assert_equal = (pd.testing.assert_frame_equal if isinstance(reference, pd.DataFrame)
+                            else pd.testing.assert_series_equal)
+            assert_equal(reference, candidate, check_dtype=False, rtol=max(rtol, 1e-15), atol=atol)
+        except AssertionError as e:
+            return [f"{path}: {str(e).splitlines()[0]}"]
+        return []
+
+    if isinstance(reference, dict):
+        if not isinstance(candidate, dict) or set(reference) != set(candidate):
+            return [f"{path}: chaves diferentes ({sorted(map(str, reference))} vs "
+                    f"{sorted(map(str, candidate)) if isinstance(candidate, dict) else type(candidate).__name__})"]
+        drifts = []
+        for key in reference:
+            drifts.extend(compare_values(reference[key], candidate[key], rtol, atol, f"{path}[{key!r}]"))
+        return drifts
+
+    if isinstance(reference, (list, tuple)):
+        if not isinstance(candidate, (list, tuple)) or len(reference) != len(candidate):
+            return [f"{path}: tamanhos diferentes ({reference} vs {candidate})"]
+        drifts = []
+        for i, (ref, cand) in enumerate(zip(reference, candidate)):
+            drifts.extend(compare_values(ref, cand, rtol, atol, f"{path}[{i}]"))
+        return drifts
+
+    if reference is None or candidate is None:
+        return [] if reference is candidate else [f"{path}: {reference!r} vs {candidate!r}"]
+
+    if isinstance(reference, (str, bool, np.bool_)):
+        return [] if reference == candidate else [f"{path}: {reference!r} vs {candidate!r}"]
+
+    ref = np.asarray(reference, dtype=float)
+    cand = np.asarray(candidate, dtype=float)
+    if ref.shape != cand.shape:
+        return [f"{path}: formatos diferentes {ref.shape} vs {cand.shape}"]
+    if not np.allclose(cand, ref, rtol=rtol, atol=atol, equal_nan=True):
+        drift = np.nanmax(np.abs(cand - ref) / np.maximum(np.abs(ref), 1e-300))
+        return [f"{path}: {reference!r} vs {candidate!r} (desvio relativo {drift:.3g})"]
+    return []
+
+# ---------------------------------------------------------------------------
+# Implementações de referência (congeladas): reproduzem os números publicados
+# ---------------------------------------------------------------------------
+
+def reference_fit_distribution(data, distribution_name):
+    """Ajuste de referência: dist.fit genérico do scipy, como no relatório publicado"""
+    analyzer = AdvancedDistributionAnalyzer()
+    dist = analyzer.distributions[distribution_name]
+    positive_only = ['lognormal', 'exponential', 'gamma', 'weibull', 'pareto']
+
+    try:
+        if distribution_name in positive_only:
+            if np.any(data <= 0):
+                return None
+            fit_data, params = data, dist.fit(data, floc=0)
+        elif distribution_name == 'chi2':
+            if np.any(data < 0):
+                return None
+            fit_data, params = data, dist.fit(data, floc=0)
+        elif distribution_name == 'beta' and (np.any(data <= 0) or np.any(data >= 1)):
+            fit_data = np.clip((data - data.min()) / (data.max() - data.min()), 1e-6, 1 - 1e-6)
+            params = dist.fit(fit_data)
+        else:
+            fit_data, params = data, dist.fit(data)
+
+        log_likelihood = np.sum(dist.logpdf(fit_data, *params))
+        k = len(params)
+        ks_statistic, ks_p_value = stats.kstest(data, lambda x: dist.cdf(x, *params))
+        return {
+            'distribution': distribution_name,
+            'parameters': params,
+            'aic': 2 * k - 2 * log_likelihood,
+            'bic': k * np.log(len(fit_data)) - 2 * log_likelihood,
+            'ks_statistic': ks_statistic,
+            'ks_p_value': ks_p_value,
+            'goodness_of_fit': 'Bom ajuste' if ks_p_value > 0.05 else 'Ajuste inadequado'
+        }
+    except Exception:
+        return None
+
+def reference_normality_tests(data):
+    """
+    Estatísticas e p-values de referência da bateria de normalidade.
+
+    Mudança deliberada: a subamostra do Shapiro-Wilk (acima de 5.000 pedidos)
+    deixou de vir do np.random global e passou a ser sorteada com
+    SeedSequence(SAMPLE_SEED), como no analisador, para que o resultado seja
+    reprodutível e possa ir para o cache; a referência usa o mesmo sorteio.
+    """
+    if len(data) > 5000:
+        sample = np.random.default_rng(np.random.SeedSequence(SAMPLE_SEED)).choice(data, 5000, replace=False)
+    else:
+        sample = data
+    anderson = stats.anderson(data, dist='norm')
+    normalized = (data - np.mean(data)) / np.std(data)
+    return {
+        'shapiro_wilk': tuple(stats.shapiro(sample)),
+        'anderson_darling': anderson.statistic,
+        'kolmogorov_smirnov': tuple(stats.kstest(normalized, 'norm')),
+        'jarque_bera': tuple(stats.jarque_bera(data)),
+        'dagostino': tuple(stats.normaltest(data))
+    }
+
+def reference_test_normality(data):
+    """Teste de normalidade de referência (Shapiro-Wilk em amostra de 5.000, semente 42)"""
+    clean_data = data.dropna()
+    if len(clean_data) < 3:
+        return "Amostra insuficiente", False
+    sample_data = clean_data.sample(5000, random_state=42) if len(clean_data) > 5000 else clean_data
+    try:
+        stat, p_value = shapiro(sample_data)
+        return f"Shapiro-Wilk: p-value = {p_value:.6f}", p_value > 0.05
+    except Exception:
+        stat, p_value = normaltest(sample_data)
+        return f"D'Agostino-Pearson: p-value = {p_value:.6f}", p_value > 0.05
+
+def reference_pairwise_ranking(df, column, groups, variable='order_ticket'):
+    """
+    Ranking de referência por comparações de Mann-Whitney par a par.
+
+    Vitória significativa vale 1 ponto; empate (não significativo) vale 0,5 para
+    cada lado; desempate pela média.
+    """
+    results = {}
+    for a, b in combinations(groups, 2):
+        group1 = df[df[column] == a][variable]
+        group2 = df[df[column] == b][variable]
+        u_stat, p_val = mannwhitneyu(group1, group2, alternative='two-sided')
+        results[(a, b)] = {
+            'mean1': group1.mean(),
+            'mean2': group2.mean(),
+            'p_value': p_val,
+            'significant': p_val < 0.05,
+            'winner': a if group1.mean() > group2.mean() else b
+        }
+
+    scores = {group: 0 for group in groups}
+    for (a, b), result in results.items():
+        if result['significant']:
+            scores[result['winner']] += 1
+        else:
+            scores[a] += 0.5
+            scores[b] += 0.5
+
+    means = df.groupby(column)[variable].mean()
+    ranking = sorted(groups, key=lambda x: (scores[x], means[x]), reverse=True)
+    return ranking, results
+
+# ---------------------------------------------------------------------------
+# Verificações: referência × caminho em uso
+# ---------------------------------------------------------------------------
+
+def _orders_summary_check(mode, engine):
+    def check(context):
+        return context['orders_summary'], build_orders_summary(context['csv_dir'], mode=mode, engine=engine, sample=0)
+    return check
+
+equivalence_check('orders_summary[chunked]', 'summary')(_orders_summary_check('chunked', 'pandas'))
+for _engine in available_engines():
+    if _engine != 'pandas':
+        equivalence_check(f'orders_summary[{_engine}]', 'summary')(_orders_summary_check('memory', _engine))
+
+@equivalence_check('orders_summary[comprehensive_loader]', 'summary')
+def check_comprehensive_loader(context):
+    """Carregador do comprehensive_analysis (merge próprio) × construtor compartilhado"""
+    reference, _ = comprehensive_analysis.load_and_prepare_comprehensive_data(context['csv_dir'])
+    reference = reference.sort_values(['order_id', 'customer_state']).reset_index(drop=True)
+    candidate = build_orders_summary(context['csv_dir'], include_payments=False, sample=0)
+    return reference, candidate[reference.columns]
+
+@equivalence_check('comprehensive_loader[partitioned]', 'summary')
+def check_comprehensive_partitioned(context):
+    """Merge do comprehensive_analysis em memória × particionado (plano acima do orçamento)"""
+    csv_dir = context['csv_dir']
+    reference = comprehensive_analysis.load_and_prepare_comprehensive_data(csv_dir)
+    plan = plan_orders_summary(csv_dir, include_payments=False, n_partitions=5, n_workers=2)
+    orders_summary, quality_stats = comprehensive_analysis.load_comprehensive_data_partitioned(csv_dir, plan)
+    reference_summary = reference[0].sort_values(['order_id', 'customer_state']).reset_index(drop=True)
+    return (reference_summary, reference[1]), (orders_summary, quality_stats)
+
+# Limiar do ajuste por classes na verificação da beta (bem abaixo do tamanho dos dados)
+BINNED_CHECK_THRESHOLD = 1000
+
+# Diagnósticos do ajuste que não existem na referência
+FIT_DIAGNOSTIC_KEYS = ('iterations', 'method', 'rescaled')
+
+def _without_diagnostics(result):
+    return None if result is None else {key: value for key, value in result.items() if key not in FIT_DIAGNOSTIC_KEYS}
+
+for _variable in ['order_ticket', 'freight_ratio']:
+    for _name in AdvancedDistributionAnalyzer().distributions:
+        def _fit_check(context, variable=_variable, name=_name):
+            data = context['orders_summary'][variable].values
+            candidate = AdvancedDistributionAnalyzer().fit_distribution(data, name)
+            return reference_fit_distribution(data, name), _without_diagnostics(candidate)
+        equivalence_check(f'fit_distribution[{_variable}, {_name}]', 'fit')(_fit_check)
+
+        def _warm_fit_check(context, variable=_variable, name=_name):
+            """Ajuste de um segmento (maior UF) partindo dos parâmetros da população geral"""
+            df = context['orders_summary']
+            analyzer = AdvancedDistributionAnalyzer()
+            overall = analyzer.fit_distribution(df[variable].values, name)
+            data = df.loc[df['customer_state'] == df['customer_state'].value_counts().index[0], variable].values
+            candidate = analyzer.fit_distribution(data, name, start=None if overall is None else overall['parameters'])
+            return reference_fit_distribution(data, name), _without_diagnostics(candidate)
+        equivalence_check(f'fit_distribution[{_variable}, {_name}, segmento]', 'fit')(_warm_fit_check)
+
+    def _normality_check(context, variable=_variable):
+        data = context['orders_summary'][variable].values
+        np.random.seed(HARNESS_SEED)
+        reference = reference_normality_tests(data)
+        np.random.seed(HARNESS_SEED)
+        analyzer = AdvancedDistributionAnalyzer()
+        results = {name: test(data) for name, test in analyzer.normality_tests.items()}
+        candidate = {
+            name: result['statistic'] if name == 'anderson_darling' else (result['statistic'], result['p_value'])
+            for name, result in results.items()
+        }
+        return reference, candidate
+    equivalence_check(f'normality_tests[{_variable}]', 'statistic')(_normality_check)
+
+    def _binned_fit_check(context, variable=_variable):
+        """
+        Beta por classes (binned_threshold baixo força o caminho) × ajuste exato de referência.
+
+        Os parâmetros não são comparados: a beta reescalada do ticket tem uma crista
+        quase plana e as classes param em outro ponto dela. Verifica-se que o caminho
+        por classes foi usado e que o resultado nunca é pior (AIC) que a referência.
+        """
+        data = context['orders_summary'][variable].values
+        candidate = AdvancedDistributionAnalyzer(binned_threshold=BINNED_CHECK_THRESHOLD).fit_distribution(data, 'beta')
+        reference = reference_fit_distribution(data, 'beta')
+        tolerance = 1e-9 * abs(reference['aic'])
+        return ({'caminho por classes': True, 'AIC não pior que a referência': True},
+                {'caminho por classes': candidate['method'] in ('binned', 'subsample'),
+                 'AIC não pior que a referência': bool(candidate['aic'] <= reference['aic'] + tolerance)})
+    equivalence_check(f'fit_distribution[{_variable}, beta, classes]', 'exact')(_binned_fit_check)
+
+    def _test_normality_check(context, variable=_variable):
+        data = context['orders_summary'][variable]
+        return reference_test_normality(data), statistical_questions_analysis.test_normality(data, variable)
+    equivalence_check(f'test_normality[{_variable}]', 'exact')(_test_normality_check)
+
+@equivalence_check('normality_tests[segmentos, lote]')
+def check_segment_normality(context):
+    """Testes em lote (segment_normality_tests) × scipy segmento a segmento (sem o Shapiro-Wilk)"""
+    df = context['orders_summary']
+    segments = [(None, None)] + [('state', state) for state in df['customer_state'].value_counts().head(3).index]
+    variables = ['order_ticket', 'freight_ratio']
+    batch = segment_normality_tests(df, segments, variables)
+    reference, candidate = {}, {}
+    for segment in segments:
+        for variable in variables:
+            key = f'{segment[1] or "geral"}/{variable}'
+            expected = reference_normality_tests(_segment_data(df, segment, variable))
+            reference[key] = {test: expected[test] for test in BATCH_NORMALITY_TESTS}
+            candidate[key] = {test: result['statistic'] if test == 'anderson_darling'
+                              else (result['statistic'], result['p_value'])
+                              for test, result in batch[(segment, variable)].items()}
+    return reference, candidate
+
+@equivalence_check('pairwise_ranking[states]')
+def check_pairwise_states(context):
+    df = context['pairwise_df']
+    top_states = df['customer_state'].value_counts().head(8).index.tolist()
+    df_states = df[df['customer_state'].isin(top_states)]
+    return (reference_pairwise_ranking(df_states, 'customer_state', top_states),
+            pairwise_comparisons.pairwise_comparison_states(df))
+
+@equivalence_check('pairwise_ranking[payment_types]')
+def check_pairwise_payment_types(context):
+    df = context['pairwise_df']
+    top_payments = df['payment_type'].value_counts().head(4).index.tolist()
+    df_payments = df[df['payment_type'].isin(top_payments)]
+    return (reference_pairwise_ranking(df_payments, 'payment_type', top_payments),
+            pairwise_comparisons.pairwise_comparison_payment_types(df))
+
+@equivalence_check('pairwise_ranking[time_slots]')
+def check_pairwise_time_slots(context):
+    df = context['pairwise_df']
+    return (reference_pairwise_ranking(df.dropna(subset=['time_slot']), 'time_slot',
+                                       ['Madrugada', 'Manhã', 'Tarde', 'Noite']),
+            pairwise_comparisons.pairwise_comparison_time_slots(df))
+
+@equivalence_check('pairwise_ranking[regions]')
+def check_pairwise_regions(context):
+    df = context['pairwise_df']
+    return (reference_pairwise_ranking(df, 'region', ['Norte', 'Nordeste', 'Centro-Oeste', 'Sudeste', 'Sul']),
+            pairwise_comparisons.pairwise_comparison_regions(df))
+
+def build_context(scale=HARNESS_SCALE, seed=HARNESS_SEED):
+    """Dados compartilhados pelas verificações (resumo de referência e base dos pairwise)"""
+    csv_dir = synthetic_data_dir(scale, seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return {
+            'csv_dir': csv_dir,
+            'orders_summary': build_orders_summary(csv_dir, mode='memory', engine='pandas', sample=0),
+            'pairwise_df': pairwise_comparisons.load_data(csv_dir)
+        }
+
+def run_equivalence_checks(scale=HARNESS_SCALE, seed=HARNESS_SEED, pattern=None):
+    """
+    Executa as verificações registradas e devolve uma linha por verificação.
+
+    Args:
+        scale (float): Escala dos dados sintéticos
+        seed (int): Semente dos dados sintéticos
+        pattern (str): Expressão regular para filtrar verificações pelo nome
+
+    Returns:
+        tuple: (pd.DataFrame com situação por verificação, dict nome → divergências)
+    """
+    context = build_context(scale, seed)
+    rows, drifts = [], {}
+    for name, (check, tolerance) in EQUIVALENCE_CHECKS.items():
+        if pattern and not re.search(pattern, name):
+            continue
+        rtol, atol = TOLERANCES[tolerance]
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                reference, candidate = check(context)
+            drifts[name] = compare_values(reference, candidate, rtol, atol)
+        except Exception as e:
+            drifts[name] = [f"erro na execução: {type(e).__name__}: {e}"]
+        rows.append({
+            'check': name,
+            'tolerance': tolerance,
+            'status': 'OK' if not drifts[name] else 'DIVERGÊNCIA',
+            'drifts': len(drifts[name])
+        })
+    return pd.DataFrame(rows), drifts
+
+def assert_equivalent(scale=HARNESS_SCALE, seed=HARNESS_SEED, pattern=None):
+    """
+    Executa as verificações e falha se qualquer resultado divergir da referência.
+
+    Raises:
+        AssertionError: Com a lista de divergências por verificação
+    """
+    results, drifts = run_equivalence_checks(scale, seed, pattern)
+    failed = {name: items for name, items in drifts.items() if items}
+    if failed:
+        details = '\n'.join(f"  {name}:\n" + '\n'.join(f"    - {item}" for item in items[:10])
+                            for name, items in failed.items())
+        raise AssertionError(f"{len(failed)} verificação(ões) com divergência:\n{details}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description='Verifica a equivalência numérica dos caminhos otimizados')
+    parser.add_argument('--scale', type=float, default=HARNESS_SCALE)
+    parser.add_argument('--seed', type=int, default=HARNESS_SEED)
+    parser.add_argument('--only', help='Expressão regular para filtrar verificações')
+    args = parser.parse_args()
+
+    print("=== VERIFICAÇÃO DE EQUIVALÊNCIA NUMÉRICA ===")
+    results, drifts = run_equivalence_checks(args.scale, args.seed, args.only)
+    print(results.to_string(index=False))
+
+    failed = {name: items for name, items in drifts.items() if items}
+    for name, items in failed.items():
+        print(f"\n{name}:")
+        for item in items[:10]:
+            print(f"   - {item}")
+
+    if failed:
+        print(f"\nFALHA: {len(failed)} verificação(ões) divergem da referência")
+        sys.exit(1)
+    print(f"\nTodas as {len(results)} verificações equivalentes à referência")
+
+if __name__ == "__main__":
+    main()
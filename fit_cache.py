@@ -0,0 +1,163 @@
+import numpy as np
+import os
+import sys
+import pickle
+import hashlib
+
+# Diretório do cache de ajustes e testes ('' desliga) e tamanho máximo em disco
+FIT_CACHE_DIR = os.getenv('OLIST_FIT_CACHE', 'fit_cache')
+FIT_CACHE_MAX_BYTES = int(float(os.getenv('OLIST_FIT_CACHE_MAX_MB', '64')) * 1024 ** 2)
+
+# Entra na chave de todas as entradas: incrementar quando um ajuste ou teste mudar de resultado
+CACHE_VERSION = 3
+
+def data_fingerprint(data):
+    """Hash BLAKE2b dos bytes do array (mais dtype e forma): O(n), sem ordenação"""
+    array = np.ascontiguousarray(data)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f'{array.dtype.str}{array.shape}'.encode())
+    digest.update(array.view(np.uint8).reshape(-1) if array.size else b'')
+    return digest.hexdigest()
+
+class FitCache:
+    """
+    Cache em disco de ajustes de distribuição e testes de normalidade.
+
+    Cada entrada é um pickle nomeado pelo hash de (impressão digital dos dados,
+    tipo, nome, opções). Arquivos são gravados de forma atômica; a data de
+    modificação marca o último uso e, quando o total passa de max_bytes, as
+    entradas usadas há mais tempo são removidas (LRU). Acertos, faltas e remoções
+    são contados por processo (stats).
+
+    Uso:
+        cache = FitCache()
+        result = cache.cached(data_fingerprint(data), 'fit', 'gamma',
+                              lambda: analyzer.fit_distribution(data, 'gamma'), start=None)
+    """
+
+    SUFFIX = '.pkl'
+
+    def __init__(self, cache_dir=FIT_CACHE_DIR, max_bytes=FIT_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index = None  # chave → (bytes, último uso), lido do diretório no primeiro acesso
+
+    def _load_index(self):
+        if self._index is None:
+            self._index = {}
+            if os.path.isdir(self.cache_dir):
+                for entry in os.scandir(self.cache_dir):
+                    if entry.name.endswith(self.SUFFIX):
+                        stat = entry.stat()
+                        self._index[entry.name[:-len(self.SUFFIX)]] = (stat.st_size, stat.st_mtime)
+        return self._index
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + self.SUFFIX)
+
+    @staticmethod
+    def key(fingerprint, kind, name, **options):
+        """Chave da entrada: dados, tipo ('fit', 'normality', ...), nome e opções do cálculo"""
+        payload = repr((CACHE_VERSION, fingerprint, kind, name, sorted(options.items())))
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def get(self, key):
+        """(True, valor) em caso de acerto; (False, None) em caso de falta"""
+        index = self._load_index()
+        if key in index:
+            try:
+                with open(self._path(key), 'rb') as f:
+                    value = pickle.load(f)
+            except (OSError, pickle.UnpicklingError, EOFError):
+                index.pop(key, None)
+            else:
+                os.utime(self._path(key))
+                index[key] = (index[key][0], os.path.getmtime(self._path(key)))
+                self.hits += 1
+                return True, value
+        self.misses += 1
+        return False, None
+
+    def put(self, key, value):
+        """Grava a entrada e remove as menos usadas até caber em max_bytes"""
+        index = self._load_index()
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary = self._path(key) + f'.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self._path(key))
+        index[key] = (os.path.getsize(self._path(key)), os.path.getmtime(self._path(key)))
+        self._evict()
+
+    def _evict(self):
+        index = self._index
+        total = sum(size for size, _ in index.values())
+        for key in sorted(index, key=lambda key: index[key][1]):
+            if total <= self.max_bytes:
+                break
+            size, _ = index.pop(key)
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+
+    def cached(self, fingerprint, kind, name, compute, **options):
+        """Valor em cache para (dados, tipo, nome, opções) ou compute(), gravado em seguida"""
+        key = self.key(fingerprint, kind, name, **options)
+        found, value = self.get(key)
+        if not found:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def stats(self):
+        index = self._load_index()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else None,
+            'evictions': self.evictions,
+            'entries': len(index),
+            'bytes': sum(size for size, _ in index.values())
+        }
+
+    def clear(self):
+        """Remove todas as entradas"""
+        for key in list(self._load_index()):
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+        self._index = {}
+
+def open_fit_cache():
+    """Cache padrão (OLIST_FIT_CACHE), ou None se desligado"""
+    return FitCache() if FIT_CACHE_DIR else None
+
+def log_cache_stats(cache):
+    """Imprime acertos e faltas do cache (nada se desligado)"""
+    if cache is None:
+        return
+    stats = cache.stats()
+    hit_rate = f"{stats['hit_rate']:.0%}" if stats['hit_rate'] is not None else '-'
+    print(f"Cache de ajustes ({cache.cache_dir}): {stats['hits']} acertos, {stats['misses']} faltas "
+          f"({hit_rate}), {stats['evictions']} removidas | {stats['entries']} entradas, "
+          f"{stats['bytes'] / 1024 ** 2:.1f} MB de {cache.max_bytes / 1024 ** 2:.1f} MB")
+
+def main():
+    """Estatísticas do cache; 'clear' remove todas as entradas"""
+    cache = FitCache()
+    if len(sys.argv) > 1 and sys.argv[1] == 'clear':
+        cache.clear()
+        print(f"Cache {cache.cache_dir} esvaziado")
+        return
+    log_cache_stats(cache)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import numpy as np
+import os
+from lazy_imports import lazy_module
+
+stats = lazy_module('scipy.stats')
+
+# Testes opcionais calculados junto com o KS (p.ex. 'anderson_darling,cramer_von_mises')
+GOF_TESTS = tuple(test for test in os.getenv('OLIST_GOF_TESTS', '').replace(' ', '').split(',') if test)
+AVAILABLE_TESTS = ('anderson_darling', 'cramer_von_mises')
+
+class FitSample:
+    """
+    Amostra preparada uma vez por segmento e compartilhada por todas as distribuições.
+
+    Guarda os dados ordenados e os degraus da função de distribuição empírica
+    (i/n e (i-1)/n), usados pelo KS e pelos testes opcionais. O histograma do
+    ajuste por classes (binned_likelihood.binned_sample), a impressão digital
+    do cache de ajustes (fit_cache) e os momentos da seleção de candidatas
+    (candidate_selection) são guardados na primeira vez em que são pedidos.
+    """
+
+    __slots__ = ('data', 'sorted', 'n', 'ecdf_upper', 'ecdf_lower', 'binned', 'fingerprint', 'moments')
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float64)
+        self.sorted = np.sort(self.data)
+        self.n = len(self.sorted)
+        positions = np.arange(1, self.n + 1, dtype=np.float64)
+        self.ecdf_upper = positions / self.n
+        self.ecdf_lower = (positions - 1) / self.n
+        self.binned = None
+        self.fingerprint = None
+        self.moments = None
+
+def prepare_fit_sample(data):
+    return FitSample(data)
+
+def evaluate_fit(sample, dist, params, fit_data=None, tests=GOF_TESTS):
+    """
+    Log-verossimilhança, AIC, BIC e KS de uma distribuição ajustada, em passadas vetorizadas.
+
+    logpdf é avaliado uma única vez (AIC e BIC saem da mesma soma) e a CDF uma
+    única vez sobre a amostra já ordenada; o KS e seu p-value (distribuição exata
+    de Kolmogorov, como em stats.kstest) saem dessa CDF sem nova ordenação.
+
+    Args:
+        sample (FitSample): Amostra preparada (prepare_fit_sample)
+        dist: Distribuição do scipy.stats
+        params (tuple): Parâmetros ajustados
+        fit_data (np.ndarray): Dados em que o ajuste foi feito, se diferentes da
+            amostra (p.ex. beta reescalada); a verossimilhança usa esses dados
+        tests (tuple): Testes extras: 'anderson_darling' e/ou 'cramer_von_mises'
+
+    Returns:
+        dict: log_likelihood, aic, bic, ks_statistic, ks_p_value e os testes extras
+    """
+    likelihood_data = sample.sorted if fit_data is None else fit_data
+    log_likelihood = np.sum(dist.logpdf(likelihood_data, *params))
+    k = len(params)
+    n = len(likelihood_data)
+
+    cdf = dist.cdf(sample.sorted, *params)
+    ks_statistic = max(np.max(sample.ecdf_upper - cdf), np.max(cdf - sample.ecdf_lower))
+    ks_p_value = float(np.clip(stats.kstwo.sf(ks_statistic, sample.n), 0, 1))
+
+    result = {
+        'log_likelihood': log_likelihood,
+        'aic': 2 * k - 2 * log_likelihood,
+        'bic': k * np.log(n) - 2 * log_likelihood,
+        'ks_statistic': ks_statistic,
+        'ks_p_value': ks_p_value
+    }
+
+    for test in tests:
+        if test == 'anderson_darling':
+            result[test] = _anderson_darling(sample, dist, params)
+        elif test == 'cramer_von_mises':
+            result[test] = _cramer_von_mises(sample, cdf)
+        else:
+            raise ValueError(f"Teste desconhecido: {test} (disponíveis: {', '.join(AVAILABLE_TESTS)})")
+    return result
+
+def _anderson_darling(sample, dist, params):
+    """A² = -n - Σ (2i-1)/n · [log F(x_i) + log(1 - F(x_{n+1-i}))], com logcdf/logsf estáveis nas caudas"""
+    log_cdf = dist.logcdf(sample.sorted, *params)
+    log_sf = dist.logsf(sample.sorted, *params)[::-1]
+    weights = (2 * np.arange(1, sample.n + 1) - 1) / sample.n
+    return -sample.n - np.sum(weights * (log_cdf + log_sf))
+
+def _cramer_von_mises(sample, cdf):
+    """W² = 1/(12n) + Σ (F(x_i) - (2i-1)/(2n))²"""
+    return 1 / (12 * sample.n) + np.sum((cdf - (sample.ecdf_upper + sample.ecdf_lower) / 2) ** 2)
@@ -0,0 +1,289 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import pickle
+from olist_dataset import (CSV_DIR, SOURCE_FILES, SOURCE_COLUMNS, CHUNK_SIZE, build_orders_summary,
+                           join_orders_customers, build_item_frame, aggregate_orders, aggregate_payments)
+
+# Arquivos persistidos do resumo por pedido e das estatísticas por segmento
+SUMMARY_PATH = os.getenv('OLIST_SUMMARY_PATH', 'orders_summary.pkl')
+STATS_PATH = os.getenv('OLIST_SEGMENT_STATS_PATH', 'segment_stats.pkl')
+# Linhas de todos os deltas já aplicados (o histórico em csv_dir não é alterado)
+DELTAS_PATH = os.getenv('OLIST_APPLIED_DELTAS_PATH', 'applied_deltas.pkl')
+
+# Chave de cada tabela: linhas do delta substituem as do histórico com a mesma chave
+DELTA_KEYS = {
+    'items': ['order_id', 'order_item_id'],
+    'orders': ['order_id'],
+    'customers': ['customer_id'],
+    'payments': ['order_id', 'payment_sequential']
+}
+
+# Segmentos e variáveis acompanhados incrementalmente
+SEGMENT_COLUMNS = ['customer_state', 'product_category']
+SEGMENT_VARIABLES = ['order_ticket', 'freight_value', 'freight_ratio', 'n_items']
+
+# Limites fixos dos histogramas (esboço de quantis que aceita inclusão e remoção)
+HISTOGRAM_EDGES = {
+    'order_ticket': np.logspace(-2, 6, 2001),
+    'freight_value': np.logspace(-2, 6, 2001),
+    'freight_ratio': np.linspace(0, 1, 1001),
+    'n_items': np.arange(0.5, 101.5, 1.0)
+}
+
+class SegmentStatistics:
+    """
+    Estatísticas por segmento (UF e categoria) atualizáveis incrementalmente.
+
+    Para cada segmento e variável mantém contagem, soma, soma dos quadrados e um
+    histograma de limites fixos. Todos são aditivos, então pedidos podem ser
+    incluídos e removidos sem reprocessar o histórico. Os quantis são interpolados
+    dentro do intervalo do histograma (erro relativo < 1% para valores monetários).
+    """
+
+    def __init__(self):
+        self.segments = {}
+
+    def _state(self, column, segment, variable):
+        key = (column, segment, variable)
+        if key not in self.segments:
+            self.segments[key] = {
+                'n': 0,
+                'sum': 0.0,
+                'sum_sq': 0.0,
+                'histogram': np.zeros(len(HISTOGRAM_EDGES[variable]) + 1, dtype=np.int64)
+            }
+        return self.segments[key]
+
+    def _update(self, orders, sign):
+        for column in SEGMENT_COLUMNS:
+            for segment, group in orders.groupby(column):
+                for variable in SEGMENT_VARIABLES:
+                    values = group[variable].dropna().to_numpy(dtype=float)
+                    state = self._state(column, segment, variable)
+                    state['n'] += sign * len(values)
+                    state['sum'] += sign * values.sum()
+                    state['sum_sq'] += sign * np.square(values).sum()
+                    edges = HISTOGRAM_EDGES[variable]
+                    bins = np.searchsorted(edges, values, side='right')
+                    # O último limite é fechado: valores iguais a ele (freight_ratio = 1) ficam no último intervalo
+                    bins[values == edges[-1]] = len(edges) - 1
+                    state['histogram'] += sign * np.bincount(bins, minlength=len(state['histogram']))
+
+    def add(self, orders):
+        """Inclui pedidos nas estatísticas"""
+        self._update(orders, 1)
+
+    def remove(self, orders):
+        """Remove pedidos previamente incluídos"""
+        self._update(orders, -1)
+
+    def quantile(self, column, segment, variable, q):
+        """Quantil aproximado a partir do histograma do segmento"""
+        state = self.segments[(column, segment, variable)]
+        if state['n'] <= 0:
+            return np.nan
+
+        edges = HISTOGRAM_EDGES[variable]
+        histogram = state['histogram']
+        cumulative = np.cumsum(histogram)
+        target = q * state['n']
+        b = int(np.searchsorted(cumulative, target, side='left'))
+        if b == 0:
+            return edges[0]
+        if b >= len(edges):
+            # Intervalo de transbordo (acima do último limite): sem largura para interpolar
+            return edges[-1]
+
+        # Interpolação linear dentro do intervalo [edges[b-1], edges[b])
+        before = cumulative[b - 1]
+        count = histogram[b]
+        if count <= 0:
+            return edges[b - 1]
+        fraction = min(max((target - before) / count, 0.0), 1.0)
+        return edges[b - 1] + fraction * (edges[b] - edges[b - 1])
+
+    def summary(self, column, variable):
+        """Tabela com N, média, desvio padrão e quartis por segmento"""
+        rows = []
+        for (col, segment, var), state in self.segments.items():
+            if col != column or var != variable or state['n'] <= 0:
+                continue
+            n = state['n']
+            mean = state['sum'] / n
+            variance = (state['sum_sq'] - n * mean ** 2) / (n - 1) if n > 1 else np.nan
+            rows.append({
+                column: segment,
+                'count': n,
+                'mean': mean,
+                'std': np.sqrt(max(variance, 0)) if n > 1 else np.nan,
+                'q25': self.quantile(column, segment, variable, 0.25),
+                'median': self.quantile(column, segment, variable, 0.5),
+                'q75': self.quantile(column, segment, variable, 0.75)
+            })
+        return pd.DataFrame(rows).set_index(column).sort_values('count', ascending=False)
+
+def read_delta(delta_dir):
+    """Lê os CSVs de novas linhas/alterações (arquivos ausentes = sem alterações)"""
+    delta = {}
+    for table in DELTA_KEYS:
+        path = os.path.join(delta_dir, SOURCE_FILES[table])
+        if os.path.exists(path):
+            delta[table] = pd.read_csv(path)
+    return delta
+
+def merge_deltas(applied, delta):
+    """Acumula delta sobre os deltas já aplicados (linha mais recente por chave)"""
+    merged = dict(applied)
+    for table, rows in delta.items():
+        if table in merged:
+            rows = pd.concat([merged[table], rows], ignore_index=True)
+            rows = rows.drop_duplicates(subset=DELTA_KEYS[table], keep='last').reset_index(drop=True)
+        merged[table] = rows
+    return merged
+
+def _history_rows(csv_dir, table, column, values, chunksize=CHUNK_SIZE):
+    """Lê do histórico, em blocos, apenas as linhas cuja coluna está em values"""
+    columns = list(dict.fromkeys(DELTA_KEYS[table] + SOURCE_COLUMNS[table]))
+    reader = pd.read_csv(os.path.join(csv_dir, SOURCE_FILES[table]), usecols=columns, chunksize=chunksize)
+    return pd.concat([chunk[chunk[column].isin(values)] for chunk in reader], ignore_index=True)
+
+def _current_rows(csv_dir, delta, table, column, values):
+    """Linhas do histórico sobrepostas pelas do delta, pela chave da tabela"""
+    rows = _history_rows(csv_dir, table, column, values)
+    if table in delta:
+        changed = delta[table][delta[table][column].isin(values)]
+        rows = pd.concat([rows, changed[rows.columns]], ignore_index=True)
+        rows = rows.drop_duplicates(subset=DELTA_KEYS[table], keep='last')
+    return rows
+
+def recompute_orders(order_ids, delta, csv_dir=CSV_DIR):
+    """Recalcula o resumo apenas dos pedidos afetados pelo delta"""
+    items_df = _current_rows(csv_dir, delta, 'items', 'order_id', order_ids)
+    orders_df = _current_rows(csv_dir, delta, 'orders', 'order_id', order_ids)
+    customers_df = _current_rows(csv_dir, delta, 'customers', 'customer_id', orders_df['customer_id'].unique())
+    payments_df = _current_rows(csv_dir, delta, 'payments', 'order_id', order_ids)
+
+    products_df = pd.read_csv(os.path.join(csv_dir, SOURCE_FILES['products']))
+    translation_df = pd.read_csv(os.path.join(csv_dir, SOURCE_FILES['translation']))
+
+    orders_customers = join_orders_customers(orders_df, customers_df)
+    final_df = build_item_frame(items_df, products_df, translation_df, orders_customers)
+    orders_summary = aggregate_orders(final_df)
+
+    return orders_summary.merge(aggregate_payments(payments_df), on='order_id', how='left')
+
+def affected_order_ids(delta, csv_dir=CSV_DIR, applied=None):
+    """Pedidos cujo resumo pode mudar com o delta (applied: deltas anteriores sobre o histórico)"""
+    order_ids = set()
+    for table in ['items', 'orders', 'payments']:
+        if table in delta:
+            order_ids.update(delta[table]['order_id'])
+
+    # Alteração de cliente (UF) afeta todos os pedidos desse cliente
+    if 'customers' in delta:
+        customer_orders = _current_rows(csv_dir, merge_deltas(applied or {}, delta), 'orders',
+                                        'customer_id', delta['customers']['customer_id'])
+        order_ids.update(customer_orders['order_id'])
+
+    return order_ids
+
+def build_segment_statistics(orders_summary):
+    """Estatísticas por segmento calculadas do zero"""
+    segment_stats = SegmentStatistics()
+    segment_stats.add(orders_summary)
+    return segment_stats
+
+def save_state(orders_summary, segment_stats, summary_path=SUMMARY_PATH, stats_path=STATS_PATH,
+               applied=None, deltas_path=DELTAS_PATH):
+    orders_summary.to_pickle(summary_path)
+    with open(stats_path, 'wb') as f:
+        pickle.dump(segment_stats, f)
+    if applied is not None:
+        with open(deltas_path, 'wb') as f:
+            pickle.dump(applied, f)
+
+def load_state(summary_path=SUMMARY_PATH, stats_path=STATS_PATH):
+    orders_summary = pd.read_pickle(summary_path)
+    with open(stats_path, 'rb') as f:
+        segment_stats = pickle.load(f)
+    return orders_summary, segment_stats
+
+def load_applied_deltas(deltas_path=DELTAS_PATH):
+    """Deltas já aplicados, por tabela (vazio se nenhum foi aplicado)"""
+    if not os.path.exists(deltas_path):
+        return {}
+    with open(deltas_path, 'rb') as f:
+        return pickle.load(f)
+
+def update_orders_summary(delta_dir, csv_dir=CSV_DIR, summary_path=SUMMARY_PATH, stats_path=STATS_PATH,
+                          deltas_path=DELTAS_PATH):
+    """
+    Atualiza o resumo persistido com um delta de itens, pedidos, clientes e pagamentos.
+
+    Apenas os pedidos afetados são recalculados (com suas linhas do histórico
+    sobrepostas pelas do delta) e substituídos no resumo por order_id. As
+    estatísticas por segmento removem a contribuição antiga desses pedidos e
+    incluem a nova. Sem estado persistido, o resumo é construído do zero a partir
+    do histórico antes de aplicar o delta.
+
+    O histórico em csv_dir nunca é alterado: as linhas de cada delta aplicado
+    são acumuladas em deltas_path e sobrepostas ao histórico nos recálculos
+    seguintes (um delta do dia 5 que só muda o status de um pedido criado no
+    dia 1 ainda enxerga os itens do dia 1). Ao reconstruir o resumo do zero, os
+    deltas acumulados são reaplicados junto com o novo.
+
+    Args:
+        delta_dir (str): Diretório com os CSVs de novas linhas (mesmos nomes de arquivo)
+        csv_dir (str): Diretório com o histórico
+        summary_path (str): Arquivo do resumo por pedido
+        stats_path (str): Arquivo das estatísticas por segmento
+        deltas_path (str): Arquivo dos deltas já aplicados
+
+    Returns:
+        tuple: (resumo atualizado, SegmentStatistics atualizado)
+    """
+    applied = load_applied_deltas(deltas_path)
+    delta = read_delta(delta_dir)
+    if os.path.exists(summary_path) and os.path.exists(stats_path):
+        orders_summary, segment_stats = load_state(summary_path, stats_path)
+        order_ids = affected_order_ids(delta, csv_dir, applied)
+    else:
+        print("Estado persistido não encontrado, construindo resumo completo...")
+        orders_summary = build_orders_summary(csv_dir, sample=0)
+        segment_stats = build_segment_statistics(orders_summary)
+        # O resumo do histórico não contém os deltas anteriores: reaplicá-los com o novo
+        order_ids = affected_order_ids(merge_deltas(applied, delta), csv_dir)
+    applied = merge_deltas(applied, delta)
+
+    print(f"Pedidos afetados pelo delta: {len(order_ids):,}")
+    if not order_ids:
+        save_state(orders_summary, segment_stats, summary_path, stats_path, applied, deltas_path)
+        return orders_summary, segment_stats
+
+    is_affected = orders_summary['order_id'].isin(order_ids)
+    updated_orders = recompute_orders(order_ids, applied, csv_dir)
+
+    segment_stats.remove(orders_summary[is_affected])
+    segment_stats.add(updated_orders)
+
+    orders_summary = pd.concat([orders_summary[~is_affected], updated_orders], ignore_index=True)
+    orders_summary = orders_summary.sort_values(['order_id', 'customer_state']).reset_index(drop=True)
+
+    print(f"Pedidos substituídos: {is_affected.sum():,}, pedidos no resumo: {len(orders_summary):,}")
+    save_state(orders_summary, segment_stats, summary_path, stats_path, applied, deltas_path)
+    return orders_summary, segment_stats
+
+def main():
+    """Aplica um delta diário ao resumo persistido e exibe as estatísticas por UF"""
+    delta_dir = sys.argv[1] if len(sys.argv) > 1 else 'olist-delta'
+
+    print("=== ATUALIZAÇÃO INCREMENTAL DO RESUMO POR PEDIDO ===")
+    orders_summary, segment_stats = update_orders_summary(delta_dir)
+
+    print("\nTicket médio por UF (estatísticas incrementais):")
+    print(segment_stats.summary('customer_state', 'order_ticket').round(2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import importlib
+import types
+import sys
+
+class LazyModule:
+    """
+    Módulo importado só no primeiro acesso a um atributo.
+
+    on_load (opcional) é chamado uma vez com o módulo já importado, p.ex. para
+    aplicar rcParams e estilo do matplotlib apenas quando algo for de fato plotado.
+    """
+
+    def __init__(self, name, on_load=None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            module = importlib.import_module(self._name)
+            if self._on_load is not None:
+                self._on_load(module)
+            self._module = module
+        return self._module
+
+    def __getattr__(self, attr):
+        if attr in ('_name', '_on_load', '_module'):  # objeto ainda não inicializado (cópia/pickle)
+            raise AttributeError(attr)
+        return getattr(self._load(), attr)
+
+    def __repr__(self):
+        state = 'carregado' if self._module is not None else 'não carregado'
+        return f"<LazyModule '{self._name}' ({state})>"
+
+class LazyAttribute:
+    """
+    Atributo de módulo (função ou classe) importado só na primeira chamada.
+
+    Substitui 'from scipy.stats import mannwhitneyu' sem importar scipy.stats
+    no carregamento do script.
+    """
+
+    def __init__(self, module, attr, on_load=None):
+        self._module = module if isinstance(module, LazyModule) else LazyModule(module, on_load)
+        self._attr = attr
+        self.__name__ = attr
+
+    def _resolve(self):
+        return getattr(self._module, self._attr)
+
+    def __call__(self, *args, **kwargs):
+        return self._resolve()(*args, **kwargs)
+
+    def __getattr__(self, attr):
+        if attr in ('_module', '_attr'):
+            raise AttributeError(attr)
+        return getattr(self._resolve(), attr)
+
+    def __repr__(self):
+        return f"<LazyAttribute '{self._module._name}.{self._attr}'>"
+
+def lazy_module(name, on_load=None):
+    """Proxy de módulo; se o módulo já estiver importado, devolve o próprio módulo"""
+    if name in sys.modules and on_load is None:
+        return sys.modules[name]
+    return LazyModule(name, on_load)
+
+def lazy_attribute(module, attr):
+    """Proxy de um atributo de módulo (equivale a 'from module import attr')"""
+    return lazy_attributes(module, attr)[0]
+
+def lazy_attributes(module, *attrs):
+    """Proxies de vários atributos do mesmo módulo (na ordem pedida)"""
+    if isinstance(module, types.ModuleType):  # já importado: os próprios atributos
+        return tuple(getattr(module, attr) for attr in attrs)
+    if isinstance(module, str):
+        if module in sys.modules:
+            return tuple(getattr(sys.modules[module], attr) for attr in attrs)
+        module = LazyModule(module)
+    return tuple(LazyAttribute(module, attr) for attr in attrs)
+
+def loaded_modules(prefixes=('scipy', 'matplotlib', 'seaborn')):
+    """Quais das bibliotecas pesadas já foram importadas neste processo"""
+    return {prefix: prefix in sys.modules for prefix in prefixes}
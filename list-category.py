@@ -1,5 +1,5 @@
-import pandas as pd
 import os
+from dataset_catalog import file_profile, distinct_values as catalog_distinct_values
 
 # Path to the directory containing the CSV files (same directory as the script)
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -11,11 +11,11 @@ file_name = 'olist_products_dataset.csv'
 # Caminho completo
 file_path = os.path.join(csv_path, file_name)
 
-# Lê o CSV
-df = pd.read_csv(file_path)
+# Perfil do CSV no catálogo (varrido novamente só se o arquivo mudou)
+profile = file_profile(file_path)
 
 # Lista os valores distintos da coluna 'product_category_name'
-distinct_values = df['product_category_name'].dropna().unique()
+distinct_values = catalog_distinct_values(profile, 'product_category_name')
 
 # Exibe os valores
 print(f"Valores distintos da coluna 'product_category_name' ({len(distinct_values)} categorias):")
@@ -1,5 +1,5 @@
-import pandas as pd
 import os
+from dataset_catalog import update_catalog, preview_frame
 
 # Path to the directory containing the CSV files (same directory as the script)
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -17,11 +17,13 @@ csv_files = [
     'olist_order_payments_dataset.csv'
 ]
 
+# Previews come from the dataset catalog (files are only scanned again when they change)
+profiles = update_catalog(csv_path, csv_files)
+
 # Display the first 5 rows of each CSV file
 for csv_file in csv_files:
     print(f"Preview of {csv_file}:")
-    # Read the CSV file
-    df = pd.read_csv(f"{csv_path}{csv_file}")
-    
+    profile = profiles[csv_file]
+
     # Display the first 5 rows
-    print(df.head(), "\n")
+    print(preview_frame(profile), "\n")
@@ -0,0 +1,147 @@
+import pandas as pd
+import os
+import math
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Orçamento global de memória (ex.: '2GB', '512MB'); sem valor = sem limite
+MEMORY_BUDGET = os.getenv('OLIST_MEMORY_BUDGET')
+
+# Linhas lidas de cada CSV para estimar bytes por linha (arquivo e memória)
+SAMPLE_ROWS = 5000
+
+# Pico estimado em relação às tabelas carregadas: os merges sucessivos copiam a
+# tabela de itens (itens+produtos, +tradução, +pedidos) antes dos filtros
+PEAK_FACTOR = 3.0
+
+# Fração do orçamento ocupada por um bloco de leitura no modo particionado
+CHUNK_BUDGET_FRACTION = 0.25
+
+_UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2,
+          'G': 1024 ** 3, 'GB': 1024 ** 3, 'T': 1024 ** 4, 'TB': 1024 ** 4}
+
+def parse_size(value):
+    """Converte '2GB', '512 MB' ou bytes em inteiro (None/'' = sem limite)"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip().upper().replace(' ', '')
+    number = text.rstrip('KMGTB')
+    unit = text[len(number):]
+    if unit not in _UNITS:
+        raise ValueError(f"Unidade de memória desconhecida: {value}")
+    return int(float(number) * _UNITS[unit])
+
+def format_size(n_bytes):
+    if n_bytes is None:
+        return 'sem limite'
+    return f"{n_bytes / 1024 ** 2:,.0f} MB"
+
+def estimate_csv(path, columns=None, sample_rows=SAMPLE_ROWS):
+    """
+    Estima linhas e memória de um CSV sem lê-lo inteiro.
+
+    Lê as primeiras sample_rows linhas: o tamanho médio de linha no arquivo dá o
+    número de linhas, e memory_usage(deep=True) da amostra dá os bytes por linha
+    em memória (com os dtypes que o pandas inferiria).
+
+    Returns:
+        dict: rows, memory_per_row e memory_bytes estimados
+    """
+    file_size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        header = f.readline()
+        sample_bytes = 0
+        sample_lines = 0
+        for line in f:
+            sample_bytes += len(line)
+            sample_lines += 1
+            if sample_lines >= sample_rows:
+                break
+
+    if sample_lines == 0:
+        return {'rows': 0, 'memory_per_row': 0.0, 'memory_bytes': 0}
+
+    sample = pd.read_csv(path, usecols=columns, nrows=sample_lines)
+    memory_per_row = sample.memory_usage(deep=True, index=False).sum() / len(sample)
+    rows = int((file_size - len(header)) / (sample_bytes / sample_lines))
+    return {'rows': rows, 'memory_per_row': memory_per_row, 'memory_bytes': int(rows * memory_per_row)}
+
+def estimate_footprint(paths, columns=None, peak_factor=PEAK_FACTOR):
+    """
+    Estima o pico de memória de carregar e juntar os CSVs informados.
+
+    Args:
+        paths (dict): Nome da tabela → caminho do CSV
+        columns (dict): Nome da tabela → colunas lidas (ausente = todas)
+        peak_factor (float): Multiplicador das tabelas carregadas para cobrir os merges
+
+    Returns:
+        dict: Estimativa por tabela, memória das tabelas e pico estimado
+    """
+    columns = columns or {}
+    tables = {name: estimate_csv(path, columns.get(name)) for name, path in paths.items()}
+    loaded = sum(table['memory_bytes'] for table in tables.values())
+    return {'tables': tables, 'loaded_bytes': loaded, 'peak_bytes': int(loaded * peak_factor)}
+
+def plan_execution(footprint, budget=MEMORY_BUDGET, n_partitions=16, n_workers=1, chunksize=500000):
+    """
+    Escolhe o modo de execução que respeita o orçamento de memória.
+
+    - 'memory': o pico estimado cabe no orçamento;
+    - 'chunked': particionado por hash, com n_workers partições em memória ao
+      mesmo tempo; o número de partições sobe até que elas caibam juntas no
+      orçamento (o restante fica em disco).
+
+    O bloco de leitura é reduzido para que a maior tabela ocupe no máximo
+    CHUNK_BUDGET_FRACTION do orçamento por bloco. A estimativa cobre só a
+    construção do resumo por pedido, não as análises feitas sobre ele.
+
+    Returns:
+        dict: mode, n_partitions, n_workers, chunksize, estimated_bytes, budget_bytes
+    """
+    budget = parse_size(budget)
+    estimated = footprint['peak_bytes']
+    plan = {'mode': 'memory', 'n_partitions': n_partitions, 'n_workers': n_workers,
+            'chunksize': chunksize, 'estimated_bytes': estimated, 'budget_bytes': budget}
+    if budget is None or estimated <= budget:
+        return plan
+
+    widest_row = max(table['memory_per_row'] for table in footprint['tables'].values()) or 1.0
+    plan['chunksize'] = max(min(chunksize, int(budget * CHUNK_BUDGET_FRACTION / widest_row)), 1000)
+
+    plan['mode'] = 'chunked'
+    if estimated / n_partitions * n_workers > budget:
+        plan['n_partitions'] = math.ceil(estimated * n_workers / budget * 1.25)
+    return plan
+
+def peak_rss_bytes():
+    """Pico de memória residente do processo e dos subprocessos já encerrados (None se indisponível)"""
+    if resource is None:
+        return None
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return max(own, children) * 1024  # ru_maxrss em KB no Linux
+
+def log_plan(plan, label):
+    print(f"Plano de memória ({label}): modo '{plan['mode']}' | pico estimado "
+          f"{format_size(plan['estimated_bytes'])} | orçamento {format_size(plan['budget_bytes'])}")
+    if plan['mode'] != 'memory':
+        print(f"   • {plan['n_partitions']} partições, {plan['n_workers']} processo(s), "
+              f"blocos de {plan['chunksize']:,} linhas")
+
+def log_peak(plan, label, rss_before):
+    """
+    Compara o pico estimado da etapa com o quanto ela elevou o pico de RSS do
+    processo (o RSS total inclui o interpretador e as etapas anteriores; se o
+    pico já era maior antes da etapa, o acréscimo medido é 0)
+    """
+    rss_after = peak_rss_bytes()
+    if rss_after is None or rss_before is None:
+        return
+    print(f"Memória ({label}): pico estimado {format_size(plan['estimated_bytes'])} | "
+          f"acréscimo medido no pico RSS {format_size(rss_after - rss_before)}")
@@ -0,0 +1,577 @@
+import pandas as pd
+import os
+import glob
+import shutil
+import tempfile
+import time
+import importlib.util
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from olist_profiling import profiled
+from olist_sampling import stratified_sample
+from memory_budget import MEMORY_BUDGET, estimate_footprint, plan_execution, peak_rss_bytes, log_plan, log_peak
+from lazy_imports import lazy_module
+
+def _lazy_optional(name):
+    """Proxy do módulo opcional se estiver instalado (importado só no primeiro uso), senão None"""
+    return lazy_module(name) if importlib.util.find_spec(name) is not None else None
+
+# Motores colunares multi-thread opcionais (o padrão é pandas: nenhum é importado sem uso)
+duckdb = _lazy_optional('duckdb')
+pl = _lazy_optional('polars')
+pyarrow = _lazy_optional('pyarrow')
+
+# Diretório padrão com os CSVs da Olist
+CSV_DIR = 'olist-csv'
+
+# Arquivos de origem usados na construção do resumo por pedido
+SOURCE_FILES = {
+    'items': 'olist_order_items_dataset.csv',
+    'products': 'olist_products_dataset.csv',
+    'translation': 'product_category_name_translation.csv',
+    'orders': 'olist_orders_dataset.csv',
+    'customers': 'olist_customers_dataset.csv',
+    'payments': 'olist_order_payments_dataset.csv'
+}
+
+# Colunas efetivamente usadas de cada arquivo no modo particionado
+SOURCE_COLUMNS = {
+    'items': ['order_id', 'order_item_id', 'product_id', 'price', 'freight_value'],
+    'orders': ['order_id', 'customer_id', 'order_status', 'order_purchase_timestamp'],
+    'customers': ['customer_id', 'customer_state'],
+    'payments': ['order_id', 'payment_type', 'payment_installments', 'payment_value']
+}
+
+# Colunas e tipos do resumo por pedido (e dos agregados de pagamento), usados no resumo vazio
+SUMMARY_SCHEMA = {
+    'order_id': 'str', 'customer_state': 'str', 'order_ticket': 'float64', 'freight_value': 'float64',
+    'n_items': 'int64', 'product_category': 'str', 'order_date': 'str', 'freight_ratio': 'float64'
+}
+PAYMENT_SUMMARY_SCHEMA = {'payment_type': 'str', 'payment_installments': 'float64', 'payment_value': 'float64'}
+
+# Datas mantidas como texto também no leitor Arrow (que as converteria automaticamente)
+TEXT_COLUMNS = {
+    'items': ['shipping_limit_date'],
+    'orders': ['order_purchase_timestamp', 'order_approved_at', 'order_delivered_carrier_date',
+               'order_delivered_customer_date', 'order_estimated_delivery_date']
+}
+
+# Configuração via variáveis de ambiente (modo 'auto', 'memory' ou 'chunked', com 'spill' como sinônimo
+# de 'chunked' em um processo; 'auto' escolhe pelo orçamento OLIST_MEMORY_BUDGET e equivale a 'memory' sem orçamento)
+BUILD_MODE = os.getenv('OLIST_BUILD_MODE', 'auto')
+ENGINE = os.getenv('OLIST_ENGINE', 'pandas')
+N_PARTITIONS = int(os.getenv('OLIST_PARTITIONS', '16'))
+N_WORKERS = int(os.getenv('OLIST_WORKERS', '1'))
+CHUNK_SIZE = int(os.getenv('OLIST_CHUNK_SIZE', '500000'))
+SPILL_DIR = os.getenv('OLIST_SPILL_DIR')
+CSV_PARSER = os.getenv('OLIST_CSV_PARSER', 'c')
+IO_THREADS = int(os.getenv('OLIST_IO_THREADS', str(len(SOURCE_FILES))))
+
+def dominant_category(values):
+    """Categoria mais frequente do pedido (empates resolvidos em ordem alfabética)"""
+    return values.mode().iloc[0]
+
+@profiled()
+def read_source(csv_dir, name, parser=None):
+    """
+    Lê um CSV de origem e mede o tempo de leitura.
+
+    Args:
+        csv_dir (str): Diretório com os CSVs
+        name (str): Chave do arquivo em SOURCE_FILES
+        parser (str): 'c' (padrão do pandas) ou 'pyarrow' (leitor Arrow multi-thread)
+
+    Returns:
+        tuple: (DataFrame, segundos de leitura)
+    """
+    parser = parser or CSV_PARSER
+    options = {}
+    if parser == 'pyarrow':
+        if pyarrow is None:
+            raise ImportError("Leitor 'pyarrow' requer o pacote pyarrow (pip install pyarrow)")
+        options = {'engine': 'pyarrow'}
+        if name in TEXT_COLUMNS:
+            options['dtype'] = {column: str for column in TEXT_COLUMNS[name]}
+
+    start = time.perf_counter()
+    df = pd.read_csv(os.path.join(csv_dir, SOURCE_FILES[name]), **options)
+    return df, time.perf_counter() - start
+
+def source_fingerprint(csv_dir=CSV_DIR):
+    """(tamanho, mtime) de cada CSV de origem; muda quando algum arquivo é alterado"""
+    fingerprint = {}
+    for name, file_name in SOURCE_FILES.items():
+        path = os.path.join(csv_dir, file_name)
+        stat = os.stat(path) if os.path.exists(path) else None
+        fingerprint[name] = [stat.st_size, stat.st_mtime_ns] if stat else None
+    return fingerprint
+
+@profiled()
+def read_sources(csv_dir=CSV_DIR, include_payments=True, parser=None, io_threads=None):
+    """
+    Lê os CSVs de origem concorrentemente e retorna um dict de DataFrames.
+
+    Cada arquivo é lido em uma thread do pool, sobrepondo E/S e parsing entre
+    arquivos; com parser='pyarrow' cada arquivo grande também é lido em paralelo.
+    O tempo de leitura de cada arquivo é exibido.
+    """
+    names = [name for name in SOURCE_FILES if include_payments or name != 'payments']
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=io_threads or IO_THREADS) as executor:
+        futures = {name: executor.submit(read_source, csv_dir, name, parser) for name in names}
+        results = {name: future.result() for name, future in futures.items()}
+    elapsed = time.perf_counter() - start
+
+    print(f"Leitura dos CSVs ({parser or CSV_PARSER}): {elapsed:.2f}s no total")
+    for name, (df, seconds) in results.items():
+        print(f"   • {SOURCE_FILES[name]}: {seconds:.2f}s ({len(df):,} linhas)")
+
+    return {name: df for name, (df, seconds) in results.items()}
+
+@profiled()
+def join_orders_customers(orders_df, customers_df):
+    """Associa cada pedido à UF do cliente"""
+    orders_customers = orders_df.merge(customers_df[['customer_id', 'customer_state']], on='customer_id', how='left')
+    return orders_customers[['order_id', 'customer_state', 'order_status', 'order_purchase_timestamp']]
+
+def merge_item_frame(items_df, products_df, translation_df, orders_customers_df):
+    """Junta itens, categorias e pedidos (sem filtros)"""
+    items_products = items_df.merge(products_df[['product_id', 'product_category_name']], on='product_id', how='left')
+    items_products_trans = items_products.merge(translation_df, on='product_category_name', how='left')
+    return items_products_trans.merge(orders_customers_df, on='order_id', how='left')
+
+def quality_masks(merged_df):
+    """Máscaras cumulativas dos filtros de qualidade (entregue → sem NAs críticos → preço válido)"""
+    delivered = merged_df['order_status'] == 'delivered'
+    complete = delivered & merged_df[['price', 'freight_value', 'product_category_name_english',
+                                      'customer_state']].notna().all(axis=1)
+    valid_price = complete & (merged_df['price'] > 0) & (merged_df['freight_value'] >= 0) & (merged_df['price'] <= 10000)
+    return {'delivered': delivered, 'complete': complete, 'valid_price': valid_price}
+
+def quality_counts(items_df, merged_df):
+    """Contagens de linhas de itens em cada etapa de qualidade (aditivas entre partições)"""
+    masks = quality_masks(merged_df)
+    return {
+        'items_total': len(items_df),
+        'items_missing_product': int(items_df['product_id'].isna().sum()),
+        'items_missing_price': int(items_df['price'].isna().sum()),
+        'merged_records': len(merged_df),
+        'delivered': int(masks['delivered'].sum()),
+        'complete': int(masks['complete'].sum()),
+        'valid_price': int(masks['valid_price'].sum())
+    }
+
+@profiled()
+def build_item_frame(items_df, products_df, translation_df, orders_customers_df):
+    """Junta itens, categorias e pedidos e aplica os filtros de qualidade"""
+    final_df = merge_item_frame(items_df, products_df, translation_df, orders_customers_df)
+    return final_df[quality_masks(final_df)['valid_price']]
+
+@profiled()
+def aggregate_orders(final_df):
+    """Agrega os itens filtrados em uma linha por pedido"""
+    orders_summary = final_df.groupby(['order_id', 'customer_state']).agg({
+        'price': 'sum',
+        'freight_value': 'sum',
+        'order_item_id': 'count',
+        'product_category_name_english': dominant_category,
+        'order_purchase_timestamp': 'first'
+    }).reset_index()
+
+    orders_summary.columns = ['order_id', 'customer_state', 'order_ticket', 'freight_value', 'n_items', 'product_category', 'order_date']
+    return add_freight_ratio(orders_summary)
+
+def add_freight_ratio(orders_summary):
+    """Razão frete/ticket limitada a [0, 1]"""
+    orders_summary['freight_ratio'] = orders_summary['freight_value'] / orders_summary['order_ticket']
+    orders_summary['freight_ratio'] = orders_summary['freight_ratio'].clip(0, 1)
+    return orders_summary
+
+@profiled()
+def aggregate_payments(payments_df):
+    """Agrega os pagamentos por pedido"""
+    return payments_df.groupby('order_id').agg({
+        'payment_type': lambda x: x.mode().iloc[0],
+        'payment_installments': 'mean',
+        'payment_value': 'sum'
+    }).reset_index()
+
+def empty_orders_summary(include_payments=True):
+    """Resumo sem pedidos, com as colunas e tipos do resumo construído"""
+    schema = {**SUMMARY_SCHEMA, **(PAYMENT_SUMMARY_SCHEMA if include_payments else {})}
+    return pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in schema.items()})
+
+@profiled()
+def build_orders_summary_in_memory(csv_dir=CSV_DIR, include_payments=True):
+    """Constrói o resumo por pedido com todos os dados em memória"""
+    sources = read_sources(csv_dir, include_payments)
+
+    orders_customers = join_orders_customers(sources['orders'], sources['customers'])
+    final_df = build_item_frame(sources['items'], sources['products'], sources['translation'], orders_customers)
+    orders_summary = aggregate_orders(final_df)
+
+    if include_payments:
+        orders_summary = orders_summary.merge(aggregate_payments(sources['payments']), on='order_id', how='left')
+
+    return orders_summary
+
+def _duckdb_source(csv_dir, name):
+    # Todas as colunas lidas como texto, como no pandas; tipos numéricos convertidos no plano
+    path = os.path.join(csv_dir, SOURCE_FILES[name]).replace("'", "''")
+    return f"read_csv('{path}', header = true, all_varchar = true)"
+
+@profiled()
+def build_orders_summary_duckdb(csv_dir=CSV_DIR, include_payments=True):
+    """Executa o plano de construção do resumo por pedido no DuckDB (multi-thread)"""
+    if duckdb is None:
+        raise ImportError("Motor 'duckdb' requer o pacote duckdb (pip install duckdb)")
+
+    query = f"""
+        WITH orders_customers AS (
+            SELECT o.order_id, c.customer_state, o.order_status, o.order_purchase_timestamp
+            FROM {_duckdb_source(csv_dir, 'orders')} o
+            LEFT JOIN {_duckdb_source(csv_dir, 'customers')} c USING (customer_id)
+        ),
+        final AS (
+            SELECT i.order_id, oc.customer_state,
+                   CAST(i.price AS DOUBLE) AS price,
+                   CAST(i.freight_value AS DOUBLE) AS freight_value,
+                   i.order_item_id,
+                   t.product_category_name_english AS category,
+                   oc.order_purchase_timestamp
+            FROM {_duckdb_source(csv_dir, 'items')} i
+            LEFT JOIN {_duckdb_source(csv_dir, 'products')} p USING (product_id)
+            LEFT JOIN {_duckdb_source(csv_dir, 'translation')} t USING (product_category_name)
+            LEFT JOIN orders_customers oc USING (order_id)
+            WHERE oc.order_status = 'delivered'
+              AND CAST(i.price AS DOUBLE) > 0
+              AND CAST(i.price AS DOUBLE) <= 10000
+              AND CAST(i.freight_value AS DOUBLE) >= 0
+              AND t.product_category_name_english IS NOT NULL
+              AND oc.customer_state IS NOT NULL
+        ),
+        category_counts AS (
+            SELECT order_id, customer_state, category, COUNT(*) AS n,
+                   ROW_NUMBER() OVER (PARTITION BY order_id, customer_state ORDER BY COUNT(*) DESC, category) AS position
+            FROM final
+            GROUP BY order_id, customer_state, category
+        )
+        SELECT f.order_id, f.customer_state,
+               SUM(f.price) AS order_ticket,
+               SUM(f.freight_value) AS freight_value,
+               COUNT(f.order_item_id) AS n_items,
+               ANY_VALUE(d.category) AS product_category,
+               MIN(f.order_purchase_timestamp) AS order_date
+        FROM final f
+        JOIN category_counts d ON d.order_id = f.order_id AND d.customer_state = f.customer_state AND d.position = 1
+        GROUP BY f.order_id, f.customer_state
+        ORDER BY f.order_id, f.customer_state
+    """
+    orders_summary = add_freight_ratio(duckdb.sql(query).df())
+
+    if include_payments:
+        payments_query = f"""
+            WITH payments AS (
+                SELECT order_id, payment_type,
+                       CAST(payment_installments AS DOUBLE) AS payment_installments,
+                       CAST(payment_value AS DOUBLE) AS payment_value
+                FROM {_duckdb_source(csv_dir, 'payments')}
+            ),
+            type_counts AS (
+                SELECT order_id, payment_type,
+                       ROW_NUMBER() OVER (PARTITION BY order_id ORDER BY COUNT(*) DESC, payment_type) AS position
+                FROM payments
+                GROUP BY order_id, payment_type
+            )
+            SELECT p.order_id,
+                   ANY_VALUE(t.payment_type) AS payment_type,
+                   AVG(p.payment_installments) AS payment_installments,
+                   SUM(p.payment_value) AS payment_value
+            FROM payments p
+            JOIN type_counts t ON t.order_id = p.order_id AND t.position = 1
+            GROUP BY p.order_id
+        """
+        orders_summary = orders_summary.merge(duckdb.sql(payments_query).df(), on='order_id', how='left')
+
+    return orders_summary
+
+def _dominant(frame, keys, column):
+    """Valor mais frequente de column por grupo (empates em ordem alfabética), em Polars"""
+    return (frame.group_by(keys + [column]).len()
+            .group_by(keys)
+            .agg(pl.col(column).sort_by(['len', column], descending=[True, False]).first()))
+
+def _polars_to_pandas(frame):
+    """Conversão coluna a coluna (DataFrame.to_pandas exigiria pyarrow)"""
+    return pd.DataFrame({column: frame[column].to_numpy() for column in frame.columns})
+
+@profiled()
+def build_orders_summary_polars(csv_dir=CSV_DIR, include_payments=True):
+    """Executa o plano de construção do resumo por pedido no Polars (lazy, multi-thread)"""
+    if pl is None:
+        raise ImportError("Motor 'polars' requer o pacote polars (pip install polars)")
+
+    def source(name):
+        return pl.scan_csv(os.path.join(csv_dir, SOURCE_FILES[name]), infer_schema=False)
+
+    keys = ['order_id', 'customer_state']
+
+    orders_customers = (source('orders')
+                        .join(source('customers').select(['customer_id', 'customer_state']),
+                              on='customer_id', how='left')
+                        .select(['order_id', 'customer_state', 'order_status', 'order_purchase_timestamp']))
+
+    final = (source('items')
+             .with_columns(pl.col('price').cast(pl.Float64), pl.col('freight_value').cast(pl.Float64))
+             .join(source('products').select(['product_id', 'product_category_name']), on='product_id', how='left')
+             .join(source('translation'), on='product_category_name', how='left')
+             .join(orders_customers, on='order_id', how='left')
+             .filter((pl.col('order_status') == 'delivered') &
+                     (pl.col('price') > 0) &
+                     (pl.col('price') <= 10000) &
+                     (pl.col('freight_value') >= 0) &
+                     pl.col('product_category_name_english').is_not_null() &
+                     pl.col('customer_state').is_not_null())
+             .rename({'product_category_name_english': 'product_category'}))
+
+    orders = (final.group_by(keys)
+              .agg(pl.col('price').sum().alias('order_ticket'),
+                   pl.col('freight_value').sum(),
+                   pl.col('order_item_id').count().cast(pl.Int64).alias('n_items'),
+                   pl.col('order_purchase_timestamp').min().alias('order_date'))
+              .join(_dominant(final, keys, 'product_category'), on=keys, how='left')
+              .select(['order_id', 'customer_state', 'order_ticket', 'freight_value', 'n_items',
+                       'product_category', 'order_date'])
+              .sort(keys))
+
+    orders_summary = add_freight_ratio(_polars_to_pandas(orders.collect()))
+
+    if include_payments:
+        payments = (source('payments')
+                    .with_columns(pl.col('payment_installments').cast(pl.Float64),
+                                  pl.col('payment_value').cast(pl.Float64)))
+        payments_summary = (payments.group_by('order_id')
+                            .agg(pl.col('payment_installments').mean(), pl.col('payment_value').sum())
+                            .join(_dominant(payments, ['order_id'], 'payment_type'), on='order_id', how='left')
+                            .select(['order_id', 'payment_type', 'payment_installments', 'payment_value']))
+        orders_summary = orders_summary.merge(_polars_to_pandas(payments_summary.collect()), on='order_id', how='left')
+
+    return orders_summary
+
+# Motores disponíveis para o mesmo plano lógico de construção
+ENGINES = {
+    'pandas': build_orders_summary_in_memory,
+    'duckdb': build_orders_summary_duckdb,
+    'polars': build_orders_summary_polars
+}
+
+def available_engines():
+    """Motores cujos pacotes estão instalados"""
+    installed = {'pandas': True, 'duckdb': duckdb is not None, 'polars': pl is not None}
+    return [name for name in ENGINES if installed[name]]
+
+def _partition_of(keys, n_partitions):
+    """Partição de cada chave (hash estável entre processos)"""
+    return pd.util.hash_pandas_object(keys, index=False).to_numpy() % n_partitions
+
+def _spill_file(spill_dir, table, partition, piece):
+    return os.path.join(spill_dir, f'{table}_p{partition:04d}_c{piece:06d}.pkl')
+
+def _spill(df, key, table, spill_dir, n_partitions, piece):
+    """Grava um bloco de linhas distribuído em arquivos por partição"""
+    for partition, part_df in df.groupby(_partition_of(df[key], n_partitions), sort=False):
+        part_df.to_pickle(_spill_file(spill_dir, table, partition, piece))
+
+def _spill_csv(csv_path, columns, key, table, spill_dir, n_partitions, chunksize):
+    """Lê um CSV em blocos e o particiona em disco pela chave informada"""
+    reader = pd.read_csv(csv_path, usecols=columns, chunksize=chunksize)
+    for piece, chunk in enumerate(reader):
+        _spill(chunk, key, table, spill_dir, n_partitions, piece)
+
+def _read_partition(spill_dir, table, partition, columns):
+    """Lê todos os blocos de uma partição, na ordem original das linhas"""
+    files = sorted(glob.glob(os.path.join(spill_dir, f'{table}_p{partition:04d}_c*.pkl')))
+    if not files:
+        return pd.DataFrame(columns=columns)
+    return pd.concat([pd.read_pickle(f) for f in files], ignore_index=True)
+
+def _join_orders_partition(spill_dir, partition, n_partitions):
+    """Junta pedidos e clientes de uma partição por customer_id e reparticiona por order_id"""
+    orders_df = _read_partition(spill_dir, 'orders_by_customer', partition, SOURCE_COLUMNS['orders'])
+    customers_df = _read_partition(spill_dir, 'customers_by_customer', partition, SOURCE_COLUMNS['customers'])
+
+    orders_customers = join_orders_customers(orders_df, customers_df)
+    _spill(orders_customers, 'order_id', 'orders_customers', spill_dir, n_partitions, partition)
+
+def _aggregate_partition(spill_dir, partition, include_payments):
+    """Junta e agrega os pedidos de uma partição de order_id; devolve (resumo ou None, contagens)"""
+    items_df = _read_partition(spill_dir, 'items', partition, SOURCE_COLUMNS['items'])
+    if items_df.empty:
+        return None, {}
+
+    products_df = pd.read_pickle(os.path.join(spill_dir, 'products.pkl'))
+    translation_df = pd.read_pickle(os.path.join(spill_dir, 'translation.pkl'))
+    orders_customers = _read_partition(spill_dir, 'orders_customers', partition,
+                                       ['order_id', 'customer_state', 'order_status', 'order_purchase_timestamp'])
+
+    merged_df = merge_item_frame(items_df, products_df, translation_df, orders_customers)
+    counts = quality_counts(items_df, merged_df)
+    final_df = merged_df[quality_masks(merged_df)['valid_price']]
+    if final_df.empty:
+        return None, counts
+    orders_summary = aggregate_orders(final_df)
+
+    if include_payments:
+        payments_df = _read_partition(spill_dir, 'payments', partition, SOURCE_COLUMNS['payments'])
+        orders_summary = orders_summary.merge(aggregate_payments(payments_df), on='order_id', how='left')
+
+    return orders_summary, counts
+
+@profiled()
+def build_orders_summary_chunked(csv_dir=CSV_DIR, include_payments=True, n_partitions=N_PARTITIONS,
+                                 n_workers=N_WORKERS, spill_dir=SPILL_DIR, chunksize=CHUNK_SIZE, return_counts=False):
+    """
+    Constrói o resumo por pedido fora da memória (out-of-core).
+
+    Os CSVs são lidos em blocos e particionados por hash em arquivos temporários:
+    pedidos e clientes por customer_id (para obter a UF) e, em seguida, itens,
+    pedidos+clientes e pagamentos por order_id. Cada partição é juntada e agregada
+    de forma independente, opcionalmente em paralelo, e os resultados são
+    concatenados. O pico de memória depende do tamanho da partição, não do total.
+
+    Args:
+        csv_dir (str): Diretório com os CSVs de origem
+        include_payments (bool): Incluir agregados de pagamento
+        n_partitions (int): Número de partições por hash
+        n_workers (int): Processos usados para agregar as partições
+        spill_dir (str): Diretório dos arquivos temporários (None = diretório temporário do sistema)
+        chunksize (int): Linhas por bloco de leitura dos CSVs
+        return_counts (bool): Devolver também as contagens de itens por etapa de qualidade
+
+    Returns:
+        pd.DataFrame: Resumo por pedido, idêntico ao do modo em memória
+        (ou tupla (resumo, contagens) com return_counts=True)
+    """
+    own_spill_dir = spill_dir is None
+    spill_dir = tempfile.mkdtemp(prefix='olist_spill_') if own_spill_dir else spill_dir
+    os.makedirs(spill_dir, exist_ok=True)
+
+    def source(name):
+        return os.path.join(csv_dir, SOURCE_FILES[name])
+
+    try:
+        # Tabelas de dimensão pequenas (catálogo de produtos) são replicadas em cada partição
+        pd.read_csv(source('products'), usecols=['product_id', 'product_category_name']).to_pickle(
+            os.path.join(spill_dir, 'products.pkl'))
+        pd.read_csv(source('translation')).to_pickle(os.path.join(spill_dir, 'translation.pkl'))
+
+        # Fase 1: pedidos e clientes particionados por customer_id
+        _spill_csv(source('orders'), SOURCE_COLUMNS['orders'], 'customer_id', 'orders_by_customer',
+                   spill_dir, n_partitions, chunksize)
+        _spill_csv(source('customers'), SOURCE_COLUMNS['customers'], 'customer_id', 'customers_by_customer',
+                   spill_dir, n_partitions, chunksize)
+
+        # Fase 2: itens e pagamentos particionados por order_id
+        _spill_csv(source('items'), SOURCE_COLUMNS['items'], 'order_id', 'items',
+                   spill_dir, n_partitions, chunksize)
+        if include_payments:
+            _spill_csv(source('payments'), SOURCE_COLUMNS['payments'], 'order_id', 'payments',
+                       spill_dir, n_partitions, chunksize)
+
+        partitions = range(n_partitions)
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            # Fase 3: UF do cliente por pedido, reparticionada por order_id
+            list(executor.map(_join_orders_partition, [spill_dir] * n_partitions, partitions,
+                              [n_partitions] * n_partitions))
+
+            # Fase 4: junção e agregação independentes por partição de order_id
+            results = list(executor.map(_aggregate_partition, [spill_dir] * n_partitions, partitions,
+                                        [include_payments] * n_partitions))
+    finally:
+        if own_spill_dir:
+            shutil.rmtree(spill_dir, ignore_errors=True)
+
+    # Nenhuma partição com pedidos válidos: resumo vazio com o esquema do modo em memória
+    summaries = [summary for summary, counts in results if summary is not None]
+    orders_summary = pd.concat(summaries, ignore_index=True) if summaries else empty_orders_summary(include_payments)
+
+    # Mesma ordenação do groupby em memória
+    orders_summary = orders_summary.sort_values(['order_id', 'customer_state']).reset_index(drop=True)
+    if not return_counts:
+        return orders_summary
+
+    counts = pd.DataFrame([counts for summary, counts in results if counts]).sum().astype(int).to_dict()
+    return orders_summary, counts
+
+def plan_orders_summary(csv_dir=CSV_DIR, include_payments=True, budget=MEMORY_BUDGET,
+                        n_partitions=N_PARTITIONS, n_workers=N_WORKERS, chunksize=CHUNK_SIZE):
+    """
+    Estima o pico de memória da construção em memória e escolhe o modo de execução.
+
+    Returns:
+        dict: Plano de memory_budget.plan_execution ('memory' ou 'chunked')
+    """
+    names = [name for name in SOURCE_FILES if include_payments or name != 'payments']
+    footprint = estimate_footprint({name: os.path.join(csv_dir, SOURCE_FILES[name]) for name in names})
+    return plan_execution(footprint, budget, n_partitions, n_workers, chunksize)
+
+@profiled()
+def build_orders_summary(csv_dir=CSV_DIR, include_payments=True, mode=None, engine=None, sample=None, **kwargs):
+    """
+    Constrói o resumo por pedido (order_id, UF, ticket, frete, itens, categoria, data).
+
+    Args:
+        csv_dir (str): Diretório com os CSVs de origem
+        include_payments (bool): Incluir payment_type, payment_installments e payment_value
+        mode (str): 'auto', 'memory', 'chunked' ou 'spill' (padrão: variável OLIST_BUILD_MODE).
+            'auto' estima o pico de memória e escolhe o modo que respeita OLIST_MEMORY_BUDGET;
+            'spill' é sinônimo de 'chunked' com um único processo
+        engine (str): Motor do modo em memória: 'pandas', 'duckdb' ou 'polars' (padrão: OLIST_ENGINE)
+        sample (float): Fração da amostra estratificada por UF × categoria × mês (0 ou None =
+            base completa; os scripts repassam a opção --sample, ver sample_fraction_option)
+        **kwargs: Opções do modo particionado (n_partitions, n_workers, spill_dir, chunksize)
+
+    Returns:
+        pd.DataFrame: Uma linha por pedido entregue (com sample_weight quando amostrado)
+    """
+    mode = mode or BUILD_MODE
+    engine = engine or ENGINE
+
+    if sample:
+        orders_summary = build_orders_summary(csv_dir, include_payments, mode, engine, sample=0, **kwargs)
+        orders_summary = stratified_sample(orders_summary, sample)
+        info = orders_summary.attrs['sample']
+        print(f"Amostra estratificada: {len(orders_summary):,} de {info['population']:,} pedidos "
+              f"(fração pedida {sample:.1%}, efetiva {info['effective_fraction']:.1%}; {info['strata']:,} "
+              f"estratos UF × categoria × mês, agrupados abaixo de {info['min_stratum_size']} pedidos)")
+        return orders_summary
+
+    if mode == 'auto' and MEMORY_BUDGET is None:
+        # Sem orçamento 'auto' equivale a 'memory': nada a planejar (os CSVs não são amostrados)
+        mode = 'memory'
+    if mode == 'auto':
+        plan = plan_orders_summary(csv_dir, include_payments)
+        log_plan(plan, 'resumo por pedido')
+        rss_before = peak_rss_bytes()
+        if plan['mode'] == 'memory':
+            orders_summary = build_orders_summary(csv_dir, include_payments, 'memory', engine, sample=0)
+        else:
+            options = {key: plan[key] for key in ['n_partitions', 'n_workers', 'chunksize']}
+            options.update(kwargs)
+            orders_summary = build_orders_summary(csv_dir, include_payments, 'chunked', sample=0, **options)
+        log_peak(plan, 'resumo por pedido', rss_before)
+        return orders_summary
+
+    if mode == 'memory':
+        if engine not in ENGINES:
+            raise ValueError(f"Motor de execução desconhecido: {engine}")
+        return ENGINES[engine](csv_dir, include_payments)
+    if mode == 'spill':
+        kwargs['n_workers'] = 1
+        mode = 'chunked'
+    if mode == 'chunked':
+        print(f"Construção particionada: {kwargs.get('n_partitions', N_PARTITIONS)} partições, "
+              f"{kwargs.get('n_workers', N_WORKERS)} processo(s)")
+        return build_orders_summary_chunked(csv_dir, include_payments, **kwargs)
+
+    raise ValueError(f"Modo de construção desconhecido: {mode}")
@@ -0,0 +1,211 @@
+import os
+import time
+import json
+import atexit
+import functools
+import threading
+import tracemalloc
+
+# Perfilamento ligado por variável de ambiente (desligado: decoradores não envolvem a função)
+PROFILE_ENABLED = os.getenv('OLIST_PROFILE', '').lower() not in ('', '0', 'false', 'no')
+PROFILE_OUTPUT = os.getenv('OLIST_PROFILE_OUTPUT', 'profile_trace.json')
+
+# Spans concluídos, spans abertos (todas as threads) e pilha de spans abertos (por thread)
+_events = []
+_events_lock = threading.Lock()
+_open_spans = []
+_local = threading.local()
+_origin = time.perf_counter()
+
+class _NullSpan:
+    """Span sem efeito usado quando o perfilamento está desligado"""
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class Span:
+    """
+    Intervalo medido: tempo de parede, tempo de CPU, pico de memória e linhas processadas.
+
+    O pico vem do tracemalloc, que tem um único contador para o processo; cada span
+    aberto (em qualquer thread) acumula o maior pico visto enquanto esteve aberto, e
+    o contador é zerado na entrada e na saída de cada span, então spans aninhados ou
+    concorrentes não se atrapalham. Com threads, o pico inclui a memória alocada
+    pelas demais threads no mesmo intervalo.
+    """
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+
+    def __enter__(self):
+        with _events_lock:
+            _observe_peak()
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+            self.peak = self.memory_start
+            _open_spans.append(self)
+        stack = _stack()
+        stack.append(self)
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        with _events_lock:
+            _observe_peak()
+            _open_spans.remove(self)
+        stack = _stack()
+        stack.remove(self)
+
+        event = {
+            'name': self.name,
+            'start_s': self.wall_start - _origin,
+            'wall_s': wall,
+            'cpu_s': cpu,
+            'peak_mb': max(self.peak - self.memory_start, 0) / 1024 ** 2,
+            'rows': self.rows,
+            'depth': len(stack),
+            'pid': os.getpid(),
+            'tid': threading.get_ident()
+        }
+        with _events_lock:
+            _events.append(event)
+        return False
+
+def _stack():
+    if not hasattr(_local, 'stack'):
+        _local.stack = []
+    return _local.stack
+
+def _observe_peak():
+    """Propaga o pico atual do tracemalloc para todos os spans abertos e zera o contador"""
+    peak = tracemalloc.get_traced_memory()[1]
+    for span in _open_spans:
+        span.peak = max(span.peak, peak)
+    tracemalloc.reset_peak()
+
+def _count_rows(result):
+    """Linhas do resultado (DataFrame, array ou tupla iniciada por um deles)"""
+    if isinstance(result, tuple) and result:
+        result = result[0]
+    if hasattr(result, 'shape') and len(getattr(result, 'shape', ())) > 0:
+        return int(result.shape[0])
+    return None
+
+def _input_rows(args):
+    """Linhas do primeiro argumento com formato tabular (para funções sem retorno)"""
+    for arg in args:
+        rows = _count_rows(arg)
+        if rows is not None:
+            return rows
+    return None
+
+def span(name, rows=None):
+    """
+    Context manager que mede um trecho de código.
+
+    Uso:
+        with span('merge_items') as s:
+            ...
+            s.rows = len(df)
+    """
+    if not PROFILE_ENABLED:
+        return _NULL_SPAN
+    _start_tracing()
+    return Span(name, rows)
+
+def profiled(name=None):
+    """
+    Decorador que mede cada chamada da função.
+
+    As linhas processadas são as do resultado quando ele é tabular, senão as do
+    primeiro argumento tabular. Com o perfilamento desligado, devolve a própria
+    função (custo zero).
+    """
+    def decorator(func):
+        if not PROFILE_ENABLED:
+            return func
+
+        module = os.path.splitext(os.path.basename(func.__code__.co_filename))[0]
+        span_name = name or f'{module}.{func.__qualname__}'
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            _start_tracing()
+            with Span(span_name) as s:
+                result = func(*args, **kwargs)
+                s.rows = _count_rows(result)
+                if s.rows is None:
+                    s.rows = _input_rows(args)
+            return result
+        return wrapper
+    return decorator
+
+def _start_tracing():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+
+def summary_table():
+    """Tabela agregada por span: chamadas, tempos totais, maior pico e linhas"""
+    import pandas as pd
+
+    with _events_lock:
+        events = pd.DataFrame(_events)
+    if events.empty:
+        return events
+
+    table = events.groupby('name').agg(
+        calls=('name', 'size'),
+        wall_s=('wall_s', 'sum'),
+        cpu_s=('cpu_s', 'sum'),
+        max_peak_mb=('peak_mb', 'max'),
+        rows=('rows', 'sum')
+    )
+    return table.sort_values('wall_s', ascending=False)
+
+def export_chrome_trace(path=PROFILE_OUTPUT):
+    """
+    Grava os spans no formato Chrome trace-event (abrir em chrome://tracing ou Perfetto).
+
+    Cada span vira um evento completo ('X') com CPU, pico de memória e linhas em args.
+    """
+    with _events_lock:
+        events = list(_events)
+
+    trace = [{
+        'name': event['name'],
+        'cat': 'olist',
+        'ph': 'X',
+        'ts': event['start_s'] * 1e6,
+        'dur': event['wall_s'] * 1e6,
+        'pid': event['pid'],
+        'tid': event['tid'],
+        'args': {
+            'cpu_ms': round(event['cpu_s'] * 1000, 3),
+            'peak_mb': round(event['peak_mb'], 3),
+            'rows': event['rows']
+        }
+    } for event in events]
+
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f)
+    return path
+
+def _report():
+    if not _events:
+        return
+    path = export_chrome_trace()
+    print("\n=== PERFIL DE EXECUÇÃO (OLIST_PROFILE) ===")
+    print(summary_table().round(3).to_string())
+    print(f"Trace salvo em {path}")
+
+if PROFILE_ENABLED:
+    atexit.register(_report)
@@ -0,0 +1,220 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+
+# Estratos da amostra: UF × categoria × mês da compra
+STRATA_COLUMNS = ['customer_state', 'product_category', 'order_month']
+
+# Semente da seleção (mesma semente e fração → mesma amostra)
+SAMPLE_SEED = int(os.getenv('OLIST_SAMPLE_SEED', '42'))
+
+# Pedidos sorteados no mínimo por estrato: estratos menores que MIN_STRATUM_SAMPLE / fração
+# são agrupados, para que a variância de cada estrato seja estimável
+MIN_STRATUM_SAMPLE = int(os.getenv('OLIST_MIN_STRATUM_SAMPLE', '2'))
+
+# Quantil normal do intervalo de confiança de 95%
+Z_95 = 1.959963984540054
+
+def sample_fraction_option(argv=None):
+    """
+    Fração de amostragem pedida: '--sample 0.1' (ou '--sample=0.1') na linha de
+    comando, senão a variável OLIST_SAMPLE. Sem opção (ou 1) = base completa.
+
+    Lida apenas nos blocos __main__ dos scripts, que repassam a fração a
+    build_orders_summary(sample=...); a biblioteca não consulta sys.argv.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    value = os.getenv('OLIST_SAMPLE')
+    for i, arg in enumerate(argv):
+        if arg == '--sample' and i + 1 < len(argv):
+            value = argv[i + 1]
+        elif arg.startswith('--sample='):
+            value = arg.split('=', 1)[1]
+
+    if value in (None, ''):
+        return None
+    fraction = float(value)
+    if not 0 < fraction <= 1:
+        raise ValueError(f"Fração de amostragem deve estar em (0, 1]: {value}")
+    return None if fraction == 1 else fraction
+
+def _strata_keys(orders_summary):
+    month = pd.to_datetime(orders_summary['order_date']).dt.to_period('M').astype(str)
+    return orders_summary.assign(order_month=month)[STRATA_COLUMNS]
+
+def collapse_strata(keys, min_size):
+    """
+    Rótulo do estrato de cada pedido, agrupando estratos com menos de min_size pedidos.
+
+    Estratos pequenos de UF × categoria × mês são reunidos em UF × categoria
+    (sobras de todos os meses), os que continuam pequenos em UF e o restante em
+    um único estrato. Assim cada estrato tem pedidos suficientes para sortear
+    MIN_STRATUM_SAMPLE e estimar a variância (sem estratos de um só pedido).
+    """
+    remaining = np.ones(len(keys), dtype=bool)
+    labels = np.empty(len(keys), dtype=object)
+    combined = pd.Series('', index=keys.index)
+    prefixes = ['']
+    for column in STRATA_COLUMNS:
+        combined = combined + '|' + keys[column].astype(str).fillna('')
+        prefixes.append(combined)
+    for depth in range(len(STRATA_COLUMNS), -1, -1):
+        candidate = (f'{depth}:' + prefixes[depth]) if depth else pd.Series('0:', index=keys.index)
+        pending = candidate[remaining]
+        sizes = pending.map(pending.value_counts()).to_numpy()
+        accept = np.zeros(len(keys), dtype=bool)
+        accept[remaining] = (sizes >= min_size) if depth else True
+        labels[accept] = candidate[accept].to_numpy()
+        remaining &= ~accept
+    return labels
+
+def stratified_sample(orders_summary, fraction, seed=SAMPLE_SEED):
+    """
+    Amostra estratificada determinística (UF × categoria × mês) do resumo por pedido.
+
+    Estratos com menos de MIN_STRATUM_SAMPLE / fraction pedidos são agrupados
+    (collapse_strata); em cada estrato com N_h pedidos são mantidos
+    n_h = min(N_h, max(MIN_STRATUM_SAMPLE, round(fraction × N_h))) pedidos: os de
+    menor hash de (order_id, semente), então a amostra não depende da ordem das
+    linhas nem do modo de construção. A fração efetiva (n / N) fica em
+    attrs['sample']['effective_fraction'].
+
+    Colunas adicionadas:
+        sample_stratum: identificador do estrato (após o agrupamento)
+        stratum_size: N_h (pedidos do estrato na base completa)
+        sample_weight: N_h / n_h (peso de expansão; médias e proporções ponderadas
+            são não viesadas)
+
+    Returns:
+        pd.DataFrame: Amostra, na ordem original das linhas
+    """
+    min_size = int(np.ceil(MIN_STRATUM_SAMPLE / fraction))
+    labels = collapse_strata(_strata_keys(orders_summary), min_size)
+    stratum = pd.factorize(labels, sort=True)[0]
+    order_hash = pd.util.hash_pandas_object(orders_summary['order_id'].astype(str) + f'#{seed}',
+                                            index=False).to_numpy()
+
+    stratum_size = np.bincount(stratum)
+    stratum_sample = np.minimum(np.maximum(np.round(fraction * stratum_size).astype(int), MIN_STRATUM_SAMPLE),
+                                stratum_size)
+
+    # Posição de cada pedido dentro do estrato, pela ordem do hash
+    order = np.lexsort((order_hash, stratum))
+    rank = np.empty(len(order), dtype=np.int64)
+    starts = np.concatenate([[0], np.cumsum(stratum_size)[:-1]])
+    rank[order] = np.arange(len(order)) - np.repeat(starts, stratum_size)
+
+    selected = rank < stratum_sample[stratum]
+    sample = orders_summary[selected].copy()
+    sample['sample_stratum'] = stratum[selected]
+    sample['stratum_size'] = stratum_size[stratum[selected]]
+    sample['sample_weight'] = sample['stratum_size'] / stratum_sample[stratum[selected]]
+
+    sample.attrs['sample'] = {
+        'fraction': fraction,
+        'effective_fraction': len(sample) / len(orders_summary) if len(orders_summary) else 0.0,
+        'seed': seed,
+        'population': len(orders_summary),
+        'strata': len(stratum_size),
+        'min_stratum_size': min_size
+    }
+    return sample.reset_index(drop=True)
+
+def is_sample(df):
+    return 'sample_weight' in df.columns
+
+def stratified_estimate(df, values, domain=None):
+    """
+    Estimativa estratificada da média de values e seu erro padrão.
+
+    Média ponderada pelos pesos de expansão (estimador de razão Σ w y / Σ w) e
+    variância linearizada de amostragem estratificada aleatória simples:
+    z_i = (y_i - média) / N̂ nos pedidos do domínio (0 fora dele) e
+    Var = Σ N_h² (1 - n_h/N_h) s²_z,h / n_h. Na população inteira equivale a
+    Σ (N_h/N)² (1 - n_h/N_h) s_h² / n_h. O domínio (p.ex. uma UF) pode cortar
+    estratos agrupados; por isso a amostra inteira é passada junto com a máscara.
+    Para proporções, values é um indicador 0/1.
+
+    Args:
+        df (pd.DataFrame): Amostra (com sample_stratum, stratum_size e sample_weight)
+        values (pd.Series | str): Valores (ou nome da coluna) alinhados a df
+        domain (pd.Series): Máscara booleana do domínio (None = amostra inteira)
+
+    Returns:
+        dict: estimate, std_error, ci_low, ci_high, n (amostra) e population (N estimado)
+    """
+    values = (df[values] if isinstance(values, str) else values).astype(float)
+    member = values.notna().to_numpy(copy=True)
+    if domain is not None:
+        member &= np.asarray(domain, dtype=bool)
+    if not member.any():
+        return {'estimate': np.nan, 'std_error': np.nan, 'ci_low': np.nan, 'ci_high': np.nan,
+                'n': 0, 'population': 0}
+
+    weights = df['sample_weight'].to_numpy(dtype=float)
+    y = values.to_numpy()
+    population = weights[member].sum()
+    estimate = np.sum(weights[member] * y[member]) / population
+
+    z = np.zeros(len(df))
+    z[member] = (y[member] - estimate) / population
+    strata = pd.DataFrame({'stratum': df['sample_stratum'].to_numpy(), 'N': df['stratum_size'].to_numpy(),
+                           'z': z}).groupby('stratum').agg(N=('N', 'first'), n=('z', 'size'), var=('z', 'var'))
+
+    # Estratos de um só pedido sobram apenas quando N_h = 1 (correção finita nula)
+    finite_correction = 1 - strata['n'] / strata['N']
+    variance = (strata['N'] ** 2 * finite_correction * strata['var'].fillna(0) / strata['n']).sum()
+    std_error = np.sqrt(variance)
+    return {
+        'estimate': estimate,
+        'std_error': std_error,
+        'ci_low': estimate - Z_95 * std_error,
+        'ci_high': estimate + Z_95 * std_error,
+        'n': int(member.sum()),
+        'population': int(round(population))
+    }
+
+def sampling_error_table(df, variables, by=None):
+    """
+    Tabela de médias estimadas com intervalo de 95% por grupo (ou geral).
+
+    Args:
+        df (pd.DataFrame): Amostra estratificada
+        variables (list): Colunas numéricas (médias) ou indicadoras (proporções)
+        by (str): Coluna de agrupamento (UF ou categoria; cada grupo é um domínio da amostra inteira)
+
+    Returns:
+        pd.DataFrame: Uma linha por grupo e variável
+    """
+    groups = [('geral', None)] if by is None else [(name, df[by] == name) for name in df[by].dropna().unique()]
+    rows = []
+    for name, domain in groups:
+        for variable in variables:
+            result = stratified_estimate(df, variable, domain)
+            rows.append({'group': name, 'variable': variable, **result})
+    return pd.DataFrame(rows)
+
+def print_unweighted_notice(df):
+    """Avisa que as estatísticas e testes seguintes usam a amostra sem os pesos de expansão"""
+    if is_sample(df):
+        print("(Amostra estratificada: estatísticas e testes abaixo NÃO ponderados; "
+              "médias ponderadas com IC 95% nas estimativas da amostra)")
+
+def print_sampling_report(df, variables, by=None, top=None):
+    """Exibe as estimativas ponderadas com margem de erro (somente para amostras)"""
+    if not is_sample(df):
+        return
+    info = df.attrs.get('sample', {})
+    table = sampling_error_table(df, variables, by)
+    if by is not None and top is not None:
+        keep = df[by].value_counts().head(top).index
+        table = table[table['group'].isin(keep)]
+
+    print(f"\nESTIMATIVAS DA AMOSTRA ESTRATIFICADA (fração pedida {info.get('fraction', 0):.1%}, "
+          f"efetiva {info.get('effective_fraction', 0):.1%} de {info.get('population', 0):,} pedidos, "
+          f"{info.get('strata', 0):,} estratos, IC 95%):")
+    for row in table.itertuples():
+        margin = Z_95 * row.std_error
+        print(f"   {str(row.group):<15} {row.variable:<15} {row.estimate:10.4f} ± {margin:.4f} "
+              f"[{row.ci_low:.4f}, {row.ci_high:.4f}] (n={row.n:,})")
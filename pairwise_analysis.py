@@ -1,57 +1,21 @@
 import pandas as pd
 import numpy as np
-from scipy.stats import mannwhitneyu
 from itertools import combinations
 import warnings
+from olist_dataset import build_orders_summary
+from olist_profiling import profiled
+from olist_sampling import sample_fraction_option
+from lazy_imports import lazy_attribute
 warnings.filterwarnings('ignore')
 
-def load_data():
+# scipy.stats carregado só no primeiro teste
+mannwhitneyu = lazy_attribute('scipy.stats', 'mannwhitneyu')
+
+@profiled()
+def load_data(sample=None):
     """Carrega e prepara os dados"""
-    # Carregar datasets
-    items_df = pd.read_csv('olist-csv/olist_order_items_dataset.csv')
-    products_df = pd.read_csv('olist-csv/olist_products_dataset.csv')
-    translation_df = pd.read_csv('olist-csv/product_category_name_translation.csv')
-    orders_df = pd.read_csv('olist-csv/olist_orders_dataset.csv')
-    customers_df = pd.read_csv('olist-csv/olist_customers_dataset.csv')
-    payments_df = pd.read_csv('olist-csv/olist_order_payments_dataset.csv')
-    
-    # Merge dos dados
-    items_products = items_df.merge(products_df[['product_id', 'product_category_name']], on='product_id', how='left')
-    items_products_trans = items_products.merge(translation_df, on='product_category_name', how='left')
-    orders_customers = orders_df.merge(customers_df[['customer_id', 'customer_state']], on='customer_id', how='left')
-    
-    final_df = items_products_trans.merge(
-        orders_customers[['order_id', 'customer_state', 'order_status', 'order_purchase_timestamp']], 
-        on='order_id', how='left'
-    )
-    
-    # Filtros de qualidade
-    final_df = final_df[
-        (final_df['order_status'] == 'delivered') &
-        (final_df['price'] > 0) &
-        (final_df['price'] <= 10000) &
-        (final_df['freight_value'] >= 0) &
-        (final_df['product_category_name_english'].notna()) &
-        (final_df['customer_state'].notna())
-    ]
-    
-    # Agregação por pedido
-    orders_summary = final_df.groupby(['order_id', 'customer_state']).agg({
-        'price': 'sum',
-        'freight_value': 'sum',
-        'order_item_id': 'count',
-        'product_category_name_english': lambda x: x.mode().iloc[0],
-        'order_purchase_timestamp': 'first'
-    }).reset_index()
-    
-    orders_summary.columns = ['order_id', 'customer_state', 'order_ticket', 'freight_value', 'n_items', 'product_category', 'order_date']
-    
-    # Adicionar dados de pagamento
-    payments_summary = payments_df.groupby('order_id').agg({
-        'payment_type': lambda x: x.mode().iloc[0]
-    }).reset_index()
-    
-    orders_summary = orders_summary.merge(payments_summary, on='order_id', how='left')
+    # Resumo por pedido (itens, categorias, UF e pagamentos)
+    orders_summary = build_orders_summary(sample=sample)
     
     # Criar variáveis temporais
     orders_summary['order_date'] = pd.to_datetime(orders_summary['order_date'])
@@ -87,6 +51,7 @@ def load_data():
     
     return orders_summary
 
+@profiled()
 def pairwise_states(df):
     """Análise combinatória para estados"""
     print("ANÁLISE COMBINATÓRIA: ESTADOS")
@@ -148,6 +113,7 @@ def pairwise_states(df):
     
     return ranking
 
+@profiled()
 def pairwise_payments(df):
     """Análise combinatória para tipos de pagamento"""
     print("\n" + "="*50)
@@ -208,6 +174,7 @@ def pairwise_payments(df):
     
     return ranking
 
+@profiled()
 def pairwise_time_slots(df):
     """Análise combinatória para faixas horárias"""
     print("\n" + "="*50)
@@ -267,6 +234,7 @@ def pairwise_time_slots(df):
     
     return ranking
 
+@profiled()
 def pairwise_regions(df):
     """Análise combinatória para regiões"""
     print("\n" + "="*50)
@@ -325,9 +293,9 @@ def pairwise_regions(df):
     
     return ranking
 
-def main():
+def main(sample=None):
     print("Carregando dados...")
-    df = load_data()
+    df = load_data(sample=sample)
     print(f"Dados carregados: {len(df)} pedidos\n")
     
     # Realizar análises combinatórias
@@ -358,4 +326,4 @@ def main():
         print(f"{i}. {region}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(sample=sample_fraction_option())
\ No newline at end of file
@@ -1,61 +1,21 @@
 import pandas as pd
 import numpy as np
-from scipy.stats import mannwhitneyu, chi2_contingency
 from itertools import combinations
 import warnings
+from olist_dataset import CSV_DIR, build_orders_summary
+from olist_profiling import profiled
+from olist_sampling import sample_fraction_option
+from lazy_imports import lazy_attributes
 warnings.filterwarnings('ignore')
 
-def load_data():
-    """Carrega e prepara os dados"""
-    # Carregar datasets
-    items_df = pd.read_csv('olist-csv/olist_order_items_dataset.csv')
-    products_df = pd.read_csv('olist-csv/olist_products_dataset.csv')
-    translation_df = pd.read_csv('olist-csv/product_category_name_translation.csv')
-    orders_df = pd.read_csv('olist-csv/olist_orders_dataset.csv')
-    customers_df = pd.read_csv('olist-csv/olist_customers_dataset.csv')
-    payments_df = pd.read_csv('olist-csv/olist_order_payments_dataset.csv')
-    
-    # Merge dos dados
-    items_products = items_df.merge(products_df[['product_id', 'product_category_name']], on='product_id', how='left')
-    items_products_trans = items_products.merge(translation_df, on='product_category_name', how='left')
-    orders_customers = orders_df.merge(customers_df[['customer_id', 'customer_state']], on='customer_id', how='left')
-    
-    final_df = items_products_trans.merge(
-        orders_customers[['order_id', 'customer_state', 'order_status', 'order_purchase_timestamp']], 
-        on='order_id', how='left'
-    )
-    
-    # Filtros de qualidade
-    final_df = final_df[
-        (final_df['order_status'] == 'delivered') &
-        (final_df['price'] > 0) &
-        (final_df['price'] <= 10000) &
-        (final_df['freight_value'] >= 0) &
-        (final_df['product_category_name_english'].notna()) &
-        (final_df['customer_state'].notna())
-    ]
-    
-    # Agregação por pedido
-    orders_summary = final_df.groupby(['order_id', 'customer_state']).agg({
-        'price': 'sum',
-        'freight_value': 'sum',
-        'order_item_id': 'count',
-        'product_category_name_english': lambda x: x.mode().iloc[0],
-        'order_purchase_timestamp': 'first'
-    }).reset_index()
-    
-    orders_summary.columns = ['order_id', 'customer_state', 'order_ticket', 'freight_value', 'n_items', 'product_category', 'order_date']
-    orders_summary['freight_ratio'] = orders_summary['freight_value'] / orders_summary['order_ticket']
-    orders_summary['freight_ratio'] = orders_summary['freight_ratio'].clip(0, 1)
-    
-    # Adicionar dados de pagamento
-    payments_summary = payments_df.groupby('order_id').agg({
-        'payment_type': lambda x: x.mode().iloc[0],
-        'payment_installments': 'mean',
-        'payment_value': 'sum'
-    }).reset_index()
-    
-    orders_summary = orders_summary.merge(payments_summary, on='order_id', how='left')
+# scipy.stats carregado só no primeiro teste
+mannwhitneyu, chi2_contingency = lazy_attributes('scipy.stats', 'mannwhitneyu', 'chi2_contingency')
+
+@profiled()
+def load_data(csv_dir=CSV_DIR, orders_summary=None, sample=None):
+    """Carrega e prepara os dados (a partir de um resumo já carregado, se informado)"""
+    # Resumo por pedido (itens, categorias, UF e pagamentos)
+    orders_summary = build_orders_summary(csv_dir, sample=sample) if orders_summary is None else orders_summary.copy()
     
     # Criar variáveis temporais
     orders_summary['order_date'] = pd.to_datetime(orders_summary['order_date'])
@@ -91,6 +51,7 @@ def load_data():
     
     return orders_summary
 
+@profiled()
 def pairwise_comparison_states(df):
     """Comparação par a par entre estados"""
     print("="*80)
@@ -167,6 +128,7 @@ def pairwise_comparison_states(df):
     
     return ranking, results
 
+@profiled()
 def pairwise_comparison_payment_types(df):
     """Comparação par a par entre tipos de pagamento"""
     print("\n" + "="*80)
@@ -239,6 +201,7 @@ def pairwise_comparison_payment_types(df):
     
     return ranking, results
 
+@profiled()
 def pairwise_comparison_time_slots(df):
     """Comparação par a par entre faixas horárias"""
     print("\n" + "="*80)
@@ -312,6 +275,7 @@ def pairwise_comparison_time_slots(df):
     
     return ranking, results
 
+@profiled()
 def pairwise_comparison_regions(df):
     """Comparação par a par entre regiões"""
     print("\n" + "="*80)
@@ -382,10 +346,10 @@ def pairwise_comparison_regions(df):
     
     return ranking, results
 
-def main():
-    """Função principal"""
+def main(sample=None):
+    """Função principal (sample: fração da amostra estratificada)"""
     print("Carregando dados...")
-    df = load_data()
+    df = load_data(sample=sample)
     print(f"Dados carregados: {len(df)} pedidos")
     
     # Realizar todas as análises combinatórias
@@ -421,4 +385,4 @@ def main():
     print("="*80)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(sample=sample_fraction_option())
\ No newline at end of file
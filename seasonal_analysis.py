@@ -1,60 +1,31 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy.stats import mannwhitneyu, kruskal
 from itertools import combinations
 import warnings
+from olist_dataset import CSV_DIR, build_orders_summary
+from olist_profiling import profiled
+from olist_sampling import sample_fraction_option
+from lazy_imports import lazy_module, lazy_attributes
 warnings.filterwarnings('ignore')
 
-# Configuração de visualização
-plt.rcParams['figure.figsize'] = (14, 8)
-plt.rcParams['font.size'] = 10
-sns.set_style("whitegrid")
+def _plot_style(pyplot):
+    """Configuração de visualização (aplicada na primeira figura)"""
+    pyplot.rcParams['figure.figsize'] = (14, 8)
+    pyplot.rcParams['font.size'] = 10
+    sns.set_style("whitegrid")
 
-def load_data():
+# Bibliotecas de gráficos e estatística carregadas no primeiro uso
+plt = lazy_module('matplotlib.pyplot', on_load=_plot_style)
+sns = lazy_module('seaborn')
+mannwhitneyu, kruskal = lazy_attributes('scipy.stats', 'mannwhitneyu', 'kruskal')
+
+@profiled()
+def load_data(csv_dir=CSV_DIR, sample=None):
     """Carrega e prepara os dados para análise sazonal"""
     print("Carregando dados...")
     
-    # Carregar datasets
-    items_df = pd.read_csv('olist-csv/olist_order_items_dataset.csv')
-    products_df = pd.read_csv('olist-csv/olist_products_dataset.csv')
-    translation_df = pd.read_csv('olist-csv/product_category_name_translation.csv')
-    orders_df = pd.read_csv('olist-csv/olist_orders_dataset.csv')
-    customers_df = pd.read_csv('olist-csv/olist_customers_dataset.csv')
-    
-    # Merge dos dados
-    items_products = items_df.merge(products_df[['product_id', 'product_category_name']], on='product_id', how='left')
-    items_products_trans = items_products.merge(translation_df, on='product_category_name', how='left')
-    orders_customers = orders_df.merge(customers_df[['customer_id', 'customer_state']], on='customer_id', how='left')
-    
-    final_df = items_products_trans.merge(
-        orders_customers[['order_id', 'customer_state', 'order_status', 'order_purchase_timestamp']], 
-        on='order_id', how='left'
-    )
-    
-    # Filtros de qualidade
-    final_df = final_df[
-        (final_df['order_status'] == 'delivered') &
-        (final_df['price'] > 0) &
-        (final_df['price'] <= 10000) &
-        (final_df['freight_value'] >= 0) &
-        (final_df['product_category_name_english'].notna()) &
-        (final_df['customer_state'].notna())
-    ]
-    
-    # Agregação por pedido
-    orders_summary = final_df.groupby(['order_id', 'customer_state']).agg({
-        'price': 'sum',
-        'freight_value': 'sum',
-        'order_item_id': 'count',
-        'product_category_name_english': lambda x: x.mode().iloc[0],
-        'order_purchase_timestamp': 'first'
-    }).reset_index()
-    
-    orders_summary.columns = ['order_id', 'customer_state', 'order_ticket', 'freight_value', 'n_items', 'product_category', 'order_date']
-    orders_summary['freight_ratio'] = orders_summary['freight_value'] / orders_summary['order_ticket']
-    orders_summary['freight_ratio'] = orders_summary['freight_ratio'].clip(0, 1)
+    # Resumo por pedido (itens, categorias e UF)
+    orders_summary = build_orders_summary(csv_dir, include_payments=False, sample=sample)
     
     # Converter data
     orders_summary['order_date'] = pd.to_datetime(orders_summary['order_date'])
@@ -88,6 +59,7 @@ def load_data():
     print(f"Dados carregados: {len(orders_summary)} pedidos")
     return orders_summary
 
+@profiled()
 def define_seasonal_periods(df):
     """Define períodos sazonais para datas comemorativas"""
     df = df.copy()
@@ -143,6 +115,7 @@ def define_seasonal_periods(df):
     
     return df
 
+@profiled()
 def analyze_ticket_by_category_and_season(df):
     """Analisa ticket médio por categoria em cada data comemorativa"""
     print("\n" + "="*80)
@@ -205,6 +178,7 @@ def analyze_ticket_by_category_and_season(df):
     
     return results
 
+@profiled()
 def compare_seasonal_periods_by_category(df):
     """Compara datas comemorativas entre si por categoria usando análise combinatória"""
     print("\n" + "="*80)
@@ -281,6 +255,7 @@ def compare_seasonal_periods_by_category(df):
         for i, period in enumerate(ranking, 1):
             print(f"{i}. {period} (pontos: {scores[period]:.1f}, média: {period_means[period]:.2f})")
 
+@profiled()
 def analyze_freight_willingness_by_season(df):
     """Analisa disposição para pagar frete por região em datas comemorativas"""
     print("\n" + "="*80)
@@ -322,6 +297,7 @@ def analyze_freight_willingness_by_season(df):
             print(f"  P-value: {p_val:.6f} {sig_mark}")
             print(f"  Disposição {direction} para pagar frete na data comemorativa")
 
+@profiled()
 def compare_seasonal_freight_willingness(df):
     """Compara disposição para pagar frete entre datas comemorativas"""
     print("\n" + "="*80)
@@ -378,6 +354,7 @@ def compare_seasonal_freight_willingness(df):
     for i, period in enumerate(ranking, 1):
         print(f"{i}. {period} (pontos: {scores[period]:.1f}, razão frete: {period_means[period]:.4f})")
 
+@profiled()
 def create_seasonal_visualizations(df):
     """Cria visualizações para análise sazonal"""
     print("\n" + "="*80)
@@ -439,14 +416,14 @@ def create_seasonal_visualizations(df):
     
     print("Visualização salva: charts/seasonal_analysis_comprehensive.png")
 
-def main():
-    """Função principal"""
+def main(sample=None):
+    """Função principal (sample: fração da amostra estratificada)"""
     print("="*80)
     print("ANÁLISE DE SAZONALIDADE POR DATAS COMEMORATIVAS")
     print("="*80)
     
     # Carregar dados
-    df = load_data()
+    df = load_data(sample=sample)
     
     # Definir períodos sazonais
     df_seasonal = define_seasonal_periods(df)
@@ -471,4 +448,4 @@ def main():
     print("="*80)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(sample=sample_fraction_option())
\ No newline at end of file
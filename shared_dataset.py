@@ -0,0 +1,231 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory, resource_tracker
+from olist_dataset import CSV_DIR, N_WORKERS, build_orders_summary
+
+# Colunas de texto com mais valores distintos que isso (p.ex. order_id) só são
+# publicadas quando pedidas explicitamente: o dicionário iria para cada processo
+MAX_CATEGORIES = int(os.getenv('OLIST_SHARED_MAX_CATEGORIES', '10000'))
+
+# Alinhamento de cada coluna dentro do segmento
+ALIGNMENT = 64
+
+# Segmentos anexados neste processo (mantêm o mapeamento vivo enquanto os DataFrames existem)
+_attached = {}
+
+# DataFrame do processo trabalhador (anexado uma vez no inicializador do pool)
+_worker_frame = None
+
+def encode_column(series):
+    """Array bruto e metadados da coluna (categorias e textos viram códigos + dicionário)"""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), {'kind': 'category', 'categories': series.cat.categories.tolist(),
+                                             'ordered': bool(series.cat.ordered)}
+    if pd.api.types.is_datetime64_dtype(series.dtype):
+        return series.to_numpy().view(np.int64), {'kind': 'datetime', 'datetime_dtype': str(series.dtype)}
+    if pd.api.types.is_bool_dtype(series.dtype) or pd.api.types.is_numeric_dtype(series.dtype):
+        if series.isna().any() and not pd.api.types.is_float_dtype(series.dtype):
+            series = series.astype(np.float64)  # inteiros anuláveis: NaN em float64
+        return series.to_numpy(), {'kind': 'numeric'}
+
+    codes, categories = pd.factorize(series, sort=True)
+    return codes.astype(_code_dtype(len(categories))), {'kind': 'category', 'categories': categories.tolist(),
+                                                         'ordered': False}
+
+def _code_dtype(n_categories):
+    """Menor inteiro que o pandas usa para os códigos (outro tipo faria from_codes copiar)"""
+    for dtype in (np.int8, np.int16, np.int32):
+        if n_categories < np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+def decode_column(array, meta):
+    """Inverso de encode_column, sem copiar o array (códigos viram Categorical)"""
+    if meta['kind'] == 'category':
+        return pd.Categorical.from_codes(array, meta['categories'], ordered=meta['ordered'], validate=False)
+    if meta['kind'] == 'datetime':
+        return pd.Series(array.view(meta['datetime_dtype']), copy=False)
+    return array
+
+def _unlink(shm):
+    try:
+        shm.close()
+        shm.unlink()
+    except FileNotFoundError:
+        pass
+
+class SharedDataset:
+    """
+    Publica as colunas de um DataFrame em um segmento de memória compartilhada.
+
+    Colunas numéricas vão como arrays brutos; categorias e textos como códigos
+    inteiros, com o dicionário no descritor; datas como int64. O descritor é um
+    dicionário pequeno (nome do segmento, deslocamentos, dtypes e dicionários)
+    enviado aos processos, que anexam o segmento sem copiar os dados (attach).
+
+    Limpeza: o segmento é removido ao sair do bloco with, em close(), quando o
+    objeto é coletado ou no encerramento normal do interpretador. Se o processo
+    dono morrer sem executar nada disso (SIGKILL, falha nativa), o resource
+    tracker do multiprocessing, que roda em processo separado, remove os
+    segmentos que ficaram registrados. Os trabalhadores nunca removem o segmento.
+
+    Uso:
+        with SharedDataset(orders_summary) as shared:
+            results = map_shared(func, shared, tasks, n_workers=4)
+    """
+
+    def __init__(self, df, columns=None):
+        if columns is None:
+            columns = [column for column in df.columns
+                       if not self._is_wide_text(df[column])]
+            skipped = [column for column in df.columns if column not in columns]
+            if skipped:
+                print(f"Memória compartilhada: colunas de texto com mais de {MAX_CATEGORIES:,} valores "
+                      f"distintos não publicadas: {', '.join(skipped)}")
+
+        layouts = []
+        offset = 0
+        for column in columns:
+            array, meta = encode_column(df[column])
+            array = np.ascontiguousarray(array)
+            layouts.append((column, array, meta, offset))
+            offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        self._finalizer = weakref.finalize(self, _unlink, self.shm)
+
+        descriptor_columns = []
+        for column, array, meta, start in layouts:
+            target = np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf, offset=start)
+            target[:] = array
+            descriptor_columns.append({'name': column, 'dtype': array.dtype.str, 'offset': start, **meta})
+
+        self.descriptor = {
+            'shm_name': self.shm.name,
+            'n_rows': len(df),
+            'nbytes': offset,
+            'columns': descriptor_columns
+        }
+
+    @staticmethod
+    def _is_wide_text(series):
+        if isinstance(series.dtype, pd.CategoricalDtype) or pd.api.types.is_numeric_dtype(series.dtype) \
+                or pd.api.types.is_datetime64_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            return False
+        return series.nunique(dropna=True) > MAX_CATEGORIES
+
+    def close(self):
+        """Remove o segmento (idempotente)"""
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+def attach(descriptor):
+    """
+    Anexa um SharedDataset publicado por outro processo e monta o DataFrame sem cópia.
+
+    Os arrays são somente leitura: colunas novas ou alteradas viram cópias locais
+    (copy-on-write do pandas), sem tocar no segmento compartilhado.
+
+    Returns:
+        pd.DataFrame: Colunas apontando para a memória compartilhada
+    """
+    name = descriptor['shm_name']
+    if name not in _attached:
+        # Trabalhadores do pool herdam o resource tracker do dono (registrar de novo não tem efeito).
+        # Um processo sem tracker criaria um próprio, que removeria o segmento quando esse
+        # processo terminasse: nesse caso o segmento não é registrado.
+        own_tracker = resource_tracker._resource_tracker._fd is None
+        if own_tracker and sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+            if own_tracker:
+                resource_tracker.unregister(shm._name, 'shared_memory')
+        _attached[name] = shm
+    buffer = _attached[name].buf
+
+    columns = {}
+    for meta in descriptor['columns']:
+        array = np.ndarray(descriptor['n_rows'], dtype=np.dtype(meta['dtype']), buffer=buffer, offset=meta['offset'])
+        array.flags.writeable = False
+        columns[meta['name']] = decode_column(array, meta)
+    return pd.DataFrame(columns, copy=False)
+
+def detach(descriptor):
+    """Fecha o mapeamento local (os DataFrames anexados deixam de ser válidos)"""
+    shm = _attached.pop(descriptor['shm_name'], None)
+    if shm is not None:
+        shm.close()
+
+def _init_worker(descriptor):
+    global _worker_frame
+    _worker_frame = attach(descriptor)
+
+def _run_task(args):
+    func, task = args
+    return func(_worker_frame, task)
+
+def map_shared(func, shared, tasks, n_workers=N_WORKERS):
+    """
+    Executa func(df, task) para cada task em um pool de processos que compartilham os dados.
+
+    Cada trabalhador anexa o segmento uma única vez; só as tasks e os resultados
+    são serializados. Os resultados seguem a ordem das tasks.
+
+    Args:
+        func: Função de nível de módulo (serializável) com assinatura func(df, task)
+        shared (SharedDataset): Dados publicados
+        tasks (list): Argumentos de cada chamada
+        n_workers (int): Processos do pool
+    """
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                             initargs=(shared.descriptor,)) as pool:
+        return list(pool.map(_run_task, [(func, task) for task in tasks]))
+
+def private_memory_bytes():
+    """Memória privada do processo (exclui páginas compartilhadas); None fora do Linux"""
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+    except OSError:
+        return None
+    return sum(int(fields[key].split()[0]) * 1024 for key in ('Private_Clean', 'Private_Dirty') if key in fields)
+
+def _segment_profile(df, task):
+    """Tarefa de demonstração: média por UF de uma variável, mais a memória privada do trabalhador"""
+    column, variable = task
+    means = df.groupby(column, observed=True)[variable].mean()
+    return {'task': task, 'groups': len(means), 'pid': os.getpid(), 'private_bytes': private_memory_bytes()}
+
+def main():
+    """Publica o resumo por pedido e compara a memória privada dos trabalhadores por número de processos"""
+    csv_dir = sys.argv[1] if len(sys.argv) > 1 else CSV_DIR
+    orders_summary = build_orders_summary(csv_dir)
+    tasks = [(column, variable) for column in ['customer_state', 'product_category', 'payment_type']
+             for variable in ['order_ticket', 'freight_value', 'freight_ratio']]
+
+    print("\n=== DATASET EM MEMÓRIA COMPARTILHADA ===")
+    with SharedDataset(orders_summary) as shared:
+        print(f"Segmento {shared.descriptor['shm_name']}: {shared.descriptor['nbytes'] / 1024 ** 2:.1f} MB, "
+              f"{len(shared.descriptor['columns'])} colunas")
+        for n_workers in [1, 2, 4]:
+            start = time.perf_counter()
+            results = map_shared(_segment_profile, shared, tasks, n_workers)
+            elapsed = time.perf_counter() - start
+            private = [r['private_bytes'] for r in results if r['private_bytes'] is not None]
+            memory = f"{max(private) / 1024 ** 2:.1f} MB" if private else 'indisponível'
+            print(f"   {n_workers} processo(s): {elapsed:.2f}s | memória privada máxima por trabalhador {memory}")
+
+if __name__ == "__main__":
+    main()
@@ -1,73 +1,35 @@
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from scipy import stats
-from scipy.stats import mannwhitneyu, kruskal, chi2_contingency, pearsonr, spearmanr
-from scipy.stats import shapiro, normaltest, anderson, jarque_bera
 import os
 import warnings
+from olist_dataset import build_orders_summary
+from olist_profiling import profiled
+from olist_sampling import sample_fraction_option, print_sampling_report, print_unweighted_notice
+from lazy_imports import lazy_module, lazy_attributes
 warnings.filterwarnings('ignore')
 
-# Configuração de visualização
-plt.rcParams['figure.figsize'] = (12, 8)
-plt.rcParams['font.size'] = 10
-sns.set_style("whitegrid")
+def _plot_style(pyplot):
+    """Configuração de visualização (aplicada na primeira figura)"""
+    pyplot.rcParams['figure.figsize'] = (12, 8)
+    pyplot.rcParams['font.size'] = 10
+    sns.set_style("whitegrid")
 
-def load_data():
-    """Carrega e prepara os dados para análise"""
+# Bibliotecas de gráficos e estatística carregadas no primeiro uso
+plt = lazy_module('matplotlib.pyplot', on_load=_plot_style)
+sns = lazy_module('seaborn')
+stats = lazy_module('scipy.stats')
+mannwhitneyu, kruskal, chi2_contingency, pearsonr, spearmanr = lazy_attributes(
+    stats, 'mannwhitneyu', 'kruskal', 'chi2_contingency', 'pearsonr', 'spearmanr')
+shapiro, normaltest, anderson, jarque_bera = lazy_attributes(
+    stats, 'shapiro', 'normaltest', 'anderson', 'jarque_bera')
+
+@profiled()
+def load_data(orders_summary=None, sample=None):
+    """Carrega e prepara os dados para análise (a partir de um resumo já carregado, se informado)"""
     print("Carregando dados...")
     
-    # Carregar datasets
-    items_df = pd.read_csv('olist-csv/olist_order_items_dataset.csv')
-    products_df = pd.read_csv('olist-csv/olist_products_dataset.csv')
-    translation_df = pd.read_csv('olist-csv/product_category_name_translation.csv')
-    orders_df = pd.read_csv('olist-csv/olist_orders_dataset.csv')
-    customers_df = pd.read_csv('olist-csv/olist_customers_dataset.csv')
-    payments_df = pd.read_csv('olist-csv/olist_order_payments_dataset.csv')
-    
-    # Merge dos dados
-    items_products = items_df.merge(products_df[['product_id', 'product_category_name']], on='product_id', how='left')
-    items_products_trans = items_products.merge(translation_df, on='product_category_name', how='left')
-    orders_customers = orders_df.merge(customers_df[['customer_id', 'customer_state']], on='customer_id', how='left')
-    
-    # Merge final
-    final_df = items_products_trans.merge(
-        orders_customers[['order_id', 'customer_state', 'order_status', 'order_purchase_timestamp']], 
-        on='order_id', how='left'
-    )
-    
-    # Filtros de qualidade
-    final_df = final_df[
-        (final_df['order_status'] == 'delivered') &
-        (final_df['price'] > 0) &
-        (final_df['price'] <= 10000) &
-        (final_df['freight_value'] >= 0) &
-        (final_df['product_category_name_english'].notna()) &
-        (final_df['customer_state'].notna())
-    ]
-    
-    # Agregação por pedido
-    orders_summary = final_df.groupby(['order_id', 'customer_state']).agg({
-        'price': 'sum',
-        'freight_value': 'sum',
-        'order_item_id': 'count',
-        'product_category_name_english': lambda x: x.mode().iloc[0],
-        'order_purchase_timestamp': 'first'
-    }).reset_index()
-    
-    orders_summary.columns = ['order_id', 'customer_state', 'order_ticket', 'freight_value', 'n_items', 'product_category', 'order_date']
-    orders_summary['freight_ratio'] = orders_summary['freight_value'] / orders_summary['order_ticket']
-    orders_summary['freight_ratio'] = orders_summary['freight_ratio'].clip(0, 1)
-    
-    # Adicionar dados de pagamento
-    payments_summary = payments_df.groupby('order_id').agg({
-        'payment_type': lambda x: x.mode().iloc[0],
-        'payment_installments': 'mean',
-        'payment_value': 'sum'
-    }).reset_index()
-    
-    orders_summary = orders_summary.merge(payments_summary, on='order_id', how='left')
+    # Resumo por pedido (itens, categorias, UF e pagamentos)
+    orders_summary = build_orders_summary(sample=sample) if orders_summary is None else orders_summary.copy()
     
     # Criar variáveis temporais
     orders_summary['order_date'] = pd.to_datetime(orders_summary['order_date'])
@@ -88,6 +50,7 @@ def load_data():
     print(f"Dados carregados: {len(orders_summary)} pedidos")
     return orders_summary
 
+@profiled()
 def test_normality(data, variable_name):
     """Testa normalidade dos dados"""
     # Remover valores NaN
@@ -113,6 +76,7 @@ def test_normality(data, variable_name):
         is_normal = p_value > 0.05
         return f"D'Agostino-Pearson: p-value = {p_value:.6f}", is_normal
 
+@profiled()
 def statistical_question_1(df):
     """
     PERGUNTA 1: Existe diferença significativa no ticket médio entre os estados?
@@ -120,6 +84,7 @@ def statistical_question_1(df):
     print("\n" + "="*80)
     print("PERGUNTA 1: Existe diferença significativa no ticket médio entre os estados?")
     print("="*80)
+    print_unweighted_notice(df)
     
     # Filtrar estados com amostra suficiente
     state_counts = df['customer_state'].value_counts()
@@ -180,6 +145,7 @@ def statistical_question_1(df):
         'states_analyzed': len(top_states)
     }
 
+@profiled()
 def statistical_question_2(df):
     """
     PERGUNTA 2: Pedidos feitos após o dia de pagamento (5-9 do mês) têm ticket médio maior?
@@ -187,6 +153,7 @@ def statistical_question_2(df):
     print("\n" + "="*80)
     print("PERGUNTA 2: Pedidos feitos após o dia de pagamento (5-9 do mês) têm ticket médio maior?")
     print("="*80)
+    print_unweighted_notice(df)
     
     # Estatísticas descritivas
     print("\nESTATÍSTICAS DESCRITIVAS:")
@@ -244,6 +211,7 @@ def statistical_question_2(df):
         'conclusion': conclusion
     }
 
+@profiled()
 def statistical_question_3(df):
     """
     PERGUNTA 3: Existe correlação entre quantidade de itens e ticket médio?
@@ -251,6 +219,7 @@ def statistical_question_3(df):
     print("\n" + "="*80)
     print("PERGUNTA 3: Existe correlação entre quantidade de itens e ticket médio?")
     print("="*80)
+    print_unweighted_notice(df)
     
     # Remover outliers extremos para correlação
     df_clean = df[(df['n_items'] <= 10) & (df['order_ticket'] <= 1000)]
@@ -326,6 +295,7 @@ def statistical_question_3(df):
         'conclusion': conclusion
     }
 
+@profiled()
 def statistical_question_4(df):
     """
     PERGUNTA 4: O tipo de pagamento influencia o ticket médio?
@@ -333,6 +303,7 @@ def statistical_question_4(df):
     print("\n" + "="*80)
     print("PERGUNTA 4: O tipo de pagamento influencia o ticket médio?")
     print("="*80)
+    print_unweighted_notice(df)
     
     # Filtrar tipos de pagamento mais comuns
     payment_counts = df['payment_type'].value_counts()
@@ -390,6 +361,7 @@ def statistical_question_4(df):
         'conclusion': conclusion
     }
 
+@profiled()
 def statistical_question_5(df):
     """
     PERGUNTA 5: Existe diferença no ticket médio entre faixas horárias?
@@ -397,6 +369,7 @@ def statistical_question_5(df):
     print("\n" + "="*80)
     print("PERGUNTA 5: Existe diferença no ticket médio entre faixas horárias?")
     print("="*80)
+    print_unweighted_notice(df)
     
     # Remover NaN em time_slot
     df_time = df.dropna(subset=['time_slot'])
@@ -451,6 +424,7 @@ def statistical_question_5(df):
         'conclusion': conclusion
     }
 
+@profiled()
 def statistical_question_6(df):
     """
     PERGUNTA 6: Estados com maior razão de frete têm ticket médio menor?
@@ -458,6 +432,7 @@ def statistical_question_6(df):
     print("\n" + "="*80)
     print("PERGUNTA 6: Estados com maior razão de frete têm ticket médio menor?")
     print("="*80)
+    print_unweighted_notice(df)
     
     # Calcular médias por estado
     state_summary = df.groupby('customer_state').agg({
@@ -536,13 +511,15 @@ def statistical_question_6(df):
         'conclusion': conclusion
     }
 
-def main():
-    """Função principal que executa todas as análises"""
+def main(sample=None):
+    """Função principal que executa todas as análises (sample: fração da amostra estratificada)"""
     print("ANÁLISE DE PERGUNTAS ESTATÍSTICAS PRAGMÁTICAS")
     print("=" * 80)
     
-    # Carregar dados
-    df = load_data()
+    # Carregar dados (com --sample 0.1, amostra estratificada e estimativas com margem de erro)
+    df = load_data(sample=sample)
+    print_sampling_report(df, ['order_ticket', 'freight_ratio', 'post_salary'])
+    print_sampling_report(df, ['order_ticket'], by='customer_state', top=8)
     
     # Criar diretório para gráficos se não existir
     os.makedirs('charts', exist_ok=True)
@@ -575,4 +552,4 @@ def main():
     print("Gráficos salvos em: charts/question*.png")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main(sample=sample_fraction_option())
\ No newline at end of file
@@ -0,0 +1,346 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from olist_dataset import CSV_DIR, N_WORKERS, CHUNK_SIZE
+from olist_profiling import profiled
+from batch_normality import GroupedArray, group_moments
+
+# Compressão do t-digest: ~compressão/2 centróides por resumo (mais = quantis mais precisos)
+TDIGEST_COMPRESSION = int(os.getenv('OLIST_TDIGEST_COMPRESSION', '500'))
+
+# Quantis da tabela descritiva (mesmos de DataFrame.describe)
+DESCRIBE_QUANTILES = (0.25, 0.5, 0.75)
+
+class StreamingMoments:
+    """
+    Contagem, média, somas dos desvios elevados a 2, 3 e 4, mínimo e máximo.
+
+    Cada bloco de valores vira um resumo exato (média e somas centradas em
+    duas passadas vetorizadas), combinado ao acumulado pelas fórmulas de
+    Chan/Pébay. É o Welford aplicado bloco a bloco, e é estável mesmo com médias
+    grandes. Resumos de blocos, processos ou dias diferentes se combinam com merge
+    em qualquer ordem.
+    """
+
+    __slots__ = ('n', 'mean', 'm2', 'm3', 'm4', 'min', 'max')
+
+    def __init__(self, n=0, mean=0.0, m2=0.0, m3=0.0, m4=0.0, minimum=np.inf, maximum=-np.inf):
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.m3 = m3
+        self.m4 = m4
+        self.min = minimum
+        self.max = maximum
+
+    @classmethod
+    def from_values(cls, values):
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return cls()
+        mean = values.mean()
+        centered = values - mean
+        squared = centered * centered
+        return cls(len(values), float(mean), float(squared.sum()), float((squared * centered).sum()),
+                   float((squared * squared).sum()), float(values.min()), float(values.max()))
+
+    def update(self, values):
+        """Inclui um bloco de valores"""
+        return self.merge(StreamingMoments.from_values(values))
+
+    def merge(self, other):
+        """Combina outro resumo a este (no lugar) e devolve este"""
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            for slot in self.__slots__:
+                setattr(self, slot, getattr(other, slot))
+            return self
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        m2 = self.m2 + other.m2 + delta ** 2 * na * nb / n
+        m3 = (self.m3 + other.m3 + delta ** 3 * na * nb * (na - nb) / n ** 2
+              + 3 * delta * (na * other.m2 - nb * self.m2) / n)
+        m4 = (self.m4 + other.m4 + delta ** 4 * na * nb * (na * na - na * nb + nb * nb) / n ** 3
+              + 6 * delta ** 2 * (na * na * other.m2 + nb * nb * self.m2) / n ** 2
+              + 4 * delta * (na * other.m3 - nb * self.m3) / n)
+        self.n, self.mean = n, self.mean + delta * nb / n
+        self.m2, self.m3, self.m4 = m2, m3, m4
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        return self
+
+    def variance(self, ddof=1):
+        return self.m2 / (self.n - ddof) if self.n > ddof else np.nan
+
+    def std(self, ddof=1):
+        return np.sqrt(self.variance(ddof))
+
+    def skewness(self, bias=True):
+        """Assimetria; bias=False dá a corrigida (como Series.skew), bias=True a de stats.skew"""
+        n = self.n
+        if n < 3 or self.m2 == 0:
+            return np.nan
+        g1 = np.sqrt(n) * self.m3 / self.m2 ** 1.5
+        return g1 if bias else g1 * np.sqrt(n * (n - 1)) / (n - 2)
+
+    def kurtosis(self, bias=True):
+        """Curtose em excesso; bias=False dá a corrigida (como Series.kurt), bias=True a de stats.kurtosis"""
+        n = self.n
+        if n < 4 or self.m2 == 0:
+            return np.nan
+        g2 = n * self.m4 / self.m2 ** 2 - 3
+        return g2 if bias else ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+
+class TDigest:
+    """
+    Esboço de quantis t-digest (centróides de médias e pesos), combinável.
+
+    Os centróides ficam ordenados pela média; a compressão os agrupa pela
+    função de escala k = δ/2π · asin(2q - 1) (δ = compressão): cada centróide
+    ocupa no máximo uma unidade de k, o que dá centróides pequenos nas caudas
+    e grandes no meio. A compressão é vetorizada: cada centróide
+    vai para a unidade de k do seu ponto médio e cada unidade vira um centróide.
+    Incluir valores ou outro esboço é concatenar os centróides e comprimir de novo.
+    Mínimo e máximo são exatos e ancoram a interpolação nas pontas.
+    """
+
+    __slots__ = ('compression', 'means', 'weights', 'min', 'max')
+
+    def __init__(self, compression=TDIGEST_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def n(self):
+        return float(self.weights.sum())
+
+    def _compress(self, means, weights):
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        quantiles = (np.cumsum(weights) - weights / 2) / weights.sum()
+        k = self.compression / (2 * np.pi) * np.arcsin(np.clip(2 * quantiles - 1, -1, 1))
+        bucket = np.floor(k + self.compression / 4).astype(np.int64)
+        cluster = np.concatenate([[0], np.cumsum(np.diff(bucket) != 0)])
+        self.weights = np.bincount(cluster, weights=weights)
+        self.means = np.bincount(cluster, weights=weights * means) / self.weights
+
+    def update(self, values):
+        """Inclui um bloco de valores (cada um como centróide de peso 1)"""
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return self
+        self.min, self.max = min(self.min, values.min()), max(self.max, values.max())
+        self._compress(np.concatenate([self.means, values]),
+                       np.concatenate([self.weights, np.ones(len(values))]))
+        return self
+
+    def merge(self, other):
+        """Combina outro esboço a este (no lugar) e devolve este"""
+        if len(other.weights) == 0:
+            return self
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self._compress(np.concatenate([self.means, other.means]), np.concatenate([self.weights, other.weights]))
+        return self
+
+    def quantile(self, q):
+        """
+        Quantis aproximados (q escalar ou array em [0, 1]).
+
+        Interpola entre os centros dos centróides na posição q·(n - 1) + ½, que
+        com centróides unitários (segmentos pequenos) é exatamente a interpolação
+        linear de Series.quantile.
+        """
+        if len(self.weights) == 0:
+            return np.full(np.shape(q), np.nan)[()]
+        cumulative = np.cumsum(self.weights)
+        positions = np.concatenate([[0.0], cumulative - self.weights / 2, [cumulative[-1]]])
+        values = np.concatenate([[self.min], self.means, [self.max]])
+        target = np.asarray(q, dtype=np.float64) * (cumulative[-1] - 1) + 0.5
+        return np.interp(target, positions, values)[()]
+
+class SummaryStatistics:
+    """
+    Resumo descritivo combinável: momentos até a 4ª ordem e esboço de quantis.
+
+    Construído em uma passada (update por bloco) e combinável com merge entre
+    blocos, processos ou atualizações incrementais. Média, desvio, assimetria e
+    curtose são exatos; os quantis vêm do t-digest.
+
+    Uso:
+        summary = SummaryStatistics()
+        for chunk in chunks:
+            summary.update(chunk['order_ticket'].dropna())
+        summary.describe()
+    """
+
+    __slots__ = ('moments', 'digest')
+
+    def __init__(self, compression=TDIGEST_COMPRESSION):
+        self.moments = StreamingMoments()
+        self.digest = TDigest(compression)
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        self.moments.update(values)
+        self.digest.update(values)
+        return self
+
+    def merge(self, other):
+        self.moments.merge(other.moments)
+        self.digest.merge(other.digest)
+        return self
+
+    @property
+    def n(self):
+        return self.moments.n
+
+    def quantile(self, q):
+        return self.digest.quantile(q)
+
+    def describe(self):
+        """Campos de Series.describe (desvio com ddof=1) mais assimetria e curtose corrigidas, como Series.skew/kurt"""
+        moments = self.moments
+        quartiles = self.quantile(DESCRIBE_QUANTILES)
+        return {
+            'count': moments.n,
+            'mean': moments.mean if moments.n else np.nan,
+            'std': moments.std(),
+            'min': moments.min if moments.n else np.nan,
+            **{f'{q:.0%}': value for q, value in zip(DESCRIBE_QUANTILES, np.atleast_1d(quartiles))},
+            'max': moments.max if moments.n else np.nan,
+            'skew': moments.skewness(bias=False),
+            'kurtosis': moments.kurtosis(bias=False)
+        }
+
+def update_segment_summaries(summaries, chunk, segment_column, variable, compression=TDIGEST_COMPRESSION):
+    """
+    Inclui um bloco do resumo por pedido nos resumos por segmento ({segmento: SummaryStatistics}).
+
+    Os momentos de todos os segmentos do bloco saem de uma passada agrupada
+    (batch_normality.group_moments); cada segmento recebe o seu pedaço no t-digest.
+    """
+    grouped = GroupedArray.from_frame(chunk, segment_column, variable)
+    n, mean, m2, m3, m4 = group_moments(grouped)
+    starts = grouped.offsets[:-1]
+    nonempty = n > 0
+    minimum = np.full(len(grouped), np.inf)
+    maximum = np.full(len(grouped), -np.inf)
+    minimum[nonempty] = np.minimum.reduceat(grouped.values, starts[nonempty])
+    maximum[nonempty] = np.maximum.reduceat(grouped.values, starts[nonempty])
+    for i, segment in enumerate(grouped.labels):
+        if not nonempty[i]:
+            continue
+        summary = summaries.setdefault(segment, SummaryStatistics(compression))
+        summary.moments.merge(StreamingMoments(int(n[i]), mean[i], m2[i] * n[i], m3[i] * n[i], m4[i] * n[i],
+                                               minimum[i], maximum[i]))
+        summary.digest.update(grouped.group(i))
+    return summaries
+
+def merge_segment_summaries(parts):
+    """Combina resumos por segmento vindos de blocos ou processos diferentes"""
+    merged = {}
+    for part in parts:
+        for segment, summary in part.items():
+            if segment in merged:
+                merged[segment].merge(summary)
+            else:
+                merged[segment] = summary
+    return merged
+
+def describe_segments(summaries, segment_column='segment'):
+    """Tabela descritiva por segmento (maiores primeiro), no formato de DataFrame.describe transposto"""
+    table = pd.DataFrame.from_dict({segment: summary.describe() for segment, summary in summaries.items()},
+                                   orient='index')
+    table.index.name = segment_column
+    return table.sort_values('count', ascending=False)
+
+def _column_store_part(task):
+    """Resumos por segmento de um intervalo de linhas do armazenamento colunar (trabalhador do pool)"""
+    from column_store import ColumnStore
+
+    store_dir, segment_column, variable, start, stop, chunk_rows, compression = task
+    frame = ColumnStore(store_dir).frame([segment_column, variable])
+    summaries = {}
+    for chunk_start in range(start, stop, chunk_rows):
+        update_segment_summaries(summaries, frame.iloc[chunk_start:min(chunk_start + chunk_rows, stop)],
+                                 segment_column, variable, compression)
+    return summaries
+
+@profiled()
+def summarize_column_store(segment_column, variable, store_dir=None, chunk_rows=CHUNK_SIZE,
+                           n_workers=N_WORKERS, compression=TDIGEST_COMPRESSION):
+    """
+    Resumos por segmento lendo o armazenamento colunar em blocos de linhas.
+
+    Cada processo mapeia do disco só as duas colunas e só o seu intervalo de
+    linhas; os resumos parciais são combinados com merge_segment_summaries.
+
+    Returns:
+        dict: {segmento: SummaryStatistics}
+    """
+    from column_store import COLUMN_STORE_DIR, ColumnStore
+
+    store_dir = COLUMN_STORE_DIR if store_dir is None else store_dir
+    n_rows = ColumnStore(store_dir).n_rows
+    bounds = np.linspace(0, n_rows, max(1, n_workers) + 1).astype(np.int64)
+    tasks = [(store_dir, segment_column, variable, int(start), int(stop), chunk_rows, compression)
+             for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+    if n_workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=n_workers) as pool:
+            parts = list(pool.map(_column_store_part, tasks))
+    else:
+        parts = [_column_store_part(task) for task in tasks]
+    return merge_segment_summaries(parts)
+
+def main():
+    """Tabela descritiva por UF em uma passada por blocos, comparada com o cálculo exato do pandas"""
+    from column_store import load_orders_columns
+
+    csv_dir = sys.argv[1] if len(sys.argv) > 1 else CSV_DIR
+    chunk_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 10000
+    columns = ['customer_state', 'order_ticket', 'freight_ratio']
+    orders = load_orders_columns(columns, csv_dir=csv_dir)
+
+    print(f"\n=== RESUMOS COMBINÁVEIS POR SEGMENTO (t-digest δ={TDIGEST_COMPRESSION}, blocos de {chunk_rows:,}) ===")
+    for variable in ['order_ticket', 'freight_ratio']:
+        start = time.perf_counter()
+        summaries = summarize_column_store('customer_state', variable, chunk_rows=chunk_rows)
+        streaming_seconds = time.perf_counter() - start
+        table = describe_segments(summaries, 'customer_state')
+
+        start = time.perf_counter()
+        groups = orders.groupby('customer_state', observed=True)[variable]
+        exact = groups.describe().join(groups.skew().rename('skew')).join(
+            groups.apply(pd.Series.kurt).rename('kurtosis'))
+        exact_seconds = time.perf_counter() - start
+        exact = exact.loc[table.index]
+
+        # Metade dos blocos como histórico e metade como atualização: o resultado deve ser o mesmo
+        half = len(orders) // 2
+        history = update_segment_summaries({}, orders.iloc[:half], 'customer_state', variable)
+        delta = update_segment_summaries({}, orders.iloc[half:], 'customer_state', variable)
+        incremental = describe_segments(merge_segment_summaries([history, delta]), 'customer_state')
+
+        moments_error = max(float((np.abs(table[column] - exact[column]) / exact[column].abs().clip(lower=1e-12)).max())
+                            for column in ['mean', 'std', 'skew', 'kurtosis'])
+        spread = (exact['75%'] - exact['25%']).clip(lower=1e-12)
+        quantile_error = max(float((np.abs(table[column] - exact[column]) / spread).max())
+                             for column in ['25%', '50%', '75%'])
+        incremental_error = float(np.nanmax(np.abs(incremental['mean'] - table['mean']) / table['mean'].abs()))
+
+        print(f"\n{variable} por UF ({len(table)} segmentos): em blocos {streaming_seconds:.2f}s | "
+              f"pandas (tudo em memória) {exact_seconds:.2f}s")
+        print(f"   Momentos: maior desvio relativo {moments_error:.1e} | quartis: maior erro "
+              f"{quantile_error:.2%} do intervalo interquartil | histórico + atualização × uma passada: "
+              f"{incremental_error:.1e}")
+        print(table.head(5).round(3).to_string())
+
+if __name__ == "__main__":
+    main()
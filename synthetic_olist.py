@@ -0,0 +1,438 @@
+import pandas as pd
+import numpy as np
+import os
+import argparse
+import shutil
+import warnings
+warnings.filterwarnings('ignore')
+
+# Volumes da base pública da Olist (escala 1x)
+BASE_ORDERS = 99441
+BASE_PRODUCTS = 32951
+BASE_SELLERS = 3095
+GEO_ROWS_PER_PREFIX = 52
+
+# Diretório base dos dados gerados
+SYNTHETIC_DIR = 'olist-synthetic'
+
+# Pedidos gerados por bloco (o bloco faz parte da semente: mesmo bloco → mesmos dados)
+BLOCK_SIZE = 50000
+
+# Participação aproximada de cada UF nos pedidos
+STATE_SHARE = {
+    'SP': 0.420, 'RJ': 0.129, 'MG': 0.117, 'RS': 0.055, 'PR': 0.051, 'SC': 0.037, 'BA': 0.034,
+    'DF': 0.022, 'ES': 0.020, 'GO': 0.020, 'PE': 0.017, 'CE': 0.013, 'PA': 0.010, 'MT': 0.009,
+    'MA': 0.0075, 'MS': 0.0072, 'PB': 0.0054, 'PI': 0.0050, 'RN': 0.0049, 'AL': 0.0041,
+    'SE': 0.0035, 'TO': 0.0028, 'RO': 0.0025, 'AM': 0.0015, 'AC': 0.0008, 'AP': 0.0007, 'RR': 0.0005
+}
+
+# Capital, faixa de prefixos de CEP e centro aproximado (lat, lng) de cada UF
+STATE_GEO = {
+    'SP': ('sao paulo', 1000, 19999, -23.55, -46.63), 'RJ': ('rio de janeiro', 20000, 28999, -22.90, -43.20),
+    'ES': ('vitoria', 29000, 29999, -20.32, -40.34), 'MG': ('belo horizonte', 30000, 39999, -19.92, -43.94),
+    'BA': ('salvador', 40000, 48999, -12.97, -38.50), 'SE': ('aracaju', 49000, 49999, -10.91, -37.07),
+    'PE': ('recife', 50000, 56999, -8.05, -34.88), 'AL': ('maceio', 57000, 57999, -9.67, -35.74),
+    'PB': ('joao pessoa', 58000, 58999, -7.12, -34.86), 'RN': ('natal', 59000, 59999, -5.79, -35.21),
+    'CE': ('fortaleza', 60000, 63999, -3.73, -38.52), 'PI': ('teresina', 64000, 64999, -5.09, -42.80),
+    'MA': ('sao luis', 65000, 65999, -2.53, -44.30), 'PA': ('belem', 66000, 68899, -1.46, -48.50),
+    'AP': ('macapa', 68900, 68999, 0.03, -51.07), 'AM': ('manaus', 69000, 69299, -3.12, -60.02),
+    'RR': ('boa vista', 69300, 69399, 2.82, -60.67), 'AC': ('rio branco', 69900, 69999, -9.97, -67.81),
+    'DF': ('brasilia', 70000, 72799, -15.79, -47.88), 'GO': ('goiania', 72800, 76799, -16.68, -49.25),
+    'RO': ('porto velho', 76800, 76999, -8.76, -63.90), 'TO': ('palmas', 77000, 77999, -10.18, -48.33),
+    'MT': ('cuiaba', 78000, 78899, -15.60, -56.10), 'MS': ('campo grande', 79000, 79999, -20.47, -54.62),
+    'PR': ('curitiba', 80000, 87999, -25.43, -49.27), 'SC': ('florianopolis', 88000, 89999, -27.59, -48.55),
+    'RS': ('porto alegre', 90000, 99999, -30.03, -51.23)
+}
+
+# Acréscimo (em log) do frete por região: mais caro quanto mais longe do Sudeste
+FREIGHT_REGION_OFFSET = {
+    'SP': -0.25, 'RJ': 0.0, 'MG': 0.0, 'ES': 0.05, 'PR': 0.0, 'SC': 0.05, 'RS': 0.1,
+    'DF': 0.15, 'GO': 0.15, 'MT': 0.25, 'MS': 0.2,
+    'BA': 0.25, 'SE': 0.3, 'PE': 0.3, 'AL': 0.3, 'PB': 0.35, 'RN': 0.35, 'CE': 0.35, 'PI': 0.35, 'MA': 0.35,
+    'PA': 0.4, 'AP': 0.45, 'AM': 0.45, 'RR': 0.5, 'AC': 0.5, 'RO': 0.4, 'TO': 0.3
+}
+
+# UF dos vendedores (concentrados no Sul/Sudeste)
+SELLER_STATE_SHARE = {'SP': 0.60, 'PR': 0.11, 'MG': 0.08, 'SC': 0.06, 'RJ': 0.055, 'RS': 0.045,
+                      'GO': 0.013, 'DF': 0.012, 'ES': 0.008, 'BA': 0.007, 'PE': 0.004, 'CE': 0.003}
+
+ORDER_STATUS_SHARE = {'delivered': 0.970, 'shipped': 0.011, 'canceled': 0.0063, 'unavailable': 0.0061,
+                      'invoiced': 0.0032, 'processing': 0.0030, 'created': 0.0002, 'approved': 0.0002}
+
+# Quantidade de itens por pedido (1 a 6)
+ITEMS_PER_ORDER_SHARE = [0.900, 0.076, 0.013, 0.005, 0.0045, 0.0015]
+
+PAYMENT_TYPE_SHARE = {'credit_card': 0.74, 'boleto': 0.19, 'voucher': 0.055, 'debit_card': 0.015}
+
+REVIEW_SCORE_SHARE = [0.11, 0.03, 0.08, 0.19, 0.59]
+
+# Pesos por hora do dia e dia da semana (segunda = 0) das compras
+HOUR_WEIGHTS = np.array([2.4, 1.1, 0.5, 0.3, 0.2, 0.2, 0.5, 1.2, 3.0, 4.7, 6.2, 6.6,
+                         6.0, 6.5, 6.6, 6.4, 6.3, 6.1, 5.8, 5.9, 6.3, 6.2, 5.9, 4.2])
+WEEKDAY_WEIGHTS = np.array([1.10, 1.08, 1.05, 1.00, 0.95, 0.74, 0.80])
+
+PERIOD_START = pd.Timestamp('2016-09-04')
+PERIOD_END = pd.Timestamp('2018-09-03')
+
+# Arquivos gerados (mesmos nomes da base pública)
+OUTPUT_FILES = {
+    'customers': 'olist_customers_dataset.csv',
+    'geolocation': 'olist_geolocation_dataset.csv',
+    'orders': 'olist_orders_dataset.csv',
+    'items': 'olist_order_items_dataset.csv',
+    'payments': 'olist_order_payments_dataset.csv',
+    'reviews': 'olist_order_reviews_dataset.csv',
+    'products': 'olist_products_dataset.csv',
+    'sellers': 'olist_sellers_dataset.csv',
+    'translation': 'product_category_name_translation.csv'
+}
+
+# Sal de cada tipo de identificador
+ID_SALTS = {'order': 1, 'customer': 2, 'customer_unique': 3, 'product': 4, 'seller': 5, 'review': 6}
+
+def _mix64(x):
+    """Função de mistura splitmix64 (bijeção em uint64)"""
+    with np.errstate(over='ignore'):
+        x = np.asarray(x, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+def _hash(seed, salt, index):
+    with np.errstate(over='ignore'):
+        key = _mix64(np.uint64(seed) * np.uint64(1000003) + np.uint64(salt))
+        return _mix64(np.asarray(index, dtype=np.uint64) ^ key)
+
+def _uniform(seed, salt, index):
+    """Uniforme em [0, 1) determinística por índice (sem estado em memória)"""
+    return (_hash(seed, salt, index) >> np.uint64(11)).astype(np.float64) / float(2 ** 53)
+
+def _hex_ids(seed, kind, index):
+    """Identificadores hexadecimais de 32 caracteres, únicos por índice"""
+    high = _hash(seed, ID_SALTS[kind], index)
+    low = _mix64(high ^ np.uint64(ID_SALTS[kind]))
+    return [f'{a:016x}{b:016x}' for a, b in zip(high.tolist(), low.tolist())]
+
+def _choice(rng, share, size):
+    keys = list(share)
+    weights = np.array([share[k] for k in keys], dtype=float)
+    return np.array(keys)[rng.choice(len(keys), size=size, p=weights / weights.sum())]
+
+def _daily_weights():
+    """Peso de cada dia do período: crescimento, dia da semana e datas comemorativas"""
+    days = pd.date_range(PERIOD_START, PERIOD_END, freq='D')
+    progress = np.arange(len(days)) / len(days)
+    weights = np.clip(0.08 + 1.6 * progress, None, 1.0)  # crescimento até o platô de 2018
+    weights = weights * WEEKDAY_WEIGHTS[days.dayofweek]
+
+    month, day = days.month, days.day
+    weights[(month == 11) & (day >= 20) & (day <= 27)] *= 1.6   # Black Friday
+    weights[(month == 11) & (day == 24) & (days.year == 2017)] *= 4.0
+    weights[(month == 12) & (day >= 1) & (day <= 20)] *= 1.2    # Natal
+    weights[(month == 5) & (day <= 10)] *= 1.15                 # Dia das Mães
+    weights[(month == 10) & (day <= 12)] *= 1.1                 # Dia das Crianças
+    return days, weights / weights.sum()
+
+def _purchase_timestamps(rng, size, days, day_weights):
+    chosen = days[rng.choice(len(days), size=size, p=day_weights)]
+    hours = rng.choice(24, size=size, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+    seconds = rng.integers(0, 3600, size=size)
+    return chosen + pd.to_timedelta(hours * 3600 + seconds, unit='s')
+
+def _format(timestamps):
+    return pd.Series(timestamps).dt.strftime('%Y-%m-%d %H:%M:%S').to_numpy()
+
+class SyntheticOlistGenerator:
+    """
+    Gerador determinístico da base Olist em escala configurável.
+
+    Produtos, vendedores e clientes não são mantidos em memória: seus atributos
+    (id, categoria, preço base, peso, UF) são derivados por hash do índice, e os
+    pedidos são gerados e gravados em blocos, então a memória independe da escala.
+    """
+
+    def __init__(self, scale=1.0, seed=42, reference_dir='olist-csv'):
+        self.scale = scale
+        self.seed = seed
+        self.reference_dir = reference_dir
+
+        self.n_orders = max(int(round(BASE_ORDERS * scale)), 1)
+        self.n_products = max(int(round(BASE_PRODUCTS * scale)), 1)
+        self.n_sellers = max(int(round(BASE_SELLERS * scale)), 1)
+
+        # Mix de categorias do catálogo real (arquivos pequenos distribuídos no repositório)
+        self.translation = pd.read_csv(os.path.join(reference_dir, OUTPUT_FILES['translation']))
+        reference_products = pd.read_csv(os.path.join(reference_dir, OUTPUT_FILES['products']),
+                                         usecols=['product_category_name'])
+        category_counts = reference_products['product_category_name'].value_counts(dropna=False)
+        self.categories = category_counts.index.to_numpy(dtype=object)
+        self.category_cdf = np.cumsum(category_counts.to_numpy() / category_counts.sum())
+
+        # Preço típico (log) por categoria
+        category_rng = np.random.default_rng([seed, 0])
+        self.category_log_price = category_rng.normal(4.4, 0.55, len(self.categories))
+
+        self.days, self.day_weights = _daily_weights()
+
+    def product_attributes(self, index):
+        """Categoria, preço base e peso de cada produto (derivados do índice)"""
+        category = np.minimum(np.searchsorted(self.category_cdf, _uniform(self.seed, 10, index)),
+                              len(self.categories) - 1)
+        z = np.sqrt(-2 * np.log(1 - _uniform(self.seed, 11, index))) * np.cos(2 * np.pi * _uniform(self.seed, 12, index))
+        price = np.clip(np.round(np.exp(self.category_log_price[category] + 0.75 * z), 2), 0.85, 6735.0)
+        weight = np.round(np.exp(6.3 + 1.2 * (_uniform(self.seed, 13, index) - 0.5) * 3)).astype(int)
+        return category, price, weight
+
+    def _state_of(self, salt, index, share):
+        keys = list(share)
+        cdf = np.cumsum([share[k] for k in keys])
+        position = np.minimum(np.searchsorted(cdf / cdf[-1], _uniform(self.seed, salt, index)), len(keys) - 1)
+        return np.array(keys)[position]
+
+    def _zip_prefixes(self, rng, states):
+        low = np.array([STATE_GEO[s][1] for s in states])
+        high = np.array([STATE_GEO[s][2] for s in states])
+        return rng.integers(low, high + 1)
+
+    def products_blocks(self):
+        for start in range(0, self.n_products, BLOCK_SIZE):
+            index = np.arange(start, min(start + BLOCK_SIZE, self.n_products))
+            rng = np.random.default_rng([self.seed, 1, start])
+            category, price, weight = self.product_attributes(index)
+            size = len(index)
+            yield pd.DataFrame({
+                'product_id': _hex_ids(self.seed, 'product', index),
+                'product_category_name': self.categories[category],
+                'product_name_lenght': rng.integers(5, 77, size),
+                'product_description_lenght': rng.integers(4, 3993, size),
+                'product_photos_qty': rng.choice([1, 2, 3, 4, 5, 6], size, p=[0.5, 0.2, 0.12, 0.08, 0.06, 0.04]),
+                'product_weight_g': weight,
+                'product_length_cm': rng.integers(7, 106, size),
+                'product_height_cm': rng.integers(2, 106, size),
+                'product_width_cm': rng.integers(6, 119, size)
+            })
+
+    def sellers_blocks(self):
+        for start in range(0, self.n_sellers, BLOCK_SIZE):
+            index = np.arange(start, min(start + BLOCK_SIZE, self.n_sellers))
+            rng = np.random.default_rng([self.seed, 2, start])
+            states = self._state_of(20, index, SELLER_STATE_SHARE)
+            yield pd.DataFrame({
+                'seller_id': _hex_ids(self.seed, 'seller', index),
+                'seller_zip_code_prefix': self._zip_prefixes(rng, states),
+                'seller_city': [STATE_GEO[s][0] for s in states],
+                'seller_state': states
+            })
+
+    def geolocation_blocks(self, rows_per_prefix=GEO_ROWS_PER_PREFIX):
+        for state, (city, low, high, lat, lng) in STATE_GEO.items():
+            rng = np.random.default_rng([self.seed, 3, low])
+            # Um prefixo a cada 5 da faixa da UF (~19 mil prefixos no total)
+            prefixes = np.repeat(np.arange(low, high + 1, 5), rows_per_prefix)
+            size = len(prefixes)
+            yield pd.DataFrame({
+                'geolocation_zip_code_prefix': prefixes,
+                'geolocation_lat': np.round(lat + rng.normal(0, 0.8, size), 6),
+                'geolocation_lng': np.round(lng + rng.normal(0, 0.8, size), 6),
+                'geolocation_city': city,
+                'geolocation_state': state
+            })
+
+    def order_blocks(self):
+        """Gera, por bloco, pedidos, clientes, itens, pagamentos e avaliações"""
+        for start in range(0, self.n_orders, BLOCK_SIZE):
+            index = np.arange(start, min(start + BLOCK_SIZE, self.n_orders))
+            yield self._order_block(index)
+
+    def _order_block(self, index):
+        rng = np.random.default_rng([self.seed, 4, int(index[0])])
+        size = len(index)
+        order_ids = np.array(_hex_ids(self.seed, 'order', index), dtype=object)
+
+        # Clientes: um customer_id por pedido, ~3% de clientes recorrentes
+        states = _choice(rng, STATE_SHARE, size)
+        repeat = rng.random(size) < 0.03
+        unique_index = np.where(repeat, rng.integers(0, index + 1), index)
+        customers = pd.DataFrame({
+            'customer_id': _hex_ids(self.seed, 'customer', index),
+            'customer_unique_id': _hex_ids(self.seed, 'customer_unique', unique_index),
+            'customer_zip_code_prefix': self._zip_prefixes(rng, states),
+            'customer_city': [STATE_GEO[s][0] for s in states],
+            'customer_state': states
+        })
+
+        # Pedidos com sazonalidade e status
+        purchase = _purchase_timestamps(rng, size, self.days, self.day_weights)
+        status = _choice(rng, ORDER_STATUS_SHARE, size)
+        approved = purchase + pd.to_timedelta(rng.exponential(0.4, size), unit='D')
+        carrier = approved + pd.to_timedelta(rng.gamma(2.0, 1.5, size), unit='D')
+        distance_days = np.array([6 + 30 * (FREIGHT_REGION_OFFSET[s] + 0.25) for s in states])
+        delivered = carrier + pd.to_timedelta(rng.gamma(2.0, distance_days / 2), unit='D')
+        estimated = (purchase + pd.to_timedelta(distance_days + 12 + rng.integers(0, 10, size), unit='D')).normalize()
+        is_delivered = status == 'delivered'
+        orders = pd.DataFrame({
+            'order_id': order_ids,
+            'customer_id': customers['customer_id'],
+            'order_status': status,
+            'order_purchase_timestamp': _format(purchase),
+            'order_approved_at': np.where(np.isin(status, ['created']), None, _format(approved)),
+            'order_delivered_carrier_date': np.where(np.isin(status, ['delivered', 'shipped']), _format(carrier), None),
+            'order_delivered_customer_date': np.where(is_delivered, _format(delivered), None),
+            'order_estimated_delivery_date': _format(estimated)
+        })
+
+        # Itens: popularidade concentrada (poucos produtos muito vendidos)
+        n_items = rng.choice(np.arange(1, 7), size, p=np.array(ITEMS_PER_ORDER_SHARE) / sum(ITEMS_PER_ORDER_SHARE))
+        item_order = np.repeat(np.arange(size), n_items)
+        item_number = np.concatenate([np.arange(1, k + 1) for k in n_items])
+        first_product = (self.n_products * rng.random(size) ** 3).astype(np.int64)
+        other_product = (self.n_products * rng.random(len(item_order)) ** 3).astype(np.int64)
+        same_product = (item_number == 1) | (rng.random(len(item_order)) < 0.6)
+        product = np.where(same_product, first_product[item_order], other_product)
+        category, price, weight = self.product_attributes(product)
+
+        item_states = states[item_order]
+        freight_log = (2.55 + np.array([FREIGHT_REGION_OFFSET[s] for s in item_states])
+                       + 0.25 * np.log(weight / 1000 + 0.5) + rng.normal(0, 0.3, len(item_order)))
+        freight = np.round(np.exp(freight_log), 2)
+        freight[rng.random(len(item_order)) < 0.003] = 0.0  # frete grátis
+
+        seller = (self.n_sellers * rng.random(size) ** 2).astype(np.int64)[item_order]
+        items = pd.DataFrame({
+            'order_id': order_ids[item_order],
+            'order_item_id': item_number,
+            'product_id': _hex_ids(self.seed, 'product', product),
+            'seller_id': _hex_ids(self.seed, 'seller', seller),
+            'shipping_limit_date': _format(purchase[item_order] + pd.Timedelta(days=6)),
+            'price': price,
+            'freight_value': freight
+        })
+
+        # Pagamentos: maioria cartão; ~3% dividem o valor com vouchers
+        order_total = np.bincount(item_order, weights=price + freight, minlength=size)
+        payment_type = _choice(rng, PAYMENT_TYPE_SHARE, size)
+        split = (rng.random(size) < 0.03) & (payment_type != 'voucher')
+        n_payments = np.where(split, rng.integers(2, 4, size), 1)
+        pay_order = np.repeat(np.arange(size), n_payments)
+        pay_sequential = np.concatenate([np.arange(1, k + 1) for k in n_payments])
+        share = rng.dirichlet([2.0, 1.0, 1.0], size)
+        pay_share = np.ones(len(pay_order))
+        multi = n_payments[pay_order] > 1
+        weights = share[pay_order, np.minimum(pay_sequential - 1, 2)]
+        norm = np.bincount(pay_order, weights=np.where(multi, weights, 0.0), minlength=size)[pay_order]
+        pay_share[multi] = weights[multi] / norm[multi]
+        pay_type = np.where(pay_sequential == 1, payment_type[pay_order], 'voucher')
+        log_total = np.log(order_total[pay_order] + 1)
+        installments = np.where(
+            pay_type == 'credit_card',
+            np.clip(np.round(rng.gamma(1.2 + 0.4 * (log_total - 4), 2.0)), 1, 24),
+            1).astype(int)
+        payments = pd.DataFrame({
+            'order_id': order_ids[pay_order],
+            'payment_sequential': pay_sequential,
+            'payment_type': pay_type,
+            'payment_installments': installments,
+            'payment_value': np.round(order_total[pay_order] * pay_share, 2)
+        })
+
+        # Avaliações: notas piores quando a entrega atrasa
+        late = is_delivered & (delivered > estimated)
+        scores = rng.choice(np.arange(1, 6), size, p=REVIEW_SCORE_SHARE)
+        scores = np.where(late & (rng.random(size) < 0.5), rng.integers(1, 3, size), scores)
+        review_date = np.where(is_delivered, delivered, estimated).astype('datetime64[ns]')
+        review_date = pd.DatetimeIndex(review_date).normalize() + pd.Timedelta(days=1)
+        has_comment = rng.random(size) < 0.41
+        reviews = pd.DataFrame({
+            'review_id': _hex_ids(self.seed, 'review', index),
+            'order_id': order_ids,
+            'review_score': scores,
+            'review_comment_title': None,
+            'review_comment_message': np.where(has_comment, np.where(scores >= 4, 'recomendo', 'nao recomendo'), None),
+            'review_creation_date': _format(review_date),
+            'review_answer_timestamp': _format(review_date + pd.to_timedelta(rng.exponential(2.5, size), unit='D'))
+        })
+
+        return {'customers': customers, 'orders': orders, 'items': items, 'payments': payments, 'reviews': reviews}
+
+def _write_blocks(path, blocks):
+    """Grava os blocos em sequência no mesmo CSV (cabeçalho só no primeiro)"""
+    rows = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        for i, block in enumerate(blocks):
+            block.to_csv(f, header=(i == 0), index=False)
+            rows += len(block)
+    return rows
+
+def generate_dataset(output_dir, scale=1.0, seed=42, reference_dir='olist-csv', scale_geolocation=False):
+    """
+    Gera os CSVs sintéticos da Olist em output_dir.
+
+    Args:
+        output_dir (str): Diretório de saída
+        scale (float): Fator de escala em relação à base pública (1, 10, 100...)
+        seed (int): Semente; a mesma semente e escala geram arquivos idênticos
+        reference_dir (str): Diretório com o catálogo e a tradução de categorias reais
+        scale_geolocation (bool): Escalar também a geolocalização (por padrão fixa em 1x)
+
+    Returns:
+        dict: Linhas gravadas por arquivo
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    generator = SyntheticOlistGenerator(scale, seed, reference_dir)
+
+    def path(name):
+        return os.path.join(output_dir, OUTPUT_FILES[name])
+
+    rows = {}
+    shutil.copy(os.path.join(reference_dir, OUTPUT_FILES['translation']), path('translation'))
+    rows['translation'] = len(generator.translation)
+    rows['products'] = _write_blocks(path('products'), generator.products_blocks())
+    rows['sellers'] = _write_blocks(path('sellers'), generator.sellers_blocks())
+    geo_rows = max(int(round(GEO_ROWS_PER_PREFIX * (scale if scale_geolocation else 1))), 1)
+    rows['geolocation'] = _write_blocks(path('geolocation'), generator.geolocation_blocks(geo_rows))
+
+    # Tabelas de pedidos: todos os arquivos abertos juntos, um bloco de pedidos por vez
+    tables = ['customers', 'orders', 'items', 'payments', 'reviews']
+    handles = {name: open(path(name), 'w', encoding='utf-8', newline='') for name in tables}
+    rows.update({name: 0 for name in tables})
+    try:
+        for i, block in enumerate(generator.order_blocks()):
+            for name in tables:
+                block[name].to_csv(handles[name], header=(i == 0), index=False)
+                rows[name] += len(block[name])
+    finally:
+        for handle in handles.values():
+            handle.close()
+
+    return rows
+
+def synthetic_dir_name(scale, seed=42):
+    """Nome do diretório de uma escala e semente (a semente 42 é a dos dados de referência)"""
+    return f'x{scale:g}' if seed == 42 else f'x{scale:g}_seed{seed}'
+
+def synthetic_data_dir(scale, seed=42, base_dir=SYNTHETIC_DIR):
+    """Diretório com os dados sintéticos da escala e semente (gerado na primeira vez)"""
+    csv_dir = os.path.abspath(os.path.join(base_dir, synthetic_dir_name(scale, seed)))
+    if not os.path.exists(os.path.join(csv_dir, OUTPUT_FILES['orders'])):
+        print(f"Gerando dados sintéticos {scale:g}x (semente {seed}) em {csv_dir}...")
+        generate_dataset(csv_dir, scale, seed)
+    return csv_dir
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera a base Olist sintética em escala configurável')
+    parser.add_argument('--scale', type=float, nargs='+', default=[1.0], help='Fatores de escala (ex.: 1 10 100)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', default=SYNTHETIC_DIR, help='Diretório base de saída')
+    parser.add_argument('--reference', default='olist-csv', help='Diretório com produtos e tradução reais')
+    parser.add_argument('--scale-geolocation', action='store_true')
+    args = parser.parse_args()
+
+    for scale in args.scale:
+        output_dir = os.path.join(args.output, synthetic_dir_name(scale, args.seed))
+        print(f"Gerando escala {scale:g}x em {output_dir} (semente {args.seed})...")
+        rows = generate_dataset(output_dir, scale, args.seed, args.reference, args.scale_geolocation)
+        for name, count in rows.items():
+            print(f"   • {OUTPUT_FILES[name]}: {count:,} linhas")
+
+if __name__ == "__main__":
+    main()